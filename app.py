@@ -1,62 +1,188 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
+import argparse
+import gc
 import sys
 import os
 
 # Add the src directory to the path so we can import our chatbot
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from chatbot import EnhancedChatbot
+import chat_api
+from chat_api import PREFLIGHT_MAX_AGE, create_registry, encode
+from kb_registry import UnknownKnowledgeBase
+from static_assets import StaticAssetCache
+from stats_stream import (MAX_THREAD_STREAMS, STREAM_HEADERS, STREAMS_FULL_RETRY_AFTER, StreamSlots,
+                          event_stream)
 
-app = Flask(__name__)
-CORS(app)
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), 'templates')
 
-# Initialize the chatbot
-chatbot = EnhancedChatbot()
 
-@app.route('/')
-def home():
-    """Serve the main chat interface"""
-    return render_template('index.html')
+def create_app(registry=None, templates=None, preload=True, max_streams=None):
+    """
+    Build the Flask application
 
-@app.route('/chat', methods=['POST'])
-def chat():
-    """Handle chat messages from the frontend"""
-    try:
-        data = request.get_json()
-        user_message = data.get('message', '').strip()
-        
-        if not user_message:
-            return jsonify({'error': 'Empty message'}), 400
-        
-        # Get response from chatbot
-        response = chatbot.get_response(user_message)
+    Requests only read the knowledge-base snapshot that was current when
+    they started. Reloads and edits build a new snapshot and publish it with
+    one assignment, so any number of threads answer without taking a lock.
+    Create the app before forking worker processes (gunicorn --preload) so
+    the workers share the loaded index.
+
+    Args:
+        registry: Knowledge bases to serve (default: create_registry(),
+            which loads the default one now)
+        templates: Cache of the page templates (default: templates/index.html)
+        preload: Load the default knowledge base before returning; with
+            False it loads in the background and /readyz reports when it is done
+        max_streams: Open /stats/stream responses allowed at once, each
+            holding a request thread (default: CHATBOT_MAX_STREAMS or 4)
+    """
+    app = Flask(__name__)
+    # Let browsers cache preflight requests instead of sending one per message
+    CORS(app, max_age=PREFLIGHT_MAX_AGE, expose_headers=[chat_api.SESSION_HEADER])
+
+    # Named knowledge bases (?kb=<name>) are loaded on first use and reloaded when
+    # their training data changes; the default one is loaded up front
+    if registry is None:
+        registry = create_registry(load=preload)
+        if not preload:
+            registry.load_in_background()
+
+    # The page is plain HTML, so it is served from memory, pre-gzipped, with an ETag
+    if templates is None:
+        templates = StaticAssetCache(TEMPLATES_DIR, ['index.html'])
+
+    # Every open stats stream holds one request thread until the client leaves
+    if max_streams is None:
+        max_streams = int(os.environ.get('CHATBOT_MAX_STREAMS', MAX_THREAD_STREAMS))
+    streams = StreamSlots(max_streams)
+
+    app.extensions['chatbot'] = {'registry': registry, 'templates': templates, 'streams': streams}
+
+    @app.errorhandler(UnknownKnowledgeBase)
+    def unknown_knowledge_base(e):
+        return jsonify({'error': f'Unknown knowledge base: {e.args[0]}', 'status': 'error'}), 404
+
+    @app.route('/')
+    def home():
+        """Serve the main chat interface"""
+        asset = templates.get('/index.html')
+        if asset is None:
+            return render_template('index.html')
+        status, headers, body = asset.response(request.headers.get('Accept-Encoding'),
+                                               request.headers.get('If-None-Match'))
+        return Response(body, status=status, headers=headers)
+
+    @app.route('/chat', methods=['POST'])
+    def chat():
+        """Handle chat messages from the frontend"""
+        try:
+            data = request.get_json(silent=True)
+            # Each user's recent turns, kept under a session cookie or X-Session-Id
+            session_id, session_headers = chat_api.chat_session(registry, request.headers.get('Cookie'),
+                                                                request.headers.get(chat_api.SESSION_HEADER))
+            
+            # The body was encoded when the knowledge base was built
+            status, body = chat_api.chat(registry, request.args.to_dict(flat=False), data, session_id)
+            payload, headers = encode(body, request.headers.get('Accept-Encoding'))
+            return Response(payload, status=status, mimetype='application/json', headers=headers + session_headers)
         
-        return jsonify({
-            'response': response,
-            'status': 'success'
-        })
-    
-    except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'status': 'error'
-        }), 500
-
-@app.route('/stats')
-def stats():
-    """Get chatbot statistics"""
-    try:
-        stats = {
-            'total_questions': len(chatbot.conversation_history),
-            'training_data_count': len(chatbot.training_data),
-            'last_question': chatbot.conversation_history[-1] if chatbot.conversation_history else None
-        }
-        return jsonify(stats)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        except Exception as e:
+            return jsonify({
+                'error': str(e),
+                'status': 'error'
+            }), 500
+
+    @app.route('/healthz')
+    def healthz():
+        """Liveness: the process is up, whether or not the index is loaded"""
+        status, body = chat_api.health()
+        return jsonify(body), status
+
+    @app.route('/readyz')
+    def readyz():
+        """Readiness: the default knowledge base is loaded (with its version and build time)"""
+        status, body = chat_api.readiness(registry)
+        return jsonify(body), status
+
+    @app.route('/answer')
+    def answer():
+        """Cacheable GET form of /chat, revalidated with the knowledge-base version"""
+        status, payload, headers = chat_api.answer(registry, request.args.to_dict(flat=False),
+                                                   request.headers.get('Accept-Encoding'),
+                                                   request.headers.get('If-None-Match'))
+        return Response(payload, status=status, headers=headers, mimetype='application/json')
+
+    @app.route('/stats')
+    def stats():
+        """Get chatbot statistics (304 when unchanged since the client's copy)"""
+        try:
+            status, payload, headers = chat_api.stats_response(registry, request.args.to_dict(flat=False),
+                                                               request.headers.get('If-None-Match'))
+            return Response(payload, status=status, headers=headers, mimetype='application/json')
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/stats/stream')
+    def stats_stream():
+        """Server-Sent Events: the statistics now and whenever they change"""
+        query = request.args.to_dict(flat=False)
+        status, body = chat_api.stats(registry, query)
+        if status != 200:
+            return jsonify(body), status
+        if not streams.acquire():
+            return (jsonify({'error': 'Too many open stats streams', 'status': 'error'}), 503,
+                    {'Retry-After': str(STREAMS_FULL_RETRY_AFTER)})
+        kb = chat_api.kb_name(query)
+        response = Response(event_stream(lambda: chat_api.stats_payload(registry, kb)), headers=STREAM_HEADERS)
+        # The server closes the response when the client disconnects
+        response.call_on_close(streams.release)
+        return response
+
+    @app.route('/admin/reload', methods=['POST'])
+    def admin_reload():
+        """Rebuild the knowledge base from disk in the background"""
+        status, body = chat_api.reload(registry, request.args.to_dict(flat=False),
+                                       request.headers.get('X-Admin-Token'))
+        return jsonify(body), status
+
+    return app
+
+
+def before_fork(app):
+    """
+    Prepare a loaded app to be shared by forked workers
+
+    Watcher threads do not survive fork, so they are stopped here and each
+    worker starts its own with after_fork(). Freezing the heap keeps the
+    garbage collector from writing to (and so copying) the shared pages.
+    """
+    state = app.extensions['chatbot']
+    state['templates'].stop_watching()
+    state['registry'].stop_watching()
+    gc.freeze()
+
+
+def after_fork(app):
+    """Restart the file watchers in a forked worker"""
+    state = app.extensions['chatbot']
+    state['templates'].start_watching()
+    state['registry'].start_watching()
+
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Power BI Chatbot web interface (development server)')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=5000, help='Port to listen on')
+    parser.add_argument('--debug', action='store_true', help='Enable the debugger and reload on code changes')
+    args = parser.parse_args()
+
     print("Starting Chatbot Web Interface...")
-    print("Chat interface will be available at: http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    print(f"Chat interface will be available at: http://localhost:{args.port}")
+    print("For production, run: gunicorn -c gunicorn.conf.py wsgi:app")
+    # The server binds right away; the knowledge base loads in the background
+    app = create_app(preload=False)
+    try:
+        app.run(debug=args.debug, host=args.host, port=args.port, threaded=True)
+    finally:
+        app.extensions['chatbot']['registry'].close()
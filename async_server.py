@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Asyncio HTTP Server for Chatbot Interface
+Serves the same API as simple_server.py from a single event loop with
+HTTP/1.1 keep-alive, so idle browser connections cost a coroutine instead of
+a thread. Matching runs in a bounded executor.
+"""
+
+import asyncio
+import json
+import mimetypes
+import urllib.parse
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import chat_api
+from static_assets import StaticAssetCache
+from stats_stream import HEARTBEAT, HEARTBEAT_INTERVAL, PUSH_INTERVAL, STREAM_HEADERS, STREAM_START, event
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Only these file types are served from the project directory
+STATIC_EXTENSIONS = {'.html', '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico'}
+
+# Seconds an idle keep-alive connection is kept open
+KEEPALIVE_TIMEOUT = 75
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class BadRequest(Exception):
+    """Raised for requests that cannot be parsed; the connection is closed"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncChatServer:
+    def __init__(self, registry, max_inflight=None, keepalive_timeout=KEEPALIVE_TIMEOUT, assets=None):
+        """
+        Initialize the server
+
+        Args:
+            registry: Knowledge-base registry (None serves canned fallback answers)
+            max_inflight: Matching jobs run at once; further requests wait
+                without holding a thread (default: number of CPUs)
+            keepalive_timeout: Seconds an idle connection stays open
+            assets: In-memory cache of the interface pages (default: the
+                pages in the project directory)
+        """
+        self.registry = registry
+        self.max_inflight = max_inflight or os.cpu_count() or 4
+        self.keepalive_timeout = keepalive_timeout
+        self.assets = assets if assets is not None else StaticAssetCache(BASE_DIR)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix='chat-match')
+        self.inflight = None
+        # Tasks of the open connections, so shutdown can close them
+        self.connections = set()
+        self.requests_served = 0
+
+    async def run_job(self, function, *args):
+        """Run blocking work (matching, loading a knowledge base) off the event loop"""
+        if self.inflight is None:
+            self.inflight = asyncio.Semaphore(self.max_inflight)
+        async with self.inflight:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), self.keepalive_timeout)
+                except BadRequest as e:
+                    self.write_response(writer, e.status, self.json_body({'error': str(e), 'status': 'error'}),
+                                        keep_alive=False)
+                    await writer.drain()
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                method, target, version, headers, body = request
+                url = urllib.parse.urlsplit(target)
+                keep_alive = self.wants_keep_alive(version, headers)
+                try:
+                    if method == 'GET' and url.path == '/stats/stream':
+                        # The stream holds a coroutine, not a thread, until the client leaves
+                        await self.stream_stats(writer, urllib.parse.parse_qs(url.query))
+                        break
+                    status, payload, content_type, extra_headers = await self.dispatch(method, target, headers, body)
+                except Exception as e:
+                    print(f"Error handling {method} {url.path}: {e}")
+                    self.write_response(writer, 500, self.json_body({'error': str(e), 'status': 'error'}),
+                                        keep_alive=False)
+                    await writer.drain()
+                    break
+                self.write_response(writer, status, payload, content_type, keep_alive, extra_headers,
+                                    head_only=method == 'HEAD')
+                self.requests_served += 1
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def read_request(self, reader):
+        """Parse one request; returns None when the client closed the connection"""
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return None
+            parts = request_line.decode('latin-1').split()
+            if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+                raise BadRequest(400, 'Malformed request line')
+            method, target, version = parts
+
+            headers = {}
+            header_bytes = 0
+            while True:
+                line = await reader.readline()
+                header_bytes += len(line)
+                if header_bytes > MAX_HEADER_BYTES:
+                    raise BadRequest(431, 'Request headers too large')
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            # StreamReader line limit exceeded
+            raise BadRequest(431, 'Request line too long')
+
+        if 'transfer-encoding' in headers:
+            raise BadRequest(501, 'Chunked request bodies are not supported')
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise BadRequest(400, 'Invalid Content-Length')
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise BadRequest(413, 'Request body too large')
+        body = await reader.readexactly(length) if length else b''
+        return method, target, version, headers, body
+
+    @staticmethod
+    def wants_keep_alive(version, headers):
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+    async def dispatch(self, method, target, headers, body):
+        """Returns (status, payload bytes, content type, extra headers)"""
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+
+        if method == 'OPTIONS':
+            return 200, b'', 'text/plain', [('Access-Control-Max-Age', str(chat_api.PREFLIGHT_MAX_AGE))]
+
+        if method == 'POST' and url.path == '/chat':
+            try:
+                data = json.loads(body.decode('utf-8'))
+            except (UnicodeDecodeError, ValueError):
+                return self.json_response(400, {'error': 'Invalid JSON', 'status': 'error'})
+            session_id, session_headers = chat_api.chat_session(self.registry, headers.get('cookie'),
+                                                                headers.get(chat_api.SESSION_HEADER.lower()))
+            status, reply = await self.run_job(chat_api.chat, self.registry, query, data, session_id)
+            status, payload, content_type, extra = self.json_response(status, reply, headers.get('accept-encoding'))
+            return status, payload, content_type, extra + session_headers
+
+        if method == 'POST' and url.path == '/admin/reload':
+            return self.json_response(*await self.run_job(
+                chat_api.reload, self.registry, query, headers.get('x-admin-token')))
+
+        if method in ('GET', 'HEAD') and url.path == '/healthz':
+            return self.json_response(*chat_api.health())
+
+        if method in ('GET', 'HEAD') and url.path == '/readyz':
+            return self.json_response(*chat_api.readiness(self.registry))
+
+        if method == 'GET' and url.path == '/answer':
+            status, payload, answer_headers = await self.run_job(
+                chat_api.answer, self.registry, query, headers.get('accept-encoding'), headers.get('if-none-match'))
+            return status, payload, 'application/json', answer_headers
+
+        if method in ('GET', 'HEAD') and url.path == '/stats':
+            server_stats = {
+                'mode': 'asyncio',
+                'open_connections': len(self.connections),
+                'requests_served': self.requests_served,
+                'max_inflight': self.max_inflight
+            }
+            status, payload, stats_headers = await self.run_job(
+                chat_api.stats_response, self.registry, query, headers.get('if-none-match'), server_stats)
+            return status, payload, 'application/json', stats_headers
+
+        if method in ('GET', 'HEAD'):
+            path = '/simple_interface.html' if url.path == '/' else url.path
+            asset = self.assets.get(path)
+            if asset is not None:
+                status, asset_headers, payload = asset.response(headers.get('accept-encoding'),
+                                                                headers.get('if-none-match'))
+                # Content-Type and Content-Length are written by write_response
+                extra = [(name, value) for name, value in asset_headers
+                         if name not in ('Content-Type', 'Content-Length')]
+                return status, payload, asset.content_type, extra
+            return await self.static_file(path)
+
+        return self.json_response(405 if url.path in ('/chat', '/answer', '/stats', '/admin/reload') else 404,
+                                  {'error': 'Not found', 'status': 'error'})
+
+    async def stream_stats(self, writer, query):
+        """Server-Sent Events: the stats now and whenever they change, until the client leaves"""
+        status, body = await self.run_job(chat_api.stats, self.registry, query)
+        if status != 200:
+            self.write_response(writer, status, self.json_body(body), keep_alive=False)
+            await writer.drain()
+            return
+
+        kb = chat_api.kb_name(query)
+        last = chat_api.encode(body)[0]
+        head = "HTTP/1.1 200 OK\r\n" + ''.join(
+            f"{name}: {value}\r\n" for name, value in
+            [('Date', formatdate(usegmt=True))] + STREAM_HEADERS + chat_api.CORS_HEADERS + [('Connection', 'close')])
+        writer.write(head.encode('latin-1') + b'\r\n' + STREAM_START + event(last))
+        quiet = 0.0
+        try:
+            await writer.drain()
+            while True:
+                await asyncio.sleep(PUSH_INTERVAL)
+                quiet += PUSH_INTERVAL
+                # Only read if the knowledge base is in memory, so the loop never loads one
+                payload = chat_api.stats_payload(self.registry, kb)
+                if payload is not None and payload != last:
+                    last, quiet = payload, 0.0
+                    writer.write(event(payload))
+                elif quiet >= HEARTBEAT_INTERVAL:
+                    quiet = 0.0
+                    writer.write(HEARTBEAT)
+                else:
+                    continue
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def static_file(self, path):
+        relative = os.path.normpath(urllib.parse.unquote(path)).lstrip('/\\')
+        full_path = os.path.join(BASE_DIR, relative)
+        hidden = any(part.startswith('.') for part in relative.split(os.sep))
+        if (hidden or os.path.splitext(relative)[1].lower() not in STATIC_EXTENSIONS
+                or os.path.commonpath([BASE_DIR, os.path.abspath(full_path)]) != BASE_DIR):
+            return self.json_response(404, {'error': 'Not found', 'status': 'error'})
+
+        def read():
+            with open(full_path, 'rb') as f:
+                return f.read()
+
+        try:
+            payload = await asyncio.get_running_loop().run_in_executor(None, read)
+        except (OSError, ValueError):
+            # ValueError: a NUL byte in the decoded path
+            return self.json_response(404, {'error': 'Not found', 'status': 'error'})
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/'):
+            content_type += '; charset=utf-8'
+        return 200, payload, content_type, []
+
+    @staticmethod
+    def json_body(data):
+        return json.dumps(data).encode('utf-8')
+
+    def json_response(self, status, data, accept_encoding=None):
+        payload, encoding_headers = chat_api.encode(data, accept_encoding)
+        return status, payload, 'application/json', encoding_headers
+
+    def write_response(self, writer, status, payload, content_type='application/json',
+                       keep_alive=True, extra_headers=(), head_only=False):
+        headers = [('Date', formatdate(usegmt=True))]
+        if status != 304:
+            headers += [('Content-Type', content_type), ('Content-Length', str(len(payload)))]
+        headers += chat_api.CORS_HEADERS + list(extra_headers)
+        if keep_alive:
+            headers += [('Connection', 'keep-alive'), ('Keep-Alive', f'timeout={int(self.keepalive_timeout)}')]
+        else:
+            headers.append(('Connection', 'close'))
+
+        head = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        head += ''.join(f"{name}: {value}\r\n" for name, value in headers) + "\r\n"
+        writer.write(head.encode('latin-1') + (b'' if head_only else payload))
+
+    async def close(self):
+        """Cancel the open connections and wait until their sockets are closed"""
+        tasks = list(self.connections)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def serve(self, host='', port=8000):
+        server = await asyncio.start_server(self.handle_connection, host or None, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+
+def start_server(port=8000, max_inflight=None, keepalive_timeout=KEEPALIVE_TIMEOUT):
+    """Start the asyncio HTTP server"""
+    # The default knowledge base loads while the server binds and starts
+    # answering; requests that need it wait (see /readyz)
+    registry = chat_api.create_registry(load=False)
+    registry.load_in_background()
+
+    server = AsyncChatServer(registry, max_inflight, keepalive_timeout)
+    print(f"🚀 Async chatbot server starting ({server.max_inflight} matching jobs at a time)...")
+    print(f"📱 Open your browser and go to: http://localhost:{port}")
+    print(f"🛑 Press Ctrl+C to stop the server")
+    try:
+        asyncio.run(server.serve('', port))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped by user")
+    finally:
+        server.executor.shutdown(wait=False)
+        registry.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Start the asyncio chatbot web server')
+    parser.add_argument('--port', type=int, default=8000, help='Port to run server on')
+    parser.add_argument('--max-inflight', type=int, help='Matching jobs run at once (default: CPU count)')
+    parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                        help='Seconds an idle connection is kept open')
+    args = parser.parse_args()
+
+    start_server(args.port, args.max_inflight, args.keepalive_timeout)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: answer memory as plain strings vs the compressed answer store
+Answers are built from the real training answers so they compress like
+production text, then looked up cold (block inflate) and hot (LRU hit).
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from answer_store import AnswerStore
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+def synthetic_answers(size, seed=7):
+    """Unique answers made of real answer sentences plus ticket-specific details"""
+    with open(DATA_FILE, 'r', encoding='utf-8') as f:
+        real = [entry['answer'] for entry in json.load(f)]
+    rng = random.Random(seed)
+    return [f"{rng.choice(real)} {rng.choice(real)} (ticket {i}, updated by team {rng.randrange(40)})"
+            for i in range(size)]
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the compressed answer store')
+    parser.add_argument('--size', type=int, default=50000, help='Number of answers')
+    args = parser.parse_args()
+
+    answers = synthetic_answers(args.size)
+    text_bytes = sum(len(answer.encode('utf-8')) for answer in answers)
+
+    _, plain = measure(lambda: [''.join(answer) for answer in answers])
+
+    def build():
+        store = AnswerStore()
+        for answer in answers:
+            store.add(answer)
+        store.flush()
+        return store
+    store, compressed = measure(build)
+
+    rng = random.Random(1)
+    ids = [rng.randrange(len(store)) for _ in range(2000)]
+    store._cache.clear()
+    start = time.perf_counter()
+    for answer_id in ids:
+        store.get(answer_id)
+    cold = (time.perf_counter() - start) / len(ids)
+    hot_id = ids[0]
+    start = time.perf_counter()
+    for _ in ids:
+        store.get(hot_id)
+    hot = (time.perf_counter() - start) / len(ids)
+
+    print(f"Answers: {len(answers)}  UTF-8 text: {text_bytes / 1e6:.1f} MB")
+    print(f"Plain strings:    {plain / 1e6:8.1f} MB")
+    print(f"Compressed store: {compressed / 1e6:8.1f} MB ({store.block_count()} blocks)")
+    print(f"Lookup: {cold * 1e6:.1f} µs cold, {hot * 1e6:.2f} µs cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark: collision analysis time as the knowledge base grows
+Runs scripts/collision_matrix.py's analysis on synthetic corpora, one shaped
+like the real training data (common question words shared by most entries)
+and one where entries share few words, so most pairs are never scored.
+With the default 2 paraphrases, 20,000 realistic entries take ~30 s and
+20,000 sparse entries under 2 s.
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from bench_entry_store import synthetic_corpus
+from collision_matrix import analyze
+
+
+def sparse_corpus(size, seed=7):
+    """Entries that each share words with only a few others"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        topic = f"topic{rng.randrange(size // 10 + 1)}"
+        corpus.append({
+            'question': f"alpha{i} {topic} question{rng.randrange(size)}",
+            'answer': f"Answer {i}",
+            'keywords': [f"alpha{i}", topic]
+        })
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Collision analysis benchmark')
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000, 5000, 20000], help='Corpus sizes')
+    parser.add_argument('--paraphrases', type=int, default=2, help='Synthetic paraphrases per entry')
+    args = parser.parse_args()
+
+    print(f"{'corpus':<10} {'entries':>8} {'queries':>8} {'findings':>9} {'time':>9}")
+    for name, build in [('realistic', synthetic_corpus), ('sparse', sparse_corpus)]:
+        for size in args.entries:
+            entries = build(size)
+            start = time.perf_counter()
+            findings, query_count = analyze(entries, args.paraphrases)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<10} {size:>8} {query_count:>8} {len(findings):>9} {elapsed:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory of the compact entry store vs the old per-entry dicts
+Builds a synthetic corpus and measures the index with tracemalloc.
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fast_semantic_matcher import FastSemanticMatcher
+
+TOPIC_WORDS = ['power', 'bi', 'refresh', 'report', 'gateway', 'dataflow', 'workspace', 'premium',
+               'databricks', 'azure', 'hive', 'excel', 'semantic', 'model', 'capacity', 'jira']
+QUESTION_STARTS = ['how can i', 'why does my', 'what is', 'why is my', 'can i']
+
+
+def synthetic_corpus(size, seed=7):
+    """Training entries shaped like the real ones, with a long-tail vocabulary"""
+    rng = random.Random(seed)
+    rare_words = [f"term{i}" for i in range(size // 2)]
+    answers = [f"Answer template {i}: " + ' '.join(rng.choices(rare_words, k=40)) for i in range(size // 4)]
+
+    corpus = []
+    for _ in range(size):
+        topic = rng.sample(TOPIC_WORDS, 3)
+        rare = rng.sample(rare_words, 4)
+        corpus.append({
+            'question': f"{rng.choice(QUESTION_STARTS)} {' '.join(topic + rare)}?",
+            'answer': rng.choice(answers),
+            'keywords': topic + rare[:2] + rng.sample(TOPIC_WORDS, 2)
+        })
+    return corpus
+
+
+def legacy_index(training_data, matcher):
+    """The previous processed_entries layout: a dict and three sets per entry"""
+    processed_entries = []
+    for entry in training_data:
+        processed = {
+            'original': entry,
+            'question_clean': matcher.clean_text(entry['question']),
+            'question_words': set(matcher.clean_text(entry['question']).split()),
+            'keyword_words': set(),
+            'all_words': set()
+        }
+        for keyword in entry['keywords']:
+            processed['keyword_words'].update(matcher.clean_text(keyword).split())
+        processed['all_words'] = processed['question_words'].union(processed['keyword_words'])
+        processed_entries.append(processed)
+    return processed_entries
+
+
+def retained(build):
+    """Bytes still allocated after build() returns, and the build time.
+
+    The corpus is created inside the measurement so both layouts pay for the
+    text they keep alive."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Entry store memory benchmark')
+    parser.add_argument('--entries', type=int, default=100000, help='Synthetic corpus size')
+    args = parser.parse_args()
+
+    helper = FastSemanticMatcher([])
+
+    # Old layout: processed_entries keeps the training data alive through 'original'
+    legacy, legacy_bytes, legacy_time = retained(lambda: legacy_index(synthetic_corpus(args.entries), helper))
+    del legacy
+
+    # New layout: the corpus list is dropped once the store is built
+    matcher, store_bytes, store_time = retained(lambda: FastSemanticMatcher(synthetic_corpus(args.entries)))
+
+    print(f"Entries: {args.entries}")
+    print(f"Legacy processed_entries: {legacy_bytes / 1e6:8.1f} MB  (built in {legacy_time:.2f}s)")
+    print(f"Compact entry store:      {store_bytes / 1e6:8.1f} MB  (built in {store_time:.2f}s)")
+    print(f"Reduction: {(1 - store_bytes / legacy_bytes) * 100:.1f}%")
+
+    queries = [entry['question'] for entry in synthetic_corpus(200, seed=11)]
+    start = time.perf_counter()
+    for query in queries:
+        matcher.find_best_match(query)
+    print(f"Average match time: {(time.perf_counter() - start) / len(queries) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
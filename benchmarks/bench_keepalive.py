@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-message latency of the chat UI against simple_server.py
+Before: every message opens a new connection and, cross-origin, pays an
+uncached preflight OPTIONS on another new connection.
+After: one persistent HTTP/1.1 connection and a preflight cached by the
+browser (Access-Control-Max-Age), so each message is a single POST.
+Loopback hides network round trips; over a real network each saved
+connection setup and preflight also saves one or two RTTs.
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import signal
+import argparse
+import threading
+import statistics
+import subprocess
+import http.client
+
+SERVER = os.path.join(os.path.dirname(__file__), '..', 'simple_server.py')
+
+HEADERS = {'Content-Type': 'application/json', 'Origin': 'http://intranet.example.com'}
+PREFLIGHT = {'Origin': 'http://intranet.example.com', 'Access-Control-Request-Method': 'POST',
+             'Access-Control-Request-Headers': 'content-type'}
+
+
+def start():
+    server = subprocess.Popen([sys.executable, '-u', SERVER, '--port', '0'],
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in server.stdout:
+        found = re.search(r'localhost:(\d+)', line)
+        if found:
+            threading.Thread(target=server.stdout.read, daemon=True).start()
+            return server, int(found.group(1))
+    raise RuntimeError('server did not start')
+
+
+def exchange(connection, method, body=None, headers=HEADERS):
+    connection.request(method, '/chat', body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    return response
+
+
+def fresh_connections(port, body):
+    """One message the HTTP/1.0 way: preflight and POST, each on its own connection"""
+    for method, payload, headers in (('OPTIONS', None, PREFLIGHT), ('POST', body, HEADERS)):
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        exchange(connection, method, payload, dict(headers, Connection='close'))
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark keep-alive and cached preflights')
+    parser.add_argument('--messages', type=int, default=500, help='Chat messages per run')
+    args = parser.parse_args()
+
+    body = json.dumps({'message': 'What is Power BI?'})
+    server, port = start()
+    try:
+        for _ in range(100):
+            try:
+                fresh_connections(port, body)
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        before = []
+        for _ in range(args.messages):
+            start_time = time.perf_counter()
+            fresh_connections(port, body)
+            before.append(time.perf_counter() - start_time)
+
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        max_age = exchange(connection, 'OPTIONS', headers=PREFLIGHT).headers['Access-Control-Max-Age']
+        after = []
+        for _ in range(args.messages):
+            start_time = time.perf_counter()
+            exchange(connection, 'POST', body)
+            after.append(time.perf_counter() - start_time)
+        connection.close()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(30)
+
+    for label, samples in (('new connections + preflight', before), ('keep-alive, cached preflight', after)):
+        samples.sort()
+        print(f"{label:30s} median {statistics.median(samples) * 1000:6.2f} ms  "
+              f"p95 {samples[int(len(samples) * 0.95)] * 1000:6.2f} ms")
+    print(f"Preflight cached for {max_age} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /chat throughput and worker memory of simple_server.py with one
+process vs the pre-fork mode. Clients run in separate processes so the
+client side is not limited by one GIL either. Memory is read from
+/proc/<pid>/smaps_rollup: Private is what each worker costs on its own,
+Pss splits the shared index pages between the processes.
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import signal
+import threading
+import argparse
+import subprocess
+import urllib.request
+from multiprocessing import Pool
+
+SERVER = os.path.join(os.path.dirname(__file__), '..', 'simple_server.py')
+
+QUESTIONS = ['What is Power BI?', 'How do I create a measure?', 'What is DAX?',
+             'How do I connect to Azure Databricks?', 'What is a semantic model?']
+
+
+def start(processes):
+    server = subprocess.Popen([sys.executable, '-u', SERVER, '--port', '0', '--processes', str(processes)],
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in server.stdout:
+        found = re.search(r'localhost:(\d+)', line)
+        if found:
+            # Keep draining the request log so the server never blocks on a full pipe
+            threading.Thread(target=server.stdout.read, daemon=True).start()
+            return server, f'http://127.0.0.1:{found.group(1)}'
+    raise RuntimeError('server did not start')
+
+
+def wait_ready(url):
+    """Workers bind their sockets after the startup banner is printed"""
+    for _ in range(100):
+        try:
+            with urllib.request.urlopen(url + '/stats', timeout=5) as response:
+                response.read()
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server not answering')
+
+
+def client(args):
+    url, seconds, index = args
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        body = json.dumps({'message': QUESTIONS[(index + done) % len(QUESTIONS)]}).encode()
+        request = urllib.request.Request(url + '/chat', data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+        done += 1
+    return done
+
+
+def memory(pid):
+    """(Private, Pss) in kB, or None where /proc is not available"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            values = dict(re.findall(r'^(\w+):\s+(\d+) kB', f.read(), re.M))
+    except OSError:
+        return None
+    private = int(values['Private_Clean']) + int(values['Private_Dirty'])
+    return private, int(values['Pss'])
+
+
+def workers_of(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def run(processes, clients, seconds):
+    server, url = start(processes)
+    try:
+        wait_ready(url)
+        with Pool(clients) as pool:
+            start_time = time.perf_counter()
+            total = sum(pool.map(client, [(url, seconds, i) for i in range(clients)]))
+            elapsed = time.perf_counter() - start_time
+        pids = workers_of(server.pid) if processes > 1 else [server.pid]
+        usage = [m for m in map(memory, pids) if m]
+        return total / elapsed, usage
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pre-fork server mode')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2, help='Worker processes to compare')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent client processes')
+    parser.add_argument('--seconds', type=float, default=5, help='Duration of each run')
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}  clients: {args.clients}")
+    for processes in sorted({1, args.processes}):
+        rate, usage = run(processes, args.clients, args.seconds)
+        line = f"{processes:2d} process(es): {rate:8.0f} req/s"
+        if usage:
+            line += (f"  per worker: {sum(m[0] for m in usage) / len(usage) / 1024:.1f} MB private, "
+                     f"{sum(m[1] for m in usage) / len(usage) / 1024:.1f} MB PSS")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: matcher startup from JSON vs from the compiled, memory-mapped artifact
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fast_semantic_matcher import FastSemanticMatcher
+from kb_artifact import MappedEntryStore, build_artifact
+from bench_entry_store import synthetic_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup benchmark')
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000, 10000, 100000], help='Corpus sizes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'entries':>8} {'json load+build':>16} {'mmap open':>10} {'first query':>12}")
+        for size in args.entries:
+            data_file = os.path.join(workdir, f'kb_{size}.json')
+            artifact = os.path.join(workdir, f'kb_{size}.kb')
+            corpus = synthetic_corpus(size)
+            with open(data_file, 'w', encoding='utf-8') as f:
+                json.dump(corpus, f)
+            build_artifact(FastSemanticMatcher(corpus).store, artifact)
+            del corpus
+
+            start = time.perf_counter()
+            with open(data_file, 'r', encoding='utf-8') as f:
+                FastSemanticMatcher(json.load(f))
+            json_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            matcher = FastSemanticMatcher.from_store(MappedEntryStore(artifact))
+            open_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            matcher.find_best_match("why does my power bi refresh fail")
+            query_time = time.perf_counter() - start
+
+            print(f"{size:>8} {json_time * 1000:>14.1f}ms {open_time * 1000:>8.2f}ms {query_time * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /chat throughput of the Flask app under its development server
+(python app.py, one process, a thread per request) vs gunicorn with the
+production settings in gunicorn.conf.py and several worker processes.
+Requires gunicorn (pip install gunicorn).
+"""
+
+import sys
+import os
+import socket
+import signal
+import argparse
+import subprocess
+import threading
+import time
+from multiprocessing import Pool
+
+from bench_prefork import client, memory, wait_ready, workers_of
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start(command):
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    # Keep draining the request log so the server never blocks on a full pipe
+    threading.Thread(target=server.stdout.read, daemon=True).start()
+    return server
+
+
+def run(name, command, port, clients, seconds):
+    server = start(command)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(url)
+        with Pool(clients) as pool:
+            start_time = time.perf_counter()
+            total = sum(pool.map(client, [(url, seconds, i) for i in range(clients)]))
+            elapsed = time.perf_counter() - start_time
+        pids = workers_of(server.pid) or [server.pid]
+        usage = [m for m in map(memory, pids) if m]
+        line = f"{name:32s} {total / elapsed:8.0f} req/s"
+        if usage:
+            line += f"  per process: {sum(m[0] for m in usage) / len(usage) / 1024:.1f} MB private"
+        print(line)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Flask dev server against gunicorn')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='gunicorn worker processes')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent client processes')
+    parser.add_argument('--seconds', type=float, default=5, help='Duration of each run')
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}  clients: {args.clients}")
+    port = free_port()
+    run('flask dev server', [sys.executable, 'app.py', '--host', '127.0.0.1', '--port', str(port)],
+        port, args.clients, args.seconds)
+    port = free_port()
+    run(f'gunicorn, {args.workers} worker(s)',
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}',
+         '-w', str(args.workers), 'wsgi:app'],
+        port, args.clients, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
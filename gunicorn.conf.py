@@ -0,0 +1,39 @@
+"""
+Gunicorn Settings for the Flask App
+    gunicorn -c gunicorn.conf.py wsgi:app
+Every setting can be overridden on the command line, e.g. -w 8 -b :8080.
+"""
+
+import os
+
+bind = os.environ.get('CHATBOT_BIND', '0.0.0.0:5000')
+
+# Matching is CPU-bound, so one process per core
+workers = int(os.environ.get('CHATBOT_WORKERS', os.cpu_count() or 2))
+
+# Threads let a worker keep connections alive and hold /stats/stream
+# subscribers (one thread each) while it answers other requests. A worker
+# holds at most CHATBOT_MAX_STREAMS streams (default 4) and refuses more with
+# a 503 and Retry-After, leaving CHATBOT_THREADS minus that for requests;
+# raise both together, and keep CHATBOT_MAX_STREAMS well below CHATBOT_THREADS
+worker_class = 'gthread'
+threads = int(os.environ.get('CHATBOT_THREADS', 16))
+keepalive = 15
+
+# Load the knowledge base once in the master; workers share its pages
+preload_app = True
+
+
+def pre_fork(server, worker):
+    from app import before_fork
+    before_fork(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    from app import after_fork
+    after_fork(server.app.wsgi())
+
+
+def worker_exit(server, worker):
+    # Write the queued result-cache rows and conversation records
+    server.app.wsgi().extensions['chatbot']['registry'].close()
@@ -0,0 +1,516 @@
+"""
+All-pairs collision analysis for the knowledge base
+Scores every entry's question (and synthetic paraphrases of it) against every
+entry with the production FastSemanticMatcher scoring, vectorized with NumPy,
+and reports entries whose top-2 margin is dangerously small. Like the matcher,
+only entries that share a word with a query are scored, found through
+posting lists, so the work follows the overlap rather than queries x entries.
+
+Cost grows with the number of queries scored. On a 20,000-entry corpus shaped
+like the training data (common words such as 'power bi' shared by most
+entries) each query costs about 0.5 ms: ~11 s for the questions alone and
+~30 s with the default 2 paraphrases per entry. Corpora whose entries share
+few words finish in about a second; see benchmarks/bench_collision_matrix.py.
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fast_semantic_matcher import FLAG_GREETING, TECHNOLOGY_FLAGS, FastSemanticMatcher
+
+# Words that carry no topic on their own; dropped when building paraphrases
+FILLER_WORDS = {
+    'a', 'an', 'the', 'is', 'are', 'do', 'does', 'can', 'i', 'my', 'me', 'to',
+    'in', 'of', 'for', 'on', 'it', 'this', 'that', 'if', 'be', 'there', 'from'
+}
+
+# Prefixes used to build paraphrases with a different leading intent
+PARAPHRASE_PREFIXES = ['how do i', 'what is the fix for', 'help with', 'issue with']
+
+INTENTS = ['greeting', 'troubleshooting', 'how_to', 'information', 'general']
+
+# A chunk is scored as a dense block once its word-sharing pairs reach this
+# fraction of all (query, entry) pairs; sparser chunks score only candidates
+DENSE_FRACTION = 1 / 8
+
+# Words in at least this fraction of entries are counted with a matrix product
+COMMON_FRACTION = 1 / 64
+
+
+class CorpusFeatures:
+    """Vocabulary, posting lists and per-entry features of a knowledge base,
+    taken from the entry store of a matcher built over it"""
+
+    def __init__(self, matcher, common_fraction=COMMON_FRACTION):
+        self.matcher = matcher
+        store = matcher.store
+        self.vocab = {}
+        for postings in (store.question_postings, store.keyword_postings):
+            for word in postings:
+                self.vocab.setdefault(word, len(self.vocab))
+
+        # Ids run over removed entries too; their posting lists are empty
+        self.size = len(store.question_sizes)
+        # Store intent codes index store.intent_names; recode them into INTENTS
+        recode = np.array([INTENTS.index(name) for name in store.intent_names] or [0], dtype=np.int8)
+        self.intents = recode[np.asarray(store.intents, dtype=np.int64)]
+        self.flags = np.asarray(store.flags, dtype=np.int64)
+        self.intent_bonus_rows = self._intent_bonus_rows()
+        self.question = PostingLists(store.question_postings, store.question_sizes, self.vocab, common_fraction)
+        self.keywords = PostingLists(store.keyword_postings, store.keyword_sizes, self.vocab, common_fraction)
+        self._penalty_tables = {}
+
+    def _intent_bonus_rows(self):
+        """Bonus row per query code (intent * 2 + hi variant); the last row
+        is for empty queries, which never earn a bonus"""
+        greeting = INTENTS.index('greeting')
+        has_hi = (self.flags & FLAG_GREETING) > 0
+        rows = np.zeros((len(INTENTS) * 2 + 1, self.size))
+        for intent in range(len(INTENTS)):
+            same_intent = self.intents == intent
+            for hi_variant in (0, 1):
+                row = np.where(same_intent, 0.2, 0.0)
+                if intent == greeting:
+                    row = np.where(same_intent, 0.4, 0.0)
+                    if hi_variant:
+                        row[same_intent & has_hi] = 0.6
+                rows[intent * 2 + hi_variant] = row
+        return rows
+
+    def _penalty_table(self, technologies):
+        """Penalty per keyword-flag pattern for a set of query technologies.
+
+        The penalty only depends on four keyword bits, so the production
+        function is asked once per bit pattern and looked up per entry later."""
+        key = frozenset(technologies)
+        table = self._penalty_tables.get(key)
+        if table is None:
+            table = np.zeros(32)
+            for pattern in range(16):
+                keywords = {w for w, bit in TECHNOLOGY_FLAGS.items() if pattern & bit}
+                table[pattern] = self.matcher.calculate_technology_match_penalty(technologies, keywords)
+            table[16:] = table[:16]
+            self._penalty_tables[key] = table
+        return table
+
+    def encode_queries(self, queries):
+        """Turn raw query strings into word ids plus per-query features"""
+        words_flat = []
+        word_counts = []
+        sizes = []
+        bonus_codes = []
+        penalties = []
+        for query in queries:
+            words = self.matcher.clean_text(query).split()
+            ids = {self.vocab[w] for w in words if w in self.vocab}
+            words_flat.extend(ids)
+            word_counts.append(len(ids))
+            sizes.append(len(set(words)))
+            if words:
+                hi_variant = any(v in query.lower() for v in ['hi', 'hii', 'hiii'])
+                bonus_codes.append(INTENTS.index(self.matcher.classify_intent_fast(words)) * 2 + hi_variant)
+            else:
+                bonus_codes.append(len(INTENTS) * 2)
+            penalties.append(self._penalty_table(self.matcher.detect_specific_technologies(words)))
+
+        word_ptr = np.zeros(len(queries) + 1, dtype=np.int64)
+        word_ptr[1:] = np.cumsum(word_counts)
+        return QueryBatch(np.array(words_flat, dtype=np.int64), word_ptr, np.array(sizes, dtype=np.float64),
+                          np.array(bonus_codes, dtype=np.int64), np.array(penalties))
+
+
+class PostingLists:
+    """Word -> entries posting lists stored as flat arrays (CSR).
+
+    Words found in many entries ('how', 'power', 'bi', ...) are also kept as
+    a dense (word x entry) incidence matrix, so their overlaps with a chunk
+    of queries come from one matrix product instead of long posting lists."""
+
+    def __init__(self, postings, sizes, vocab, common_fraction):
+        self.sizes = np.asarray(sizes, dtype=np.float64)
+        lengths = np.zeros(len(vocab), dtype=np.int64)
+        for word, ids in postings.items():
+            lengths[vocab[word]] = len(ids)
+        self.ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        self.ptr[1:] = np.cumsum(lengths)
+
+        # Store posting lists are already in ascending entry order
+        self.entries = np.zeros(int(self.ptr[-1]), dtype=np.int64)
+        for word, ids in postings.items():
+            start = self.ptr[vocab[word]]
+            self.entries[start:start + len(ids)] = ids
+
+        common = np.flatnonzero(lengths >= max(2, len(self.sizes) * common_fraction))
+        self.common_column = np.full(len(vocab), -1, dtype=np.int64)
+        self.common_column[common] = np.arange(len(common))
+        self.incidence = np.zeros((len(common), len(self.sizes)))
+        columns = np.repeat(self.common_column, lengths)
+        is_common = columns >= 0
+        self.incidence[columns[is_common], self.entries[is_common]] = 1.0
+
+    def pair_count(self, words):
+        """Number of postings of these words"""
+        return int((self.ptr[words + 1] - self.ptr[words]).sum())
+
+    def pairs(self, words, owners):
+        """(owner, entry) for every entry in the posting list of each word"""
+        starts = self.ptr[words]
+        lengths = self.ptr[words + 1] - starts
+        total = int(lengths.sum())
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        return np.repeat(owners, lengths), self.entries[offsets]
+
+    def hits(self, words, owners, count):
+        """Dense (count x entries) overlap counts of a chunk of queries"""
+        columns = self.common_column[words]
+        is_common = columns >= 0
+        common = np.zeros((count, self.incidence.shape[0]))
+        common[owners[is_common], columns[is_common]] = 1.0
+        hits = common @ self.incidence
+
+        rows, entries = self.pairs(words[~is_common], owners[~is_common])
+        cells, counts = count_pairs(rows * hits.shape[1] + entries)
+        hits.ravel()[cells] += counts
+        return hits
+
+
+class QueryBatch:
+    def __init__(self, words, word_ptr, sizes, bonus_codes, penalties):
+        self.words = words
+        self.word_ptr = word_ptr
+        self.sizes = sizes
+        self.bonus_codes = bonus_codes
+        self.penalties = penalties
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def chunk_words(self, start, stop):
+        """Known word ids of queries[start:stop] and the (chunk-local) query of each"""
+        ptr = self.word_ptr[start:stop + 1]
+        owners = np.repeat(np.arange(stop - start, dtype=np.int64), np.diff(ptr))
+        return self.words[ptr[0]:ptr[-1]], owners
+
+    def head(self, count):
+        return QueryBatch(self.words[:self.word_ptr[count]], self.word_ptr[:count + 1], self.sizes[:count],
+                          self.bonus_codes[:count], self.penalties[:count])
+
+
+def count_pairs(keys):
+    """Distinct keys in ascending order and how often each occurs"""
+    keys = np.sort(keys)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], np.diff(np.append(starts, len(keys)))
+
+
+def combined_scores(question_hits, keyword_hits, query_sizes, question_sizes, keyword_sizes):
+    """0.4 * question Jaccard + 0.4 * keyword overlap, in the matcher's order
+    of operations. The arguments broadcast, so the same arithmetic scores a
+    dense block (queries as a column, entries as a row) or candidate lists."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Jaccard over word sets: hits / (|q| + |e| - hits)
+        question_similarity = query_sizes + question_sizes
+        question_similarity -= question_hits
+        np.divide(question_hits, question_similarity, out=question_similarity)
+
+        # Keyword overlap over the larger of the two sets
+        keyword_score = np.maximum(query_sizes, keyword_sizes)
+        np.divide(keyword_hits, keyword_score, out=keyword_score)
+
+    scores = question_similarity
+    scores *= 0.4
+    keyword_score *= 0.4
+    scores += keyword_score
+    return scores
+
+
+class ChunkScores:
+    """Scores of a chunk of queries against the entries sharing a word with
+    them, held as candidate lists or, when most pairs share a word, as a
+    dense block with -inf for the rest"""
+
+    def __init__(self, count, size, matrix=None, rows=None, entries=None, scores=None):
+        self.count = count
+        self.size = size
+        self.matrix = matrix
+        self.rows = rows
+        self.entries = entries
+        self.scores = scores
+
+    def block(self):
+        """Dense (queries x entries) scores, -inf where the matcher skips the entry"""
+        if self.matrix is not None:
+            return self.matrix
+        block = np.full((self.count, self.size), -np.inf)
+        block[self.rows, self.entries] = self.scores
+        return block
+
+    def score_of(self, entry_ids):
+        """Score of one given entry per query (-inf if it shares no word)"""
+        if self.matrix is not None:
+            return self.matrix[np.arange(self.count), entry_ids]
+        result = np.full(self.count, -np.inf)
+        if len(self.scores):
+            keys = self.rows * self.size + self.entries
+            wanted = np.arange(self.count) * self.size + entry_ids
+            found = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+            hit = keys[found] == wanted
+            result[hit] = self.scores[found[hit]]
+        return result
+
+    def pop_best(self):
+        """Best entry (lowest id on ties, -1 if none) and score per query; the
+        entry is then left out, so the next call gives the runner-up"""
+        if self.matrix is not None:
+            rows = np.arange(self.count)
+            best = np.argmax(self.matrix, axis=1)
+            best_score = self.matrix[rows, best]
+            self.matrix[rows, best] = -np.inf
+            return np.where(np.isfinite(best_score), best, -1), best_score
+
+        best = np.full(self.count, -1, dtype=np.int64)
+        best_score = np.full(self.count, -np.inf)
+        if not len(self.scores):
+            return best, best_score
+        rows, scores = self.rows, self.scores
+        # Candidates are ordered by query and then entry
+        starts = np.flatnonzero(np.concatenate(([True], rows[1:] != rows[:-1])))
+        maxima = np.maximum.reduceat(scores, starts)
+        positions = np.flatnonzero((scores == np.repeat(maxima, np.diff(np.append(starts, len(rows)))))
+                                   & np.isfinite(scores))
+        position_rows = rows[positions]
+        first = positions[np.concatenate(([True], position_rows[1:] != position_rows[:-1]))]
+        best[rows[first]] = self.entries[first]
+        best_score[rows[first]] = scores[first]
+        scores[first] = -np.inf
+        return best, best_score
+
+
+def score_chunk(features, batch, start, stop):
+    """Production combined scores of queries[start:stop] against the entries
+    sharing a word with them.
+
+    Word overlaps are counted from the posting lists of the query words, so
+    entries without any overlap are never touched. Operations are kept in
+    the matcher's order so ties break exactly as find_best_match."""
+    size = features.size
+    count = stop - start
+    cells = count * size
+    words, owners = batch.chunk_words(start, stop)
+    penalized = np.flatnonzero(batch.penalties[start:stop].any(axis=1))
+
+    if features.question.pair_count(words) + features.keywords.pair_count(words) >= cells * DENSE_FRACTION:
+        # Most pairs share a word (common words): score the block densely
+        question_hits = features.question.hits(words, owners, count)
+        keyword_hits = features.keywords.hits(words, owners, count)
+        scores = combined_scores(question_hits, keyword_hits, batch.sizes[start:stop, None],
+                                 features.question.sizes[None, :], features.keywords.sizes[None, :])
+        # Zero (or NaN for empty texts) exactly when no word is shared
+        missing = ~(scores > 0)
+        # Intent bonus depends only on (query intent, hi variant) per row, so
+        # whole rows are gathered from a small table
+        scores += features.intent_bonus_rows[batch.bonus_codes[start:stop]]
+        # Technology penalties only exist for a few queries (hive, azure databricks)
+        if len(penalized):
+            scores[penalized] -= batch.penalties[start + penalized][:, features.flags]
+        np.copyto(scores, -np.inf, where=missing)
+        return ChunkScores(count, size, matrix=scores)
+
+    question_rows, question_entries = features.question.pairs(words, owners)
+    keyword_rows, keyword_entries = features.keywords.pairs(words, owners)
+    question_keys = question_rows * size + question_entries
+    keyword_keys = keyword_rows * size + keyword_entries
+    question_cells, question_counts = count_pairs(question_keys)
+    keyword_cells, keyword_counts = count_pairs(keyword_keys)
+    candidates, _ = count_pairs(np.concatenate((question_cells, keyword_cells)))
+    question_hits = np.zeros(len(candidates))
+    question_hits[np.searchsorted(candidates, question_cells)] = question_counts
+    keyword_hits = np.zeros(len(candidates))
+    keyword_hits[np.searchsorted(candidates, keyword_cells)] = keyword_counts
+
+    rows, entries = np.divmod(candidates, size)
+    scores = combined_scores(question_hits, keyword_hits, batch.sizes[start + rows],
+                             features.question.sizes[entries], features.keywords.sizes[entries])
+    scores += features.intent_bonus_rows[batch.bonus_codes[start + rows], entries]
+    if len(penalized):
+        is_penalized = np.zeros(count, dtype=bool)
+        is_penalized[penalized] = True
+        pairs = np.flatnonzero(is_penalized[rows])
+        scores[pairs] -= batch.penalties[start + rows[pairs], features.flags[entries[pairs]]]
+    return ChunkScores(count, size, rows=rows, entries=entries, scores=scores)
+
+
+def top_two(features, batch, chunk_size, owners=None, matrix_out=None):
+    """Best and runner-up entry (and scores) for every query, chunk by chunk,
+    plus the score of each query's owning entry when owners are given
+    (-inf when it shares no word with the query, as the matcher skips it)"""
+    count = len(batch)
+    own_score = np.full(count, -np.inf)
+    best = np.full(count, -1, dtype=np.int64)
+    runner_up = np.full(count, -1, dtype=np.int64)
+    best_score = np.full(count, -np.inf)
+    runner_up_score = np.full(count, -np.inf)
+
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        chunk = score_chunk(features, batch, start, stop)
+        if matrix_out is not None:
+            matrix_out[start:stop] = chunk.block()
+        if owners is not None:
+            own_score[start:stop] = chunk.score_of(owners[start:stop])
+        best[start:stop], best_score[start:stop] = chunk.pop_best()
+        runner_up[start:stop], runner_up_score[start:stop] = chunk.pop_best()
+
+    return best, best_score, runner_up, runner_up_score, own_score
+
+
+def generate_paraphrases(question, keywords, rng, limit):
+    """Deterministic synthetic rewordings of a question"""
+    words = question.lower().rstrip('?!. ').split()
+    content = [w for w in words if w not in FILLER_WORDS]
+    candidates = []
+
+    if content and content != words:
+        candidates.append(' '.join(content))
+    if keywords:
+        candidates.append(' '.join(keywords[:4]))
+    for prefix in PARAPHRASE_PREFIXES:
+        if content:
+            candidates.append(f"{prefix} {' '.join(content)}")
+    if len(content) > 2:
+        for i in range(len(content)):
+            candidates.append(' '.join(content[:i] + content[i + 1:]))
+        shuffled = content[:]
+        rng.shuffle(shuffled)
+        candidates.append(' '.join(shuffled))
+
+    unique = list(dict.fromkeys(c for c in candidates if c and c != question.lower()))
+    if len(unique) > limit:
+        unique = rng.sample(unique, limit)
+    return unique
+
+
+def analyze(entries, paraphrases_per_entry=2, chunk_size=64, margin=0.05,
+            seed=13, matrix_path=None):
+    """Run the collision analysis and return the list of flagged findings"""
+    matcher = FastSemanticMatcher(entries)
+    threshold = matcher.min_similarity_threshold
+    features = CorpusFeatures(matcher)
+
+    queries = [entry['question'] for entry in entries]
+    owners = list(range(len(entries)))
+    kinds = ['question'] * len(entries)
+
+    rng = random.Random(seed)
+    for index, entry in enumerate(entries):
+        for paraphrase in generate_paraphrases(entry['question'], entry['keywords'], rng, paraphrases_per_entry):
+            queries.append(paraphrase)
+            owners.append(index)
+            kinds.append('paraphrase')
+
+    batch = features.encode_queries(queries)
+
+    matrix_out = None
+    if matrix_path:
+        # Only the entry-by-entry block is kept; paraphrase rows are reduced on the fly
+        matrix_out = np.lib.format.open_memmap(matrix_path, mode='w+', dtype=np.float32,
+                                               shape=(len(entries), len(entries)))
+        top_two(features, batch.head(len(entries)), chunk_size, matrix_out=matrix_out)
+        matrix_out.flush()
+
+    best, best_score, runner_up, runner_up_score, own_scores = top_two(
+        features, batch, chunk_size, owners=np.array(owners, dtype=np.int64))
+
+    findings = []
+    for row, owner in enumerate(owners):
+        # Margin of the intended entry over the strongest competitor
+        if best[row] == owner:
+            competitor, competitor_score = runner_up[row], runner_up_score[row]
+        else:
+            competitor, competitor_score = best[row], best_score[row]
+
+        own_score = own_scores[row]
+        if competitor < 0:
+            continue
+        row_margin = float(own_score - competitor_score)
+        if row_margin < margin:
+            findings.append({
+                'entry': owner,
+                'query': queries[row],
+                'kind': kinds[row],
+                'own_score': float(own_score),
+                'competitor': int(competitor),
+                'competitor_score': float(competitor_score),
+                'margin': row_margin,
+                'misrouted': best[row] != owner and best_score[row] >= threshold,
+                'falls_back': best_score[row] < threshold
+            })
+
+    findings.sort(key=lambda f: f['margin'])
+    return findings, len(queries)
+
+
+def print_report(entries, findings, query_count, elapsed, top):
+    print("ENTRY COLLISION REPORT")
+    print("=" * 70)
+    print(f"Entries: {len(entries)}  Queries scored: {query_count}  Time: {elapsed:.2f}s")
+    print(f"Ambiguous queries: {len(findings)}")
+
+    by_pair = {}
+    for finding in findings:
+        pair = tuple(sorted((finding['entry'], finding['competitor'])))
+        by_pair.setdefault(pair, []).append(finding)
+
+    print(f"Colliding entry pairs: {len(by_pair)}")
+    ranked = sorted(by_pair.items(), key=lambda item: (item[1][0]['margin'], -len(item[1])))
+
+    for (first, second), pair_findings in ranked[:top]:
+        worst = pair_findings[0]
+        misrouted = sum(1 for f in pair_findings if f['misrouted'])
+        print("-" * 70)
+        print(f"[{first}] {entries[first]['question'][:60]}")
+        print(f"[{second}] {entries[second]['question'][:60]}")
+        print(f"   queries: {len(pair_findings)}  misrouted: {misrouted}  worst margin: {worst['margin']:+.3f}")
+        print(f"   worst query ({worst['kind']}): '{worst['query'][:60]}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find ambiguous knowledge-base entries')
+    parser.add_argument('--data', default=os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json'),
+                        help='Training data JSON file')
+    parser.add_argument('--margin', type=float, default=0.05, help='Report top-2 margins below this value')
+    parser.add_argument('--paraphrases', type=int, default=2,
+                        help='Synthetic paraphrases per entry (each adds one query per entry to the run time)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Queries scored per vectorized batch')
+    parser.add_argument('--seed', type=int, default=13, help='Seed for paraphrase generation')
+    parser.add_argument('--top', type=int, default=20, help='Number of colliding pairs to print')
+    parser.add_argument('--json', help='Write all findings to this JSON file')
+    parser.add_argument('--save-matrix', help='Write the entry-by-entry score matrix to this .npy file')
+    args = parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    start = time.perf_counter()
+    findings, query_count = analyze(entries, args.paraphrases, args.chunk_size, args.margin,
+                                    args.seed, args.save_matrix)
+    elapsed = time.perf_counter() - start
+
+    print_report(entries, findings, query_count, elapsed, args.top)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(findings, f, indent=2)
+        print(f"\nFindings saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
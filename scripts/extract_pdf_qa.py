@@ -7,6 +7,12 @@ import re
 import json
 import os
 
+try:
+    from tfidf_keywords import assign_keywords
+except ImportError:
+    # numpy is only needed for the TF-IDF keyword stage
+    assign_keywords = None
+
 def extract_pdf_content(pdf_path):
     """Extract text content from PDF file"""
     text_content = ""
@@ -55,51 +61,22 @@ def parse_qa_content(text):
                 question = re.sub(r'\s+', ' ', question)
                 answer = re.sub(r'\s+', ' ', answer)
                 
-                # Generate keywords from question
-                keywords = generate_keywords(question + " " + answer)
-                
                 qa_pairs.append({
                     "question": question,
                     "answer": answer,
-                    "keywords": keywords
+                    "keywords": []
                 })
     
-    return qa_pairs
+    if assign_keywords is None:
+        print("⚠️  numpy is not installed; using question words as keywords")
+        for pair in qa_pairs:
+            words = re.findall(r'\b\w+\b', pair['question'].lower())
+            pair['keywords'] = list(dict.fromkeys(word for word in words if len(word) > 2))[:8]
+        return qa_pairs
 
-def generate_keywords(question):
-    """Generate keywords from question text"""
-    # Remove common words and extract meaningful terms
-    common_words = {'the', 'is', 'in', 'to', 'and', 'a', 'of', 'for', 'on', 'with', 'how', 'what', 'when', 'where', 'why', 'can', 'do', 'does'}
-    
-    # Extract words and clean them
-    words = re.findall(r'\b\w+\b', question.lower())
-    keywords = [word for word in words if word not in common_words and len(word) > 2]
-    
-    # Add some specific Power BI related keywords based on content
-    powerbi_keywords = []
-    question_lower = question.lower()
-    
-    if 'power bi' in question_lower:
-        powerbi_keywords.extend(['power', 'bi', 'powerbi'])
-    if 'refresh' in question_lower:
-        powerbi_keywords.append('refresh')
-    if 'dataset' in question_lower:
-        powerbi_keywords.append('dataset')
-    if 'gateway' in question_lower:
-        powerbi_keywords.append('gateway')
-    if 'dataflow' in question_lower:
-        powerbi_keywords.append('dataflow')
-    if 'report' in question_lower:
-        powerbi_keywords.append('report')
-    if 'connection' in question_lower:
-        powerbi_keywords.append('connection')
-    if 'error' in question_lower:
-        powerbi_keywords.extend(['error', 'issue', 'problem'])
-    
-    # Combine and deduplicate
-    all_keywords = list(set(keywords + powerbi_keywords))
-    
-    return all_keywords[:8]  # Limit to 8 keywords
+    # Keywords are scored across the whole corpus so each entry gets its most
+    # discriminative terms rather than the first few words of its text
+    return assign_keywords(qa_pairs)
 
 def main():
     """Main function to extract and process PDF content"""
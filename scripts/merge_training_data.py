@@ -0,0 +1,164 @@
+"""
+Merge training data files into one canonical, deduplicated knowledge base
+Near-duplicate questions are found with MinHash/LSH instead of comparing
+every entry against every other entry.
+"""
+
+import sys
+import os
+import json
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from near_duplicates import NearDuplicateFinder, shingles, jaccard
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+# Answers less similar than this are reported as conflicting
+ANSWER_CONFLICT_THRESHOLD = 0.8
+
+# Questions at least this similar are the same question even if answers differ
+SAME_QUESTION_THRESHOLD = 0.9
+
+
+def merge_entries(sources, threshold=0.6):
+    """
+    Merge lists of entries into one deduplicated list
+
+    Args:
+        sources: List of (name, entries) pairs, highest priority first
+        threshold: Question similarity at which entries are considered the same
+
+    Returns:
+        Tuple of (merged_entries, report) where report lists merged groups,
+        the groups whose answers disagree, and similar questions that were
+        kept apart because their answers differ
+    """
+    finder = NearDuplicateFinder(threshold=threshold)
+    entries = {}
+    answers = {}
+    report = {'duplicates': [], 'conflicts': [], 'review': []}
+    reviewed = set()
+
+    for source_index, (name, source_entries) in enumerate(sources):
+        for entry_index, entry in enumerate(source_entries):
+            key = (source_index, entry_index)
+            entries[key] = (name, entry)
+            answers[key] = shingles(entry['answer'])
+
+            def accept(existing, similarity):
+                # Similar questions with different answers are usually
+                # different topics (Hive vs Azure Databricks), so only merge
+                # them when the question is essentially the same
+                if similarity >= SAME_QUESTION_THRESHOLD:
+                    return True
+                if jaccard(answers[existing], answers[key]) >= ANSWER_CONFLICT_THRESHOLD:
+                    return True
+                pair = frozenset((entry['question'], entries[existing][1]['question']))
+                if pair not in reviewed:
+                    reviewed.add(pair)
+                    report['review'].append({
+                        'question': entry['question'],
+                        'similar_to': entries[existing][1]['question'],
+                        'similarity': round(similarity, 3)
+                    })
+                return False
+
+            finder.add(key, entry['question'], accept)
+
+    merged = []
+
+    # Groups come out in insertion order, so the canonical entry of each group
+    # is the one from the highest-priority source
+    for group in finder.groups():
+        group.sort()
+        canonical_name, canonical = entries[group[0]]
+
+        keywords = []
+        for key in group:
+            for keyword in entries[key][1].get('keywords', []):
+                if keyword not in keywords:
+                    keywords.append(keyword)
+
+        merged.append({
+            'question': canonical['question'],
+            'answer': canonical['answer'],
+            'keywords': keywords
+        })
+
+        if len(group) == 1:
+            continue
+
+        members = [{'source': entries[key][0], 'question': entries[key][1]['question']} for key in group]
+        report['duplicates'].append({'kept': canonical['question'], 'source': canonical_name, 'members': members})
+
+        conflicting = [
+            {'source': entries[key][0], 'answer': entries[key][1]['answer']}
+            for key in group[1:]
+            if jaccard(answers[group[0]], answers[key]) < ANSWER_CONFLICT_THRESHOLD
+        ]
+        if conflicting:
+            report['conflicts'].append({
+                'question': canonical['question'],
+                'kept': {'source': canonical_name, 'answer': canonical['answer']},
+                'others': conflicting
+            })
+
+    return merged, report
+
+
+def print_report(merged, report, total):
+    print("\n📊 SUMMARY:")
+    print(f"   Input entries: {total}")
+    print(f"   Canonical entries: {len(merged)}")
+    print(f"   Duplicate groups: {len(report['duplicates'])}")
+    print(f"   Conflicting answers: {len(report['conflicts'])}")
+    print(f"   Similar questions kept apart: {len(report['review'])}")
+
+    for conflict in report['conflicts']:
+        print(f"\n⚠️  CONFLICT: {conflict['question'][:60]}")
+        print(f"   KEPT ({conflict['kept']['source']}): {conflict['kept']['answer'][:60]}...")
+        for other in conflict['others']:
+            print(f"   ALSO ({other['source']}): {other['answer'][:60]}...")
+
+    for item in report['review']:
+        print(f"\n🔍 REVIEW ({item['similarity']:.2f}): {item['question'][:60]}")
+        print(f"   similar to: {item['similar_to'][:60]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge training data into one canonical knowledge base')
+    parser.add_argument('inputs', nargs='*', help='Training data JSON files, highest priority first',
+                        default=[os.path.join(DATA_DIR, name) for name in
+                                 ('training_data_updated.json', 'training_data_corrected.json', 'training_data.json')])
+    parser.add_argument('-o', '--output', default=os.path.join(DATA_DIR, 'training_data.json'),
+                        help='Canonical training data file to write')
+    parser.add_argument('--threshold', type=float, default=0.6, help='Question similarity treated as duplicate')
+    parser.add_argument('--report', help='Write duplicate/conflict report to this JSON file')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the report')
+    args = parser.parse_args()
+
+    sources = []
+    for path in args.inputs:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                sources.append((os.path.basename(path), json.load(f)))
+        except FileNotFoundError:
+            print(f"⚠️  Skipping missing file: {path}")
+
+    merged, report = merge_entries(sources, args.threshold)
+    print_report(merged, report, sum(len(entries) for _, entries in sources))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if not args.dry_run:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, indent=2, ensure_ascii=False)
+        print(f"\nSaved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
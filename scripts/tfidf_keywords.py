@@ -0,0 +1,143 @@
+"""
+Corpus-wide TF-IDF keyword generation for training data entries
+Scores every unigram and bigram of every entry in one vectorized pass and
+keeps each entry's most discriminative terms as its keywords.
+"""
+
+import re
+import json
+import argparse
+
+import numpy as np
+
+# Words that never make useful keywords
+STOP_WORDS = {
+    'the', 'is', 'in', 'to', 'and', 'a', 'an', 'of', 'for', 'on', 'with', 'how', 'what',
+    'when', 'where', 'why', 'can', 'do', 'does', 'i', 'my', 'it', 'its', 'be', 'are',
+    'was', 'has', 'have', 'this', 'that', 'if', 'or', 'by', 'as', 'at', 'from', 'but',
+    'not', 'you', 'your', 'will', 'may', 'e', 'g', 'eg', 'there', 'they', 'their', 'only',
+    'them', 'been', 'were', 'so', 'than', 'then', 'also', 'any', 'all',
+    # Fragments left behind by contractions once punctuation is stripped
+    's', 't', 'm', 'd', 're', 'll', 've', 'don', 'doesn', 'didn', 'isn', 'won'
+}
+
+# Question text is what users paraphrase, so its terms count more than the answer's
+QUESTION_WEIGHT = 2.0
+ANSWER_WEIGHT = 1.0
+
+
+def tokenize(text):
+    """Lowercase word tokens, same cleaning as the matcher"""
+    return re.sub(r'[^\w\s]', ' ', text.lower()).split()
+
+
+def extract_terms(text):
+    """Unigrams and adjacent-word bigrams that are not stop words"""
+    words = tokenize(text)
+    terms = [w for w in words if w not in STOP_WORDS and (len(w) > 2 or w.isdigit())]
+    for first, second in zip(words, words[1:]):
+        if first not in STOP_WORDS and second not in STOP_WORDS:
+            terms.append(f"{first} {second}")
+    return terms
+
+
+def assign_keywords(entries, max_terms=8, max_bigrams=3, max_df=0.5, keep_existing=False):
+    """Replace each entry's keywords with its top TF-IDF terms.
+
+    Terms found in more than max_df of the entries are dropped because their
+    posting lists would cover most of the corpus. Ties break alphabetically,
+    so the result only depends on the corpus contents.
+    """
+    if not entries:
+        return entries
+
+    vocab = {}
+    doc_ids = []
+    term_ids = []
+    weights = []
+
+    for doc, entry in enumerate(entries):
+        for text, weight in ((entry['question'], QUESTION_WEIGHT), (entry.get('answer', ''), ANSWER_WEIGHT)):
+            for term in extract_terms(text):
+                doc_ids.append(doc)
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                weights.append(weight)
+
+    if not vocab:
+        return entries
+
+    terms = np.array(sorted(vocab, key=vocab.get), dtype=object)
+    doc_count = len(entries)
+    doc_ids = np.array(doc_ids, dtype=np.int64)
+    term_ids = np.array(term_ids, dtype=np.int64)
+
+    # Term frequency per (entry, term) cell
+    cells, inverse = np.unique(doc_ids * len(vocab) + term_ids, return_inverse=True)
+    tf = np.bincount(inverse, weights=np.array(weights))
+    cell_docs = cells // len(vocab)
+    cell_terms = cells % len(vocab)
+
+    doc_freq = np.bincount(cell_terms, minlength=len(vocab))
+    idf = np.log((1 + doc_count) / (1 + doc_freq)) + 1.0
+    doc_length = np.bincount(cell_docs, weights=tf, minlength=doc_count)
+    scores = tf / doc_length[cell_docs] * idf[cell_terms]
+
+    is_bigram = np.array([' ' in term for term in terms])[cell_terms]
+    allowed = doc_freq[cell_terms] <= max(1, max_df * doc_count)
+
+    # Alphabetical rank so ties are broken the same way on every run
+    alphabetical = np.empty(len(vocab), dtype=np.int64)
+    alphabetical[np.argsort(terms.astype(str), kind='stable')] = np.arange(len(vocab))
+
+    keep = allowed.copy()
+    for kind_mask, limit in ((is_bigram, max_bigrams), (~is_bigram, max_terms)):
+        candidates = np.flatnonzero(allowed & kind_mask)
+        order = candidates[np.lexsort((alphabetical[cell_terms[candidates]],
+                                       -scores[candidates],
+                                       cell_docs[candidates]))]
+        docs = cell_docs[order]
+        group_start = np.searchsorted(docs, docs, side='left')
+        rank = np.arange(len(order)) - group_start
+        keep[order[rank >= limit]] = False
+
+    selected = np.flatnonzero(keep)
+    selected = selected[np.lexsort((alphabetical[cell_terms[selected]], -scores[selected], cell_docs[selected]))]
+
+    keywords = [[] for _ in entries]
+    for cell in selected:
+        keywords[cell_docs[cell]].append(terms[cell_terms[cell]])
+
+    for entry, generated in zip(entries, keywords):
+        if keep_existing:
+            existing = list(entry.get('keywords', []))
+            generated = existing + [term for term in generated if term not in existing]
+        entry['keywords'] = generated
+
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate TF-IDF keywords for training data')
+    parser.add_argument('input', help='Training data JSON file')
+    parser.add_argument('-o', '--output', help='Output file (default: overwrite input)')
+    parser.add_argument('--max-terms', type=int, default=8, help='Unigrams kept per entry')
+    parser.add_argument('--max-bigrams', type=int, default=3, help='Bigrams kept per entry')
+    parser.add_argument('--max-df', type=float, default=0.5, help='Drop terms found in more than this fraction of entries')
+    parser.add_argument('--keep-existing', action='store_true', help='Keep hand-written keywords and append generated ones')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    assign_keywords(entries, args.max_terms, args.max_bigrams, args.max_df, args.keep_existing)
+
+    output = args.output or args.input
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=2, ensure_ascii=False)
+
+    print(f"Generated keywords for {len(entries)} entries")
+    print(f"Saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Unanswered Query Report
+Streams the conversation logs, clusters the questions that got the fallback
+answer with MinHash/LSH, and ranks the clusters by how often they were
+asked, with the nearest existing entry of each. Memory is bounded by the
+number of distinct queries counted, not by the size of the logs.
+"""
+
+import sys
+import os
+import json
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bounded_counter import BoundedCounter
+from near_duplicates import NearDuplicateFinder
+
+# Distinct fallback queries counted at once (see BoundedCounter)
+MAX_DISTINCT = 50000
+
+# Query similarity (Jaccard of content words) treated as the same question
+CLUSTER_THRESHOLD = 0.5
+
+# Variants listed per cluster
+VARIANTS_SHOWN = 3
+
+
+def read_fallbacks(path, kb=None):
+    """
+    User inputs of the fallback exchanges in a conversation log
+
+    Args:
+        path: JSON Lines file written by ConversationLogger
+        kb: Only records of this knowledge base (None: all)
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or record.get('from_training', True):
+                continue
+            if kb is not None and record.get('kb') != kb:
+                continue
+            query = record.get('user')
+            if isinstance(query, str) and query.strip():
+                yield query
+
+
+def count_queries(queries, normalize, max_distinct=MAX_DISTINCT):
+    """
+    Count queries by normalized form in bounded memory
+
+    Returns:
+        (counts, samples, total): count and first raw text per normalized
+        query, and how many queries were read
+    """
+    counts = BoundedCounter(max_distinct)
+    samples = {}
+    total = 0
+    for query in queries:
+        key = normalize(query)
+        if not key:
+            continue
+        total += 1
+        if key not in samples:
+            samples[key] = query.strip()
+        if counts.add(key):
+            samples = {key: samples[key] for key in counts.counts}
+    return counts.counts, samples, total
+
+
+def cluster_queries(counts, samples, threshold=CLUSTER_THRESHOLD, min_count=1):
+    """
+    Group near-duplicate queries and rank the groups by total count
+
+    Queries are added most frequent first, so each cluster is named after
+    its most frequent variant.
+    """
+    finder = NearDuplicateFinder(threshold=threshold)
+    for key, count in counts.most_common():
+        if count < min_count:
+            break
+        finder.add(key, key)
+
+    clusters = []
+    for members in finder.groups():
+        members.sort(key=lambda key: -counts[key])
+        clusters.append({
+            'count': sum(counts[key] for key in members),
+            'query': samples[members[0]],
+            'variants': [{'query': samples[key], 'count': counts[key]} for key in members]
+        })
+    clusters.sort(key=lambda cluster: -cluster['count'])
+    return clusters
+
+
+def add_nearest_entries(clusters, matcher):
+    """Attach each cluster's best-scoring entry and score, even below the threshold"""
+    for cluster in clusters:
+        nearest = matcher.nearest_entry(cluster['query'])
+        if nearest is None:
+            cluster['nearest'] = None
+        else:
+            entry_id, score = nearest
+            cluster['nearest'] = {'question': matcher.store.entry(entry_id)['question'],
+                                  'score': round(score, 3)}
+    return clusters
+
+
+def print_report(clusters, total, distinct):
+    print(f"\n📊 {total} fallback queries, {distinct} distinct, {len(clusters)} clusters")
+    for rank, cluster in enumerate(clusters, 1):
+        print(f"\n{rank:3}. ({cluster['count']}x, {len(cluster['variants'])} variants) {cluster['query'][:70]}")
+        for variant in cluster['variants'][1:VARIANTS_SHOWN + 1]:
+            print(f"       {variant['count']:5}x {variant['query'][:60]}")
+        nearest = cluster.get('nearest')
+        if nearest:
+            print(f"     nearest ({nearest['score']:.2f}): {nearest['question'][:60]}")
+        else:
+            print("     nearest: no entry shares a word")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank clusters of unanswered queries in conversation logs')
+    parser.add_argument('logs', nargs='+', help='Conversation log files (JSON Lines), rotated files included')
+    parser.add_argument('--data', help='Training data file to find nearest entries in (default: data/training_data.json)')
+    parser.add_argument('--kb', help='Only queries sent to this knowledge base')
+    parser.add_argument('--top', type=int, default=20, help='Clusters to report (0: all)')
+    parser.add_argument('--threshold', type=float, default=CLUSTER_THRESHOLD,
+                        help='Query similarity treated as the same question')
+    parser.add_argument('--min-count', type=int, default=1, help='Ignore queries asked fewer times')
+    parser.add_argument('--max-distinct', type=int, default=MAX_DISTINCT,
+                        help='Distinct queries counted at once (bounds memory)')
+    parser.add_argument('--json', dest='json_output', help='Write the ranked clusters to this JSON file')
+    args = parser.parse_args()
+
+    from chatbot import EnhancedChatbot
+
+    matcher = EnhancedChatbot(args.data).matcher
+
+    def normalize(query):
+        return ' '.join(matcher.clean_text(query).split())
+
+    def queries():
+        for path in args.logs:
+            try:
+                yield from read_fallbacks(path, args.kb)
+            except OSError as e:
+                print(f"⚠️  Skipping log file {path}: {e}")
+
+    counts, samples, total = count_queries(queries(), normalize, args.max_distinct)
+    clusters = cluster_queries(counts, samples, args.threshold, args.min_count)
+    if args.top > 0:
+        clusters = clusters[:args.top]
+    add_nearest_entries(clusters, matcher)
+    print_report(clusters, total, len(counts))
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(clusters, f, indent=2, ensure_ascii=False)
+        print(f"\nSaved to: {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,12 @@ This creates a basic web server without needing Flask
 
 import http.server
 import socketserver
+import socket
+import threading
+import queue
+import signal
+import time
+import gc
 import json
 import urllib.parse
 import sys
@@ -15,117 +21,434 @@ from pathlib import Path
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-try:
-    from chatbot import EnhancedChatbot
-    CHATBOT_AVAILABLE = True
-    chatbot = EnhancedChatbot()
-    print("✓ Chatbot loaded successfully")
-except ImportError as e:
-    CHATBOT_AVAILABLE = False
-    print(f"⚠ Could not load chatbot: {e}")
+import chat_api
+from conversation_log import ConversationLogger
+from persistent_cache import PersistentResultCache
+from static_assets import StaticAssetCache
+from stats_stream import STREAM_HEADERS, STREAM_START, StatsBroadcaster, event, event_stream
+
+# Named knowledge bases are loaded on first use; the default one in the
+# background once the server has bound its socket (see /readyz)
+registry = chat_api.create_registry(load=False)
+
+# Interface pages are served from memory, pre-gzipped, and reloaded when edited
+# (the server starts the watcher)
+STATIC_ASSETS = StaticAssetCache(Path(__file__).parent, watch=False)
+
+# Open /stats/stream connections, fed from one thread instead of one worker each
+STATS_STREAM = StatsBroadcaster(lambda kb: chat_api.stats_payload(registry, kb))
+
+# Seconds a client may take to send its request before its worker is freed
+REQUEST_TIMEOUT = 30
+
+# Seconds an idle keep-alive connection may hold a worker waiting for its next request
+KEEPALIVE_TIMEOUT = 15
+
+# Set in pre-fork worker processes; the supervisor relays reloads to every worker
+SUPERVISOR_PID = None
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """
+    TCP server that hands accepted connections to a fixed pool of worker
+    threads through a bounded queue. When the queue is full the connection
+    is answered with 503 and Retry-After right away instead of waiting.
+    """
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers=8, queue_depth=64, bind_and_activate=True):
+        self.request_queue_size = queue_depth
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.pending = queue.Queue(maxsize=queue_depth)
+        self.rejected = 0
+        # Connections handed to another owner (stats streams); not closed by the worker
+        self.detached = set()
+        self.workers = [threading.Thread(target=self._work, name=f'http-worker-{i}', daemon=True)
+                        for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.rejected += 1
+            self.reject(request)
+
+    def reject(self, request):
+        """Answer an overflow connection with 503 without reading the request"""
+        try:
+            request.settimeout(1)
+            request.sendall(b'HTTP/1.0 503 Service Unavailable\r\n'
+                            b'Retry-After: 1\r\n'
+                            b'Content-Type: application/json\r\n'
+                            b'Content-Length: 44\r\n'
+                            b'Connection: close\r\n\r\n'
+                            b'{"error": "Server busy", "status": "error"}\n')
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+    def detach(self, request):
+        """Keep a connection open after its handler returns; the caller now owns it"""
+        self.detached.add(request)
+
+    def shutdown_request(self, request):
+        if request in self.detached:
+            self.detached.discard(request)
+            return
+        super().shutdown_request(request)
+
+    def _work(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self.workers:
+            self.pending.put(None)
+        for worker in self.workers:
+            worker.join()
+
+class PreforkSupervisor:
+    """
+    Serves from several forked processes so matching uses every core.
+
+    Knowledge bases are loaded once in the parent and frozen out of the
+    garbage collector, so the workers share their pages copy-on-write.
+    Each worker accepts on its own SO_REUSEPORT socket (or on the parent's
+    listening socket where SO_REUSEPORT is missing) and runs the usual
+    thread pool. Workers that exit are restarted; SIGHUP reloads every worker.
+    """
+
+    def __init__(self, port=8000, processes=2, workers=8, queue_depth=64):
+        self.processes = processes
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.reuse_port = hasattr(socket, 'SO_REUSEPORT')
+        self.children = {}  # pid -> start time
+        self.restarts = 0
+        self.running = False
+
+        # With SO_REUSEPORT this socket only reserves the port; it never listens
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.listener.bind(('', port))
+        if not self.reuse_port:
+            self.listener.listen(queue_depth)
+            # Workers race to accept; the losers get EAGAIN instead of blocking
+            self.listener.setblocking(False)
+        self.port = self.listener.getsockname()[1]
+
+    def run(self):
+        """Fork the workers and restart them until SIGTERM or SIGINT"""
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._reload)
+
+        # Workers share the index only if it is loaded before they fork
+        registry.load_in_background().join()
+
+        # Watcher threads do not survive fork(); each worker starts its own
+        STATIC_ASSETS.stop_watching()
+        registry.stop_watching()
+        gc.freeze()
+        for _ in range(self.processes):
+            self._spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or not self.running:
+                continue
+            print(f"⚠ Worker {pid} exited with status {status}; restarting")
+            self.restarts += 1
+            if time.monotonic() - started < 1:
+                # Do not spin when workers die right after starting
+                time.sleep(1)
+            if self.running:
+                self._spawn()
+        self.listener.close()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+
+        code = 0
+        try:
+            self._serve_worker()
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 0
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _serve_worker(self):
+        global SUPERVISOR_PID
+        SUPERVISOR_PID = os.getppid()
+
+        def exit_worker(signum, frame):
+            raise SystemExit(0)
+        signal.signal(signal.SIGTERM, exit_worker)
+        signal.signal(signal.SIGINT, exit_worker)
+        signal.signal(signal.SIGHUP, lambda signum, frame: registry.reload_all())
+        STATIC_ASSETS.start_watching()
+        if registry.watch:
+            registry.start_watching()
+
+        httpd = PooledHTTPServer(('', self.port), ChatbotRequestHandler, self.workers, self.queue_depth,
+                                 bind_and_activate=False)
+        if self.reuse_port:
+            self.listener.close()
+            httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            httpd.server_bind()
+            httpd.server_activate()
+        else:
+            httpd.socket.close()
+            httpd.socket = self.listener
+        try:
+            with httpd:
+                httpd.serve_forever()
+        finally:
+            registry.close()
+
+    def _stop(self, signum, frame):
+        self.running = False
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reload(self, signum, frame):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
 
 class ChatbotRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Persistent connections: every response carries Content-Length
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle on, a persistent
+    # connection stalls on the client's delayed ACK (~40 ms) every response
+    disable_nagle_algorithm = True
+    timeout = REQUEST_TIMEOUT
+    keepalive_timeout = KEEPALIVE_TIMEOUT
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(Path(__file__).parent), **kwargs)
 
+    def handle(self):
+        """Serve requests on one connection until it is closed or sits idle too long"""
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.wait_for_request():
+            self.handle_one_request()
+
+    def wait_for_request(self):
+        """Wait up to keepalive_timeout for the next request on this connection"""
+        self.connection.settimeout(self.keepalive_timeout)
+        try:
+            if not self.rfile.peek(1):
+                return False
+        except OSError:
+            return False
+        self.connection.settimeout(self.timeout)
+        return True
+
+    def end_headers(self):
+        if not self.close_connection:
+            if isinstance(self.server, PooledHTTPServer) and self.server.pending.qsize():
+                # Connections are waiting for a worker; do not hold this one idle
+                self.send_header('Connection', 'close')
+            else:
+                self.send_header('Connection', 'keep-alive')
+                self.send_header('Keep-Alive', f'timeout={int(self.keepalive_timeout)}')
+        super().end_headers()
+
     def do_POST(self):
-        if self.path == '/chat':
-            self.handle_chat_request()
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/chat':
+            self.handle_chat_request(urllib.parse.parse_qs(url.query))
+        elif url.path == '/admin/reload':
+            # Any body is ignored, but must be read off a persistent connection
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            self.handle_reload_request(urllib.parse.parse_qs(url.query))
         else:
             self.send_error(404)
 
     def do_GET(self):
-        if self.path == '/':
-            self.path = '/simple_interface.html'
-        elif self.path == '/stats':
-            self.handle_stats_request()
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/stats':
+            self.handle_stats_request(urllib.parse.parse_qs(url.query))
+            return
+        if url.path == '/stats/stream':
+            self.handle_stats_stream(urllib.parse.parse_qs(url.query))
+            return
+        if url.path in ('/healthz', '/readyz'):
+            status, body = chat_api.health() if url.path == '/healthz' else chat_api.readiness(registry)
+            self.send_json_response(body, status)
+            return
+        if url.path == '/answer':
+            self.send_body(*chat_api.answer(registry, urllib.parse.parse_qs(url.query),
+                                            self.headers.get('Accept-Encoding'), self.headers.get('If-None-Match')))
             return
-        super().do_GET()
+        if not self.send_static_asset(url.path):
+            super().do_GET()
 
-    def handle_chat_request(self):
+    def do_HEAD(self):
+        if not self.send_static_asset(urllib.parse.urlsplit(self.path).path):
+            super().do_HEAD()
+
+    def send_static_asset(self, path):
+        """Answer from the in-memory asset cache; False if the file is not cached"""
+        asset = STATIC_ASSETS.get('/simple_interface.html' if path == '/' else path)
+        if asset is None:
+            return False
+        status, headers, body = asset.response(self.headers.get('Accept-Encoding'),
+                                               self.headers.get('If-None-Match'))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        return True
+
+    def handle_chat_request(self, query):
         try:
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
-            
-            message = data.get('message', '').strip()
-            
-            if not message:
-                self.send_json_response({'error': 'Empty message'}, 400)
-                return
-
-            if CHATBOT_AVAILABLE:
-                result = chatbot.get_response(message)
-                # Handle both tuple and string returns for backward compatibility
-                if isinstance(result, tuple):
-                    response, is_trained = result
-                else:
-                    response = result
-            else:
-                # Fallback responses if chatbot isn't available
-                fallback_responses = {
-                    'hi': 'Hello! How can I help you today?',
-                    'hello': 'Hi there! What would you like to know?',
-                    'what is power bi': 'Microsoft Power BI is a business analytics platform by Microsoft.',
-                    'what is python': 'Python is a high-level programming language.',
-                }
-                response = fallback_responses.get(message.lower(), 
-                    "I'm sorry, the chatbot service is not available right now.")
-
-            self.send_json_response({
-                'response': response,
-                'status': 'success'
-            })
+            session_id, session_headers = chat_api.chat_session(registry, self.headers.get('Cookie'),
+                                                                self.headers.get(chat_api.SESSION_HEADER))
+            status, body = chat_api.chat(registry, query, data, session_id)
+            self.send_json_response(body, status, session_headers)
 
         except Exception as e:
             print(f"Error handling chat request: {e}")
+            # The request body may be unread; do not parse it as the next request
+            self.close_connection = True
             self.send_json_response({
                 'error': str(e),
                 'status': 'error'
             }, 500)
 
-    def handle_stats_request(self):
+    def handle_reload_request(self, query):
+        status, body = chat_api.reload(registry, query, self.headers.get('X-Admin-Token'))
+        if SUPERVISOR_PID is not None and status in (200, 202):
+            # Have the other pre-fork workers reload as well
+            os.kill(SUPERVISOR_PID, signal.SIGHUP)
+        self.send_json_response(body, status)
+
+    def handle_stats_request(self, query):
         try:
-            if CHATBOT_AVAILABLE:
-                stats = {
-                    'total_questions': len(chatbot.conversation_history),
-                    'training_data_count': len(chatbot.training_data),
-                    'chatbot_available': True
-                }
-            else:
-                stats = {
-                    'total_questions': 0,
-                    'training_data_count': 0,
-                    'chatbot_available': False
+            server_stats = None
+            if isinstance(self.server, PooledHTTPServer):
+                server_stats = {
+                    'workers': len(self.server.workers),
+                    'queued': self.server.pending.qsize(),
+                    'rejected': self.server.rejected,
+                    'stats_streams': len(STATS_STREAM)
                 }
-            
-            self.send_json_response(stats)
+                if SUPERVISOR_PID is not None:
+                    server_stats['pid'] = os.getpid()
+            self.send_body(*chat_api.stats_response(registry, query, self.headers.get('If-None-Match'), server_stats))
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
-    def send_json_response(self, data, status_code=200):
+    def handle_stats_stream(self, query):
+        """Server-Sent Events: the stats now and whenever they change"""
+        status, body = chat_api.stats(registry, query)
+        if status != 200:
+            self.send_json_response(body, status)
+            return
+
+        payload = chat_api.encode(body)[0]
+        self.send_response(200)
+        for name, value in STREAM_HEADERS + chat_api.CORS_HEADERS:
+            self.send_header(name, value)
+        # The stream ends when the connection does
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        if isinstance(self.server, PooledHTTPServer):
+            self.wfile.write(STREAM_START + event(payload))
+            self.server.detach(self.connection)
+            STATS_STREAM.subscribe(self.connection, chat_api.kb_name(query), payload)
+            return
+
+        # Without a worker pool this thread serves the stream until the client leaves
+        kb = chat_api.kb_name(query)
+        try:
+            for chunk in event_stream(lambda: chat_api.stats_payload(registry, kb)):
+                self.wfile.write(chunk)
+        except OSError:
+            pass
+
+    def send_json_response(self, data, status_code=200, headers=()):
+        body, encoding_headers = chat_api.encode(data, self.headers.get('Accept-Encoding'))
+        self.send_body(status_code, body, encoding_headers + list(headers))
+
+    def send_body(self, status_code, body, headers=()):
+        """Send an encoded JSON body (empty for a 304) with the API headers"""
         self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        if status_code != 304:
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+        for name, value in chat_api.CORS_HEADERS + list(headers):
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
+        self.wfile.write(body)
 
     def do_OPTIONS(self):
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        for name, value in chat_api.PREFLIGHT_HEADERS:
+            self.send_header(name, value)
         self.end_headers()
 
-def start_server(port=8000):
-    """Start the simple HTTP server"""
+def start_prefork_server(port=8000, processes=2, workers=8, queue_depth=64):
+    """Start the server in several worker processes under a supervisor"""
+    supervisor = PreforkSupervisor(port, processes, workers, queue_depth)
+    print(f"🚀 Chatbot server starting ({processes} processes x {workers} workers)...")
+    print(f"📱 Open your browser and go to: http://localhost:{supervisor.port}")
+    print(f"🛑 Press Ctrl+C to stop the server", flush=True)
+    supervisor.run()
+    print("\n👋 Server stopped")
+
+def start_server(port=8000, workers=8, queue_depth=64):
+    """Start the simple HTTP server with a pool of worker threads"""
     try:
-        with socketserver.TCPServer(("", port), ChatbotRequestHandler) as httpd:
-            print(f"🚀 Chatbot server starting...")
-            print(f"📱 Open your browser and go to: http://localhost:{port}")
-            print(f"🔧 Chatbot status: {'✓ Available' if CHATBOT_AVAILABLE else '⚠ Fallback mode'}")
+        with PooledHTTPServer(("", port), ChatbotRequestHandler, workers, queue_depth) as httpd:
+            # Bound and listening: requests are queued while the index loads
+            registry.load_in_background()
+            STATIC_ASSETS.start_watching()
+            print(f"🚀 Chatbot server starting ({workers} workers, queue depth {queue_depth})...")
+            print(f"📱 Open your browser and go to: http://localhost:{httpd.server_address[1]}")
             print(f"🛑 Press Ctrl+C to stop the server")
             
             httpd.serve_forever()
@@ -133,11 +456,43 @@ def start_server(port=8000):
         print("\n👋 Server stopped by user")
     except Exception as e:
         print(f"❌ Server error: {e}")
+    finally:
+        registry.close()
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='Start chatbot web server')
     parser.add_argument('--port', type=int, default=8000, help='Port to run server on')
+    parser.add_argument('--workers', type=int, default=8, help='Worker threads serving requests')
+    parser.add_argument('--queue-depth', type=int, default=64,
+                        help='Connections waiting for a worker before new ones get 503')
+    parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                        help='Seconds an idle connection may hold a worker')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='Worker processes sharing the loaded knowledge base (pre-fork mode)')
+    parser.add_argument('--kb-dir', help='Directory of named knowledge bases (<name>.json, selected with ?kb=<name>)')
+    parser.add_argument('--kb-memory-mb', type=float, help='Memory budget for loaded knowledge bases')
+    parser.add_argument('--result-cache', help='SQLite file caching matches across restarts and worker processes')
+    parser.add_argument('--conversation-log', help='JSON Lines file every exchange is written to (rotated by size)')
+    parser.add_argument('--warmup', action='append', default=[], metavar='FILE',
+                        help='Conversation log or query file to warm the caches from (repeatable)')
+    parser.add_argument('--warmup-budget', type=float, help='Seconds warm-up may delay readiness')
     args = parser.parse_args()
     
-    start_server(args.port)
\ No newline at end of file
+    if args.kb_dir:
+        registry.kb_dir = args.kb_dir
+    if args.kb_memory_mb is not None:
+        registry.memory_budget = int(args.kb_memory_mb * 1024 * 1024)
+    if args.result_cache:
+        registry.result_cache = PersistentResultCache(args.result_cache)
+    if args.conversation_log:
+        registry.conversation_log = ConversationLogger(args.conversation_log)
+    registry.warmup_files += args.warmup
+    if args.warmup_budget is not None:
+        registry.warmup_budget = args.warmup_budget
+    
+    ChatbotRequestHandler.keepalive_timeout = args.keepalive_timeout
+    if args.processes > 1 and hasattr(os, 'fork'):
+        start_prefork_server(args.port, args.processes, args.workers, args.queue_depth)
+    else:
+        start_server(args.port, args.workers, args.queue_depth)
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Compressed Answer Storage
+Answers are kept out of the matching structures as zlib-compressed blocks
+with an offset table; only the answer of the winning entry is decompressed
+"""
+
+import sys
+import zlib
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+# Uncompressed bytes collected before a block is compressed
+BLOCK_SIZE = 16 * 1024
+
+# Decompressed answers kept for repeated requests
+CACHE_SIZE = 256
+
+
+def _digest(data: bytes) -> int:
+    """64-bit key of an answer in the deduplication table"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+class CompressedAnswers(ABC):
+    """Read side shared by the in-memory and memory-mapped answer stores"""
+
+    def __init__(self, locations, cache_size: int = CACHE_SIZE):
+        """
+        Args:
+            locations: (block, start, end) byte range of every answer, flattened
+            cache_size: Number of decompressed answers kept in the LRU
+        """
+        self.locations = locations
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[int, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.locations) // 3
+
+    @abstractmethod
+    def block_count(self) -> int:
+        """Number of blocks holding the answers"""
+
+    @abstractmethod
+    def _block(self, index: int) -> bytes:
+        """Decompressed contents of a block"""
+
+    def _bytes(self, answer_id: int) -> bytes:
+        """UTF-8 bytes of an answer (decompresses its block)"""
+        block, start, end = self.locations[answer_id * 3:answer_id * 3 + 3]
+        return self._block(block)[start:end]
+
+    def get(self, answer_id: int) -> str:
+        with self._lock:
+            answer = self._cache.get(answer_id)
+            if answer is not None:
+                self._cache.move_to_end(answer_id)
+                return answer
+
+        if not 0 <= answer_id < len(self):
+            raise IndexError('answer id out of range')
+        answer = self._bytes(answer_id).decode('utf-8')
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[answer_id] = answer
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return answer
+
+    def __getitem__(self, answer_id: int) -> str:
+        return self.get(answer_id)
+
+    def __iter__(self) -> Iterator[str]:
+        """All answers in id order, decompressing each block once"""
+        for data in self._iter_bytes():
+            yield data.decode('utf-8')
+
+    def _iter_bytes(self) -> Iterator[bytes]:
+        current, data = None, b''
+        for answer_id in range(len(self)):
+            block, start, end = self.locations[answer_id * 3:answer_id * 3 + 3]
+            if block != current:
+                current, data = block, self._block(block)
+            yield data[start:end]
+
+
+class AnswerStore(CompressedAnswers):
+    def __init__(self, block_size: int = BLOCK_SIZE, cache_size: int = CACHE_SIZE):
+        """
+        Append-only compressed answer store with deduplication
+
+        New answers collect in an uncompressed pending block that is
+        compressed once it reaches block_size, so at most one block of
+        answer text is ever held uncompressed.
+
+        Args:
+            block_size: Uncompressed bytes per zlib block
+            cache_size: Number of decompressed answers kept in the LRU
+        """
+        super().__init__(array('I'), cache_size)
+        self.block_size = block_size
+        self.blocks: List[bytes] = []
+        self._pending = bytearray()
+
+        # Answers are deduplicated through an open-addressing table of answer
+        # ids keyed by a 64-bit digest, so no text or per-answer objects are
+        # kept; a digest match is confirmed against the stored bytes
+        self._digests = array('Q')
+        self._slots = array('i', [-1]) * 1024
+
+    def block_count(self) -> int:
+        return len(self.blocks) + (1 if self._pending else 0)
+
+    def _block(self, index: int) -> bytes:
+        if index < len(self.blocks):
+            return zlib.decompress(self.blocks[index])
+        return bytes(self._pending)
+
+    def _slot(self, digest: int, data: Optional[bytes] = None) -> int:
+        """
+        Slot holding the answer with these bytes, or the empty slot where it
+        belongs (with data None, always the empty slot, for rehashing)
+        """
+        mask = len(self._slots) - 1
+        slot = digest & mask
+        while True:
+            answer_id = self._slots[slot]
+            if answer_id < 0:
+                return slot
+            # Different answers may share a digest; only equal bytes are a match
+            if data is not None and self._digests[answer_id] == digest and self._bytes(answer_id) == data:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _rehash(self, size: int):
+        """Rebuild the deduplication table with this many slots (a power of two)"""
+        self._slots = array('i', [-1]) * size
+        for answer_id, digest in enumerate(self._digests):
+            self._slots[self._slot(digest)] = answer_id
+
+    @classmethod
+    def from_blocks(cls, blocks: List[bytes], locations, cache_size: int = CACHE_SIZE) -> 'AnswerStore':
+        """
+        An answer store over blocks compressed elsewhere (an artifact)
+
+        The blocks are kept as they are; only the deduplication table is
+        rebuilt, decompressing each block once.
+        """
+        answers = cls(cache_size=cache_size)
+        answers.blocks = list(blocks)
+        answers.locations = array('I', locations)
+        answers._digests = array('Q', (_digest(data) for data in answers._iter_bytes()))
+        size = len(answers._slots)
+        while len(answers._digests) * 2 > size:
+            size *= 2
+        answers._rehash(size)
+        return answers
+
+    def add(self, answer: str) -> int:
+        """Store an answer (once) and return its id"""
+        data = answer.encode('utf-8')
+        digest = _digest(data)
+        slot = self._slot(digest, data)
+        if self._slots[slot] >= 0:
+            return self._slots[slot]
+
+        answer_id = len(self)
+        start = len(self._pending)
+        self._pending.extend(data)
+        self.locations.extend((len(self.blocks), start, start + len(data)))
+        self._digests.append(digest)
+        self._slots[slot] = answer_id
+
+        # Keep the table at most half full
+        if len(self._digests) * 2 > len(self._slots):
+            self._rehash(len(self._slots) * 2)
+
+        if len(self._pending) >= self.block_size:
+            self.flush()
+        return answer_id
+
+    def copy(self) -> 'AnswerStore':
+        """A copy that answers can be added to without changing this store;
+        compressed blocks are immutable and shared"""
+        answers = AnswerStore(self.block_size, self.cache_size)
+        answers.blocks = list(self.blocks)
+        answers._pending = bytearray(self._pending)
+        answers.locations = array('I', self.locations)
+        answers._digests = array('Q', self._digests)
+        answers._slots = array('i', self._slots)
+        return answers
+
+    def flush(self):
+        """Compress the pending block"""
+        if self._pending:
+            self.blocks.append(zlib.compress(bytes(self._pending), 9))
+            self._pending = bytearray()
+
+    def serialize(self):
+        """(block offsets, concatenated blocks, locations) as bytes, for the artifact"""
+        self.flush()
+        offsets = [0]
+        for block in self.blocks:
+            offsets.append(offsets[-1] + len(block))
+        return array('Q', offsets).tobytes(), b''.join(self.blocks), self.locations.tobytes()
+
+    def memory_usage(self) -> int:
+        total = sys.getsizeof(self.blocks) + sum(sys.getsizeof(block) for block in self.blocks)
+        total += sys.getsizeof(self._pending) + sys.getsizeof(self.locations)
+        total += sys.getsizeof(self._digests) + sys.getsizeof(self._slots)
+        total += sum(sys.getsizeof(answer) for answer in self._cache.values())
+        return total
+
+
+class MappedAnswers(CompressedAnswers):
+    """Answer store over sections of a memory-mapped artifact"""
+
+    def __init__(self, block_offsets: memoryview, blocks: memoryview, locations: memoryview,
+                 cache_size: int = CACHE_SIZE):
+        super().__init__(locations, cache_size)
+        self.block_offsets = block_offsets
+        self.blocks = blocks
+
+    def block_count(self) -> int:
+        return len(self.block_offsets) - 1
+
+    def _block(self, index: int) -> bytes:
+        return zlib.decompress(self.blocks[self.block_offsets[index]:self.block_offsets[index + 1]])
+
+    def copy(self) -> AnswerStore:
+        """A writable in-memory store with the same answers, ids and compressed blocks"""
+        blocks = [bytes(self.blocks[self.block_offsets[index]:self.block_offsets[index + 1]])
+                  for index in range(self.block_count())]
+        return AnswerStore.from_blocks(blocks, self.locations, self.cache_size)
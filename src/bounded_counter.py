@@ -0,0 +1,38 @@
+"""
+Bounded Frequency Counting
+Counts how often distinct keys (normalized queries) occur in streams as long
+as a conversation log, in memory bounded by the number of distinct keys
+"""
+
+from collections import Counter
+from typing import Hashable, List, Optional, Tuple
+
+
+class BoundedCounter:
+    def __init__(self, max_distinct: int):
+        """
+        Counter that keeps at most max_distinct keys
+
+        Beyond that the rarest half is dropped, so memory stays bounded
+        however long the input is. Frequent keys keep their exact counts;
+        a rare key may be counted again from zero after a drop.
+
+        Args:
+            max_distinct: Distinct keys counted at once
+        """
+        self.max_distinct = max_distinct
+        self.counts = Counter()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, key: Hashable) -> bool:
+        """Count one occurrence; True if the rarest keys were just dropped"""
+        self.counts[key] += 1
+        if len(self.counts) > self.max_distinct:
+            self.counts = Counter(dict(self.counts.most_common(self.max_distinct // 2)))
+            return True
+        return False
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        return self.counts.most_common(n)
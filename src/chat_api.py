@@ -0,0 +1,340 @@
+"""
+Chat API Request Handling Shared by the Servers
+Each handler takes the parsed request and returns (status code, body), so
+the threaded and asyncio servers answer exactly the same way. A body is a
+dict, or a ResponseBody already encoded when the knowledge base was built;
+encode() turns either into bytes.
+"""
+
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional, Tuple, Union
+
+from conversation_log import ConversationLogger
+from kb_registry import DEFAULT_KB, KB_DIR, KnowledgeBaseRegistry, UnknownKnowledgeBase
+from persistent_cache import PersistentResultCache
+from sessions import (MAX_SESSIONS, SESSION_COOKIE, SESSION_HEADER, SESSION_TTL, SessionStore, new_session_id,
+                      session_id_from)
+from warmup import WARMUP_BUDGET
+from response_bodies import ResponseBody
+from static_assets import accepts_gzip, gzip_etag, matching_etag
+
+# Canned answers when the chatbot could not be loaded at all
+FALLBACK_RESPONSES = {
+    'hi': 'Hello! How can I help you today?',
+    'hello': 'Hi there! What would you like to know?',
+    'what is power bi': 'Microsoft Power BI is a business analytics platform by Microsoft.',
+    'what is python': 'Python is a high-level programming language.',
+}
+
+Query = Dict[str, List[str]]
+
+# Browsers cache preflight results this long (most cap it at 2-24 hours)
+PREFLIGHT_MAX_AGE = 86400
+
+# Sent with every API response
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', f'Content-Type, X-Admin-Token, {SESSION_HEADER}'),
+    ('Access-Control-Expose-Headers', SESSION_HEADER),
+]
+
+# Sent with the response to a preflight OPTIONS request
+PREFLIGHT_HEADERS = CORS_HEADERS + [('Access-Control-Max-Age', str(PREFLIGHT_MAX_AGE))]
+
+# Seconds browsers and proxies may reuse a GET /answer response before
+# revalidating it; after a knowledge-base change the ETag no longer matches
+ANSWER_MAX_AGE = 60
+
+Headers = List[Tuple[str, str]]
+
+
+def encode(body: Union[Dict, ResponseBody], accept_encoding: Optional[str] = None) -> Tuple[bytes, List[Tuple[str, str]]]:
+    """
+    JSON bytes of a handler body and the headers describing their encoding
+
+    Args:
+        accept_encoding: Accept-Encoding request header; long pre-encoded
+            answers are sent gzipped when it allows
+    """
+    if not isinstance(body, ResponseBody):
+        return json.dumps(body).encode('utf-8'), []
+    payload, content_encoding = body.encoded(accepts_gzip(accept_encoding))
+    headers = [('Vary', 'Accept-Encoding')] if body.gzipped is not None else []
+    if content_encoding:
+        headers.append(('Content-Encoding', content_encoding))
+    return payload, headers
+
+
+def create_registry(watch: bool = True, load: bool = True) -> KnowledgeBaseRegistry:
+    """
+    Registry configured from CHATBOT_KB_DIR / CHATBOT_KB_MEMORY_MB
+
+    CHATBOT_RESULT_CACHE names a SQLite file that the worker processes of a
+    host share as a persistent result cache. CHATBOT_WARMUP_FILES lists
+    recorded-query files (separated by os.pathsep) whose most frequent
+    queries are matched before the knowledge base is ready, for at most
+    CHATBOT_WARMUP_BUDGET seconds. CHATBOT_CONVERSATION_LOG names a JSON
+    Lines file that every exchange is written to (and warmed up from when no
+    warm-up files are given). Chat sessions expire after CHATBOT_SESSION_TTL
+    idle seconds, and at most CHATBOT_MAX_SESSIONS are kept.
+
+    Args:
+        load: Load the default knowledge base now; servers that bind first
+            pass False and call registry.load_in_background()
+    """
+    result_cache_path = os.environ.get('CHATBOT_RESULT_CACHE')
+    conversation_log_path = os.environ.get('CHATBOT_CONVERSATION_LOG')
+    registry = KnowledgeBaseRegistry(
+        kb_dir=os.environ.get('CHATBOT_KB_DIR', KB_DIR),
+        memory_budget=int(float(os.environ.get('CHATBOT_KB_MEMORY_MB', '512')) * 1024 * 1024),
+        watch=watch,
+        result_cache=PersistentResultCache(result_cache_path) if result_cache_path else None,
+        warmup_files=[path for path in os.environ.get('CHATBOT_WARMUP_FILES', '').split(os.pathsep) if path],
+        warmup_budget=float(os.environ.get('CHATBOT_WARMUP_BUDGET', WARMUP_BUDGET)),
+        conversation_log=ConversationLogger(conversation_log_path) if conversation_log_path else None,
+        sessions=SessionStore(ttl=float(os.environ.get('CHATBOT_SESSION_TTL', SESSION_TTL)),
+                              max_sessions=int(os.environ.get('CHATBOT_MAX_SESSIONS', MAX_SESSIONS)))
+    )
+    if load:
+        registry.prepare()
+    return registry
+
+
+class InvalidRequest(ValueError):
+    """Raised for a request field of the wrong type; answered with a 400"""
+
+
+def kb_name(query: Query, data: Optional[Dict] = None) -> Optional[str]:
+    """Knowledge base named by ?kb= or the 'kb' JSON field"""
+    name = query.get('kb', [None])[0] or (data or {}).get('kb')
+    if name is not None and not isinstance(name, str):
+        raise InvalidRequest("'kb' must be a string")
+    return name
+
+
+def _unknown(e: UnknownKnowledgeBase) -> Tuple[int, Dict]:
+    return 404, {'error': f'Unknown knowledge base: {e.args[0]}', 'status': 'error'}
+
+
+def parse_chat(data) -> Optional[str]:
+    """The message of a chat request body, or None if it is empty"""
+    message = data.get('message', '') if isinstance(data, dict) else ''
+    if not isinstance(message, str):
+        raise InvalidRequest("'message' must be a string")
+    return message.strip() or None
+
+
+def chat_session(registry: Optional[KnowledgeBaseRegistry], cookie: Optional[str],
+                 session_header: Optional[str]) -> Tuple[Optional[str], Headers]:
+    """
+    Session id of a chat request and the headers that hand a new one to the client
+
+    Args:
+        cookie: Cookie request header
+        session_header: X-Session-Id request header
+
+    Returns:
+        (session id, response headers); (None, []) without a session store
+    """
+    if registry is None or registry.sessions is None:
+        return None, []
+    session_id = session_id_from(cookie, session_header)
+    if session_id is not None:
+        return session_id, []
+    session_id = new_session_id()
+    cookie = (f'{SESSION_COOKIE}={session_id}; Path=/; Max-Age={int(registry.sessions.ttl)}; '
+              'HttpOnly; SameSite=Lax')
+    return session_id, [('Set-Cookie', cookie), (SESSION_HEADER, session_id)]
+
+
+def chat(registry: Optional[KnowledgeBaseRegistry], query: Query, data,
+         session_id: Optional[str] = None) -> Tuple[int, Union[Dict, ResponseBody]]:
+    """
+    POST /chat
+
+    Args:
+        session_id: From chat_session(); the user's recent turns give
+            follow-up questions their context
+    """
+    try:
+        message = parse_chat(data)
+        name = kb_name(query, data)
+    except InvalidRequest as e:
+        return 400, {'error': str(e), 'status': 'error'}
+    if message is None:
+        return 400, {'error': 'Empty message'}
+
+    if registry is None:
+        response = FALLBACK_RESPONSES.get(message.lower(), "I'm sorry, the chatbot service is not available right now.")
+        return 200, {'response': response, 'status': 'success'}
+
+    try:
+        chatbot = registry.get(name)
+    except UnknownKnowledgeBase as e:
+        return _unknown(e)
+
+    session = registry.sessions.get(session_id) if session_id and registry.sessions is not None else None
+    return 200, chatbot.get_response_body(message, session=session)
+
+
+def answer(registry: Optional[KnowledgeBaseRegistry], query: Query, accept_encoding: Optional[str] = None,
+           if_none_match: Optional[str] = None) -> Tuple[int, bytes, Headers]:
+    """
+    GET /answer?q=<message>: the /chat answer as a cacheable resource
+
+    The ETag comes from the normalized query and the knowledge-base
+    version, so a revalidation that still matches is answered with 304
+    without matching at all.
+
+    Returns:
+        (status, encoded body, headers); the body is empty for a 304
+    """
+    message = query.get('q', [''])[0].strip()
+    if not message:
+        return _uncacheable(400, {'error': 'Missing q parameter', 'status': 'error'})
+    if registry is None:
+        return _uncacheable(503, {'error': 'Chatbot not available', 'status': 'error'})
+    try:
+        chatbot = registry.get(kb_name(query))
+    except UnknownKnowledgeBase as e:
+        return _uncacheable(*_unknown(e))
+
+    snapshot = chatbot.snapshot
+    etag = chatbot.answer_etag(message, snapshot)
+    headers = [('Cache-Control', f'public, max-age={ANSWER_MAX_AGE}'), ('Vary', 'Accept-Encoding')]
+    matched = matching_etag(if_none_match, (etag, gzip_etag(etag)))
+    if matched is not None:
+        return 304, b'', [('ETag', matched)] + headers
+
+    payload, encoding_headers = encode(chatbot.get_response_body(message, snapshot), accept_encoding)
+    if ('Content-Encoding', 'gzip') in encoding_headers:
+        etag = gzip_etag(etag)
+        headers.append(('Content-Encoding', 'gzip'))
+    return 200, payload, [('ETag', etag)] + headers
+
+
+def _uncacheable(status: int, body: Dict) -> Tuple[int, bytes, Headers]:
+    return status, encode(body)[0], [('Cache-Control', 'no-store')]
+
+
+def health() -> Tuple[int, Dict]:
+    """GET /healthz: the process is up and answering, whether or not the index is loaded"""
+    return 200, {'status': 'ok'}
+
+
+def readiness(registry: Optional[KnowledgeBaseRegistry]) -> Tuple[int, Dict]:
+    """GET /readyz: 200 once the default knowledge base is loaded, 503 until then"""
+    if registry is None:
+        return 503, {'status': 'unavailable', 'error': 'The chatbot could not be loaded'}
+
+    chatbot = registry.peek()
+    if chatbot is None:
+        error = registry.load_errors.get(DEFAULT_KB)
+        if error:
+            return 503, {'status': 'error', 'error': error}
+        return 503, {'status': 'loading'}
+    if not registry.ready():
+        return 503, {'status': 'warming'}
+
+    snapshot = chatbot.snapshot
+    body = {
+        'status': 'ready',
+        'kb_version': snapshot.version,
+        'kb_built_at': snapshot.info()['built_at'],
+        'training_data_count': len(snapshot.matcher.store)
+    }
+    if DEFAULT_KB in registry.warmups:
+        body['warmup'] = registry.warmups[DEFAULT_KB]
+    return 200, body
+
+
+def stats(registry: Optional[KnowledgeBaseRegistry], query: Query,
+          server_stats: Optional[Dict] = None) -> Tuple[int, Dict]:
+    if registry is None:
+        return 200, {'total_questions': 0, 'training_data_count': 0, 'chatbot_available': False}
+
+    try:
+        chatbot = registry.get(kb_name(query))
+    except UnknownKnowledgeBase as e:
+        return _unknown(e)
+    return 200, _stats_body(registry, chatbot, server_stats)
+
+
+def _stats_body(registry: KnowledgeBaseRegistry, chatbot, server_stats: Optional[Dict] = None) -> Dict:
+    snapshot = chatbot.snapshot
+    body = {
+        'total_questions': chatbot.questions_answered,
+        'training_data_count': len(snapshot.matcher.store),
+        'kb_version': snapshot.version,
+        'kb_built_at': snapshot.info()['built_at'],
+        'knowledge_bases': registry.stats(),
+        'chatbot_available': True
+    }
+    if server_stats is not None:
+        body['server'] = server_stats
+    return body
+
+
+def stats_response(registry: Optional[KnowledgeBaseRegistry], query: Query, if_none_match: Optional[str] = None,
+                   server_stats: Optional[Dict] = None) -> Tuple[int, bytes, Headers]:
+    """
+    GET /stats with an ETag of the body, so unchanged stats cost a 304
+
+    Returns:
+        (status, encoded body, headers); the body is empty for a 304
+    """
+    status, body = stats(registry, query, server_stats)
+    payload = encode(body)[0]
+    if status != 200:
+        return status, payload, [('Cache-Control', 'no-store')]
+    etag = '"' + hashlib.blake2b(payload, digest_size=12).hexdigest() + '"'
+    headers = [('ETag', etag), ('Cache-Control', 'no-cache')]
+    if matching_etag(if_none_match, (etag,)) is not None:
+        return 304, b'', headers
+    return 200, payload, headers
+
+
+def stats_payload(registry: Optional[KnowledgeBaseRegistry], kb: Optional[str]) -> Optional[bytes]:
+    """
+    Encoded stats of a knowledge base, as pushed on /stats/stream
+
+    None if the knowledge base is not in memory: pushes run on the event
+    loop or the broadcaster thread, so they never load (or reload an
+    evicted) knowledge base; the stream just stays quiet until it is back.
+    """
+    if registry is None:
+        return encode(stats(None, {})[1])[0]
+    chatbot = registry.peek(kb)
+    if chatbot is None:
+        return None
+    return encode(_stats_body(registry, chatbot))[0]
+
+
+def reload(registry: Optional[KnowledgeBaseRegistry], query: Query, admin_token: Optional[str]) -> Tuple[int, Dict]:
+    """
+    Rebuild a knowledge base from disk
+
+    Args:
+        admin_token: Value of the X-Admin-Token request header
+    """
+    expected = os.environ.get('CHATBOT_ADMIN_TOKEN')
+    if expected and admin_token != expected:
+        return 403, {'error': 'Forbidden', 'status': 'error'}
+    if registry is None:
+        return 503, {'error': 'Chatbot not available', 'status': 'error'}
+
+    try:
+        chatbot = registry.get(kb_name(query))
+    except UnknownKnowledgeBase as e:
+        return _unknown(e)
+
+    wait = query.get('wait', ['0'])[0] in ('1', 'true')
+    snapshot = chatbot.reload(wait=wait)
+    if not wait:
+        return 202, {'status': 'reloading', 'knowledge_base': snapshot.info()}
+    if chatbot.last_reload_error:
+        return 500, {'status': 'error', 'error': chatbot.last_reload_error, 'knowledge_base': snapshot.info()}
+    return 200, {'status': 'reloaded', 'error': None, 'knowledge_base': snapshot.info()}
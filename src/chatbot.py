@@ -4,35 +4,233 @@ Uses machine learning-like matching to find best responses from training data
 """
 
 import os
-import sys
-import json
-
-# Add src directory to path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data'))
+import time
+import hashlib
+import threading
+from collections import deque
 
 from fast_semantic_matcher import FastSemanticMatcher
+from kb_artifact import ArtifactError, MappedEntryStore, artifact_path_for, is_fresh
+from kb_loader import LoaderError, iter_entries
+from kb_changelog import ChangeLog, changelog_path_for
+from kb_snapshot import FileWatcher, KnowledgeBaseSnapshot, data_version
+from response_bodies import ResponseBody
+from response_cache import NO_MATCH, ResponseCache
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'training_data.json')
+
+# Recent exchanges kept in memory per chatbot
+HISTORY_SIZE = 1000
 
 class EnhancedChatbot:
-    def __init__(self):
-        """Initialize the enhanced chatbot with training data"""
-        self.training_data = self.load_training_data()
-        self.matcher = FastSemanticMatcher(self.training_data)
-        self.conversation_history = []
+    def __init__(self, data_file=None, cache_size=1024, result_cache=None, conversation_log=None,
+                 history_size=HISTORY_SIZE, name=None):
+        """
+        Initialize the enhanced chatbot with training data
         
-    def load_training_data(self):
-        """Load training data from JSON file"""
-        data_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'training_data.json')
+        Args:
+            data_file: Training data file (.json, .jsonl, .csv or .py);
+                defaults to data/training_data.json
+            cache_size: Number of responses cached per knowledge-base version
+            result_cache: Optional PersistentResultCache consulted on
+                in-memory cache misses, shared with other processes
+            conversation_log: Optional ConversationLogger that persists
+                every exchange
+            history_size: Recent exchanges kept in memory
+            name: Knowledge-base name recorded in the conversation log
+        """
+        self.data_file = data_file or DATA_FILE
+        self.changes = ChangeLog(changelog_path_for(self.data_file), self.data_file)
+        self.response_cache = ResponseCache(cache_size)
+        self.result_cache = result_cache
+        self.conversation_log = conversation_log
+        self.name = name
+        self.watcher = None
+        self.last_reload_error = None
+        self._write_lock = threading.Lock()
+        self._history_lock = threading.Lock()
+        self._reload_guard = threading.Lock()
+        self._reload_thread = None
+        self._reload_pending = False
+        self.snapshot = self.load_snapshot()
+        # Only the most recent exchanges; the conversation log keeps them all
+        self.conversation_history = deque(maxlen=history_size)
+        # Kept as counters so /stats never has to walk the history
+        self.questions_answered = 0
+        self.fallbacks_given = 0
+    
+    @property
+    def matcher(self):
+        """Matcher of the knowledge-base snapshot currently being served"""
+        return self.snapshot.matcher
+    
+    @property
+    def training_data(self):
+        """Training entries, served from the matcher's entry store"""
+        return self.matcher.entries()
+    
+    def load_snapshot(self):
+        """Build the knowledge base from disk, using fallback data if it cannot be loaded"""
+        try:
+            return self.build_snapshot()
+        except FileNotFoundError:
+            print("⚠️  Training data not found. Creating basic fallback data...")
+        except LoaderError as e:
+            print(f"❌ Error loading training data: {e}")
+        
+        return KnowledgeBaseSnapshot(FastSemanticMatcher(self.create_fallback_data()), 'fallback')
+    
+    def build_snapshot(self):
+        """
+        Build a new knowledge-base snapshot from disk
+        
+        Memory-maps the compiled artifact if it is up to date, else streams the
+        data file, then replays the change log.
+        
+        Raises:
+            FileNotFoundError, LoaderError: If the data file cannot be loaded
+        """
+        artifact = artifact_path_for(self.data_file)
+        matcher = None
         
+        if is_fresh(artifact, self.data_file):
+            try:
+                store = MappedEntryStore(artifact)
+                print(f"✅ Loaded {len(store)} training entries (compiled {store.version})")
+                matcher = FastSemanticMatcher.from_store(store)
+                base_version = store.version
+            except (OSError, ArtifactError) as e:
+                print(f"⚠️  Ignoring knowledge-base artifact: {e}")
+        
+        if matcher is None:
+            # Entries are streamed straight into the index, never held as a list
+            matcher = FastSemanticMatcher(iter_entries(self.data_file))
+            base_version = data_version(self.data_file)
+            print(f"✅ Loaded {len(matcher.store)} training entries")
+        
+        self.apply_logged_changes(matcher)
+        return KnowledgeBaseSnapshot(matcher, base_version, len(self.changes))
+    
+    def reload(self, wait=False):
+        """
+        Rebuild the knowledge base from disk in a background thread
+        
+        The new snapshot is published with a single assignment; requests
+        already running finish on the old one. Requests made while a reload
+        is running are coalesced into one more rebuild.
+        
+        Args:
+            wait: Block until the reload has finished
+        
+        Returns:
+            The snapshot being served when the call returns
+        """
+        with self._reload_guard:
+            self._reload_pending = True
+            if self._reload_thread is None:
+                self._reload_thread = threading.Thread(target=self._reload_worker, name='kb-reload', daemon=True)
+                self._reload_thread.start()
+            thread = self._reload_thread
+        
+        if wait:
+            thread.join()
+        return self.snapshot
+    
+    def _reload_worker(self):
+        while True:
+            with self._reload_guard:
+                if not self._reload_pending:
+                    self._reload_thread = None
+                    return
+                self._reload_pending = False
+            
+            try:
+                # Edits wait for the rebuild so none is lost in the swap
+                with self._write_lock:
+                    self.snapshot = self.build_snapshot()
+                self.last_reload_error = None
+                print(f"🔄 Knowledge base reloaded (version {self.snapshot.version})")
+            except (OSError, LoaderError, KeyError) as e:
+                self.last_reload_error = str(e)
+                print(f"❌ Reload failed, still serving version {self.snapshot.version}: {e}")
+    
+    def start_watching(self, interval=2.0):
+        """Reload automatically when the data file or compiled artifact changes"""
+        if self.watcher is None:
+            self.watcher = FileWatcher([self.data_file, artifact_path_for(self.data_file)], self.reload, interval)
+            self.watcher.start()
+    
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+    
+    def apply_logged_changes(self, matcher):
+        """Replay changes made since the data file was last written"""
+        try:
+            applied = self.changes.replay(matcher)
+        except (KeyError, ValueError) as e:
+            print(f"❌ Error replaying knowledge-base changes: {e}")
+        else:
+            if applied:
+                print(f"✅ Applied {applied} logged knowledge-base changes")
+        return matcher
+    
+    def add_entry(self, question, answer, keywords):
+        """Add a knowledge-base entry immediately and log it; returns the entry id"""
+        entry = {'question': question, 'answer': answer, 'keywords': list(keywords)}
+        with self._write_lock:
+            # Compact before adding so the returned id stays valid
+            self._compact_if_needed()
+            matcher = self.matcher.edited()
+            entry_id = matcher.add_entry(question, answer, entry['keywords'])
+            self.changes.append('add', entry_id, entry)
+            self.snapshot = self.snapshot.with_changes(matcher, len(self.changes), [entry_id])
+        return entry_id
+    
+    def update_entry(self, entry_id, question, answer, keywords):
+        """Replace a knowledge-base entry immediately and log it"""
+        entry = {'question': question, 'answer': answer, 'keywords': list(keywords)}
+        with self._write_lock:
+            matcher = self.matcher.edited()
+            matcher.update_entry(entry_id, question, answer, entry['keywords'])
+            self.changes.append('update', entry_id, entry)
+            self.snapshot = self.snapshot.with_changes(matcher, len(self.changes), [entry_id])
+            self._compact_if_needed()
+    
+    def remove_entry(self, entry_id):
+        """Remove a knowledge-base entry immediately and log it"""
+        with self._write_lock:
+            matcher = self.matcher.edited()
+            matcher.remove_entry(entry_id)
+            self.changes.append('remove', entry_id)
+            self.snapshot = self.snapshot.with_changes(matcher, len(self.changes), [entry_id])
+            self._compact_if_needed()
+    
+    def _compact_if_needed(self):
+        """Fold a long change log into the data file (entry ids are renumbered)"""
+        if not self.changes.needs_compaction:
+            return
         try:
-            with open(data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"✅ Loaded {len(data)} training entries")
-                return data
+            count = self.changes.compact(self.matcher)
+            print(f"✅ Compacted knowledge-base changes into {self.data_file} ({count} entries)")
+            # Renumbered in a copy, so requests holding the old snapshot keep valid ids
+            self.snapshot = KnowledgeBaseSnapshot(self.matcher.compacted(), data_version(self.data_file), 0,
+                                                  self.snapshot.built_at)
+            if self.watcher is not None:
+                # The data file now matches the served snapshot; no reload needed
+                self.watcher.acknowledge()
+        except (OSError, LoaderError) as e:
+            print(f"⚠️  Could not compact change log: {e}")
+    
+    def load_training_data(self):
+        """Load all training entries from the data file as a list"""
+        try:
+            return list(iter_entries(self.data_file))
         except FileNotFoundError:
             print("⚠️  Training data not found. Creating basic fallback data...")
             return self.create_fallback_data()
-        except json.JSONDecodeError as e:
+        except LoaderError as e:
             print(f"❌ Error loading training data: {e}")
             return self.create_fallback_data()
     
@@ -57,17 +255,138 @@ class EnhancedChatbot:
         if user_input.lower().strip() in ['exit', 'quit', 'bye', 'goodbye']:
             return "exit"
         
-        # Get response from query matcher
-        response, is_from_training = self.matcher.get_response(user_input)
+        snapshot, entry_id = self._match(user_input)
+        if entry_id is None:
+            response = snapshot.matcher.get_fallback_response()
+        else:
+            response = snapshot.matcher.store.answer(entry_id)
+        self._remember(user_input, response, entry_id is not None, snapshot)
+        
+        return response, entry_id is not None
+    
+    def get_response_body(self, user_input, snapshot=None, session=None):
+        """
+        Encoded JSON body of the /chat response for user input
+        
+        Args:
+            snapshot: Knowledge-base snapshot to answer from (default: the current one)
+            session: Session of the user; a question that matches nothing on
+                its own is tried again together with their previous one
+        
+        Returns:
+            ResponseBody shared by every request that gets the same answer
+        """
+        if user_input.lower().strip() in ['exit', 'quit', 'bye', 'goodbye']:
+            return ResponseBody("exit")
+        
+        snapshot, entry_id = self._match(user_input, snapshot)
+        if session is not None:
+            if entry_id is None:
+                snapshot, entry_id = self._match_follow_up(user_input, snapshot, session)
+            session.record(self.name, user_input, entry_id)
+        body = snapshot.bodies.get(entry_id)
+        if entry_id is None:
+            self._remember(user_input, snapshot.matcher.get_fallback_response(), False, snapshot)
+        else:
+            self._remember(user_input, snapshot.matcher.store.answer(entry_id), True, snapshot)
+        return body
+    
+    def answer_etag(self, user_input, snapshot=None):
+        """
+        Strong ETag of the answer to user input
+        
+        Derived from the normalized query and the knowledge-base version
+        alone, so it is known without matching and changes whenever a new
+        version is published.
+        """
+        snapshot = snapshot or self.snapshot
+        key = f"{snapshot.version}\0{self._cache_key(snapshot, user_input)}"
+        return '"' + hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest() + '"'
+    
+    def normalize_query(self, user_input):
+        """The form of user input that responses are cached under"""
+        return self._cache_key(self.snapshot, user_input)
+    
+    def warm_up(self, queries, deadline=None):
+        """
+        Match queries ahead of traffic to fill the caches
+        
+        Fills the response cache (and the persistent result cache) and
+        encodes the response bodies, without counting the queries as answered.
+        
+        Args:
+            queries: User inputs, most important first
+            deadline: time.monotonic() at which to stop
         
-        # Log the conversation
-        self.conversation_history.append({
+        Returns:
+            Number of queries matched
+        """
+        snapshot = self.snapshot
+        warmed = 0
+        for query in queries:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            snapshot, entry_id = self._match(query, snapshot)
+            snapshot.bodies.get(entry_id)
+            warmed += 1
+        return warmed
+    
+    @staticmethod
+    def _cache_key(snapshot, user_input):
+        # Matching only depends on the cleaned words (and the 'hi' substring,
+        # which cleaning preserves)
+        return ' '.join(snapshot.matcher.clean_text(user_input).split())
+    
+    def _match(self, user_input, snapshot=None):
+        """The snapshot serving this request and its matched entry id (None for the fallback)"""
+        # Use one snapshot for the whole request, even if a reload publishes a new one
+        snapshot = snapshot or self.snapshot
+        
+        cache_key = self._cache_key(snapshot, user_input)
+        entry_id = self.response_cache.get(snapshot.version, cache_key)
+        if entry_id is None and self.result_cache is not None:
+            entry_id = self.result_cache.get(snapshot.version, cache_key)
+            if entry_id is not None and entry_id != NO_MATCH and not snapshot.matcher.store.is_live(entry_id):
+                # Written by a process whose knowledge base was edited differently
+                entry_id = None
+            if entry_id is not None:
+                self.response_cache.put(snapshot.version, cache_key, entry_id)
+        if entry_id is None:
+            entry_id = snapshot.matcher.best_entry_id(user_input)
+            cached = NO_MATCH if entry_id is None else entry_id
+            self.response_cache.put(snapshot.version, cache_key, cached)
+            if self.result_cache is not None:
+                self.result_cache.put(snapshot.version, cache_key, cached)
+        elif entry_id == NO_MATCH:
+            entry_id = None
+        return snapshot, entry_id
+    
+    def _match_follow_up(self, user_input, snapshot, session):
+        """Match a follow-up ("and in Databricks?") together with the previous question"""
+        previous = session.previous(self.name)
+        if previous is None:
+            return snapshot, None
+        question, previous_id = previous
+        snapshot, entry_id = self._match(f"{question} {user_input}", snapshot)
+        # Repeating the previous answer does not answer the follow-up
+        return snapshot, entry_id if entry_id != previous_id else None
+    
+    def _remember(self, user_input, response, from_training, snapshot):
+        # Log the conversation (requests may arrive from several server threads)
+        record = {
             'user': user_input,
             'bot': response,
-            'from_training': is_from_training
-        })
-        
-        return response, is_from_training
+            'from_training': from_training
+        }
+        with self._history_lock:
+            self.conversation_history.append(record)
+            self.questions_answered += 1
+            if not from_training:
+                self.fallbacks_given += 1
+        if self.conversation_log is not None:
+            # Queued for the background writer; never blocks the request
+            self.conversation_log.log(dict(record, time=round(time.time(), 3), kb=self.name,
+                                           kb_version=snapshot.version))
     
     def show_debug_info(self, user_input):
         """Show debug information about the matching process"""
@@ -130,13 +449,13 @@ class EnhancedChatbot:
     
     def show_stats(self):
         """Show conversation statistics"""
-        if not self.conversation_history:
+        if not self.questions_answered:
             print("No conversation history yet.")
             return
         
-        total_responses = len(self.conversation_history)
-        training_responses = sum(1 for entry in self.conversation_history if entry['from_training'])
-        fallback_responses = total_responses - training_responses
+        total_responses = self.questions_answered
+        fallback_responses = self.fallbacks_given
+        training_responses = total_responses - fallback_responses
         
         print(f"\n📊 Conversation Statistics:")
         print(f"   Total responses: {total_responses}")
@@ -0,0 +1,159 @@
+"""
+Batched Conversation Logging to Disk
+Request threads only put a record on a bounded queue; a background thread
+writes the records in batches to a JSON Lines file that is rotated by size.
+When the queue is full, records are dropped and counted instead of making
+a request wait, so logging adds no latency and its memory stays flat.
+"""
+
+import os
+import json
+import queue
+import threading
+from typing import Dict, List
+
+# Records waiting to be written; more are dropped
+QUEUE_SIZE = 10000
+
+# Records written per batch (one write call each)
+BATCH_SIZE = 500
+
+# Seconds the writer waits for more records before writing a partial batch
+FLUSH_INTERVAL = 1.0
+
+# The log is rotated when it reaches this size
+MAX_BYTES = 50 * 1024 * 1024
+
+# Rotated files kept (<path>.1 is the newest)
+BACKUP_COUNT = 10
+
+
+class ConversationLogger:
+    def __init__(self, path: str, queue_size: int = QUEUE_SIZE, max_bytes: int = MAX_BYTES,
+                 backup_count: int = BACKUP_COUNT, flush_interval: float = FLUSH_INTERVAL):
+        """
+        Write conversation records to a rotating JSON Lines file
+
+        Each batch is appended with a single write, so the worker processes
+        of a pre-fork server can share one log file.
+
+        Args:
+            path: Log file; its directory is created if missing
+            queue_size: Records held in memory waiting to be written
+            max_bytes: Size at which the file is rotated to <path>.1
+            backup_count: Rotated files kept
+            flush_interval: Seconds before a partial batch is written
+        """
+        self.path = path
+        self.queue_size = queue_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._reset()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _reset(self):
+        # The writer thread does not survive fork(); a forked worker starts
+        # its own with an empty queue (the parent writes its own records)
+        self._pid = os.getpid()
+        self._queue: 'queue.Queue[Dict]' = queue.Queue(self.queue_size)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def log(self, record: Dict) -> bool:
+        """Queue a record without blocking; False if it was dropped"""
+        if self._pid != os.getpid():
+            self._reset()
+        if self._stop.is_set():
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='conversation-log', daemon=True)
+                    self._thread.start()
+        return True
+
+    def _drain(self, batch: List[Dict]) -> List[Dict]:
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(self._drain([first]))
+
+    def flush(self):
+        """Write every queued record now"""
+        while True:
+            batch = self._drain([])
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, records: List[Dict]):
+        data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+        with self._write_lock:
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                    size = os.fstat(fd).st_size
+                finally:
+                    os.close(fd)
+                self.written += len(records)
+                if size >= self.max_bytes:
+                    self._rotate()
+            except OSError as e:
+                self.errors += 1
+                print(f"⚠️  Could not write conversation log: {e}")
+
+    def _rotate(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                # Another process rotated it first
+                return
+        except FileNotFoundError:
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def files(self) -> List[str]:
+        """The log and its rotated files that exist, oldest first"""
+        paths = [f"{self.path}.{index}" for index in range(self.backup_count, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def stats(self) -> Dict:
+        return {'queued': self._queue.qsize(), 'written': self.written, 'dropped': self.dropped,
+                'errors': self.errors}
+
+    def close(self):
+        """Stop the writer and write what is queued (call on shutdown)"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join()
+        self.flush()
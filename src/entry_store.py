@@ -0,0 +1,272 @@
+"""
+Compact Entry Storage for the Matchers
+Keeps training entries as parallel arrays indexed by entry id, with
+compressed answers and word posting lists instead of per-entry dicts and sets
+"""
+
+import sys
+import copy
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from answer_store import AnswerStore
+
+
+class EntryStore:
+    def __init__(self):
+        """
+        Initialize an empty entry store
+
+        Every entry gets an integer id (its position). Per-entry data lives in
+        parallel arrays; the word sets themselves are not stored per entry,
+        only in the posting lists (word -> sorted entry ids) and as sizes.
+        Removed entries keep their id as a tombstone until compact().
+        """
+        self.questions: List[str] = []
+        self.keywords: List[Tuple[str, ...]] = []
+        self.answer_ids = array('I')
+        self.question_sizes = array('H')
+        self.keyword_sizes = array('H')
+        self.intents = array('B')
+        self.flags = array('B')
+
+        # Answers are compressed and stored once no matter how many entries
+        # share them; only the answer of a winning entry is decompressed
+        self.answers = AnswerStore()
+
+        self.intent_names: List[str] = []
+        self._intent_codes: Dict[str, int] = {}
+
+        self.question_postings: Dict[str, array] = {}
+        self.keyword_postings: Dict[str, array] = {}
+
+        self.removed: Set[int] = set()
+        self.revision = 0
+
+    def __len__(self) -> int:
+        return len(self.questions) - len(self.removed)
+
+    def entry_ids(self) -> Sequence:
+        """Ids of the live entries in ascending order"""
+        if not self.removed:
+            return range(len(self.questions))
+        return [entry_id for entry_id in range(len(self.questions)) if entry_id not in self.removed]
+
+    def is_live(self, entry_id: int) -> bool:
+        return 0 <= entry_id < len(self.questions) and entry_id not in self.removed
+
+    def _intent_code(self, intent: str) -> int:
+        code = self._intent_codes.get(intent)
+        if code is None:
+            code = len(self.intent_names)
+            self.intent_names.append(sys.intern(intent))
+            self._intent_codes[intent] = code
+        return code
+
+    @staticmethod
+    def _post(postings: Dict[str, array], words, entry_id: int):
+        for word in words:
+            posting = postings.get(word)
+            if posting is None:
+                posting = postings[sys.intern(word)] = array('I')
+            if posting and posting[-1] > entry_id:
+                insort(posting, entry_id)
+            else:
+                posting.append(entry_id)
+
+    @staticmethod
+    def _unpost(postings: Dict[str, array], words, entry_id: int):
+        for word in words:
+            posting = postings.get(word)
+            if posting is None:
+                continue
+            index = bisect_left(posting, entry_id)
+            if index < len(posting) and posting[index] == entry_id:
+                del posting[index]
+                if not posting:
+                    del postings[word]
+
+    def add(self, question: str, answer: str, keywords: List[str],
+            question_words, keyword_words, intent: str, flags: int) -> int:
+        """
+        Append an entry and return its id
+
+        Args:
+            question, answer, keywords: The entry as written in the training data
+            question_words, keyword_words: Cleaned word sets used for matching
+            intent: Precomputed intent of the question
+            flags: Precomputed keyword feature bits
+        """
+        entry_id = len(self.questions)
+
+        self.questions.append(sys.intern(question))
+        self.keywords.append(tuple(sys.intern(keyword) for keyword in keywords))
+        self.answer_ids.append(self.answers.add(answer))
+        self.question_sizes.append(len(question_words))
+        self.keyword_sizes.append(len(keyword_words))
+        self.intents.append(self._intent_code(intent))
+        self.flags.append(flags)
+
+        self._post(self.question_postings, question_words, entry_id)
+        self._post(self.keyword_postings, keyword_words, entry_id)
+
+        self.revision += 1
+        return entry_id
+
+    def update(self, entry_id: int, previous_words: Tuple[Set[str], Set[str]],
+               question: str, answer: str, keywords: List[str],
+               question_words, keyword_words, intent: str, flags: int):
+        """
+        Replace an entry in place, keeping its id
+
+        Args:
+            entry_id: Entry to replace
+            previous_words: (question_words, keyword_words) the entry was indexed with
+            The remaining arguments are as for add()
+        """
+        old_question_words, old_keyword_words = previous_words
+        self._unpost(self.question_postings, old_question_words - set(question_words), entry_id)
+        self._unpost(self.keyword_postings, old_keyword_words - set(keyword_words), entry_id)
+
+        self.questions[entry_id] = sys.intern(question)
+        self.keywords[entry_id] = tuple(sys.intern(keyword) for keyword in keywords)
+        self.answer_ids[entry_id] = self.answers.add(answer)
+        self.question_sizes[entry_id] = len(question_words)
+        self.keyword_sizes[entry_id] = len(keyword_words)
+        self.intents[entry_id] = self._intent_code(intent)
+        self.flags[entry_id] = flags
+
+        self._post(self.question_postings, set(question_words) - old_question_words, entry_id)
+        self._post(self.keyword_postings, set(keyword_words) - old_keyword_words, entry_id)
+        self.revision += 1
+
+    def remove(self, entry_id: int, question_words, keyword_words):
+        """Drop an entry from the posting lists and leave a tombstone"""
+        self._unpost(self.question_postings, question_words, entry_id)
+        self._unpost(self.keyword_postings, keyword_words, entry_id)
+        self.removed.add(entry_id)
+        self.revision += 1
+
+    def compact(self) -> List[Optional[int]]:
+        """
+        Renumber the live entries densely and drop unused answers
+
+        Returns:
+            Mapping from old entry id to new id (None for removed entries)
+        """
+        live = self.entry_ids()
+        mapping: List[Optional[int]] = [None] * len(self.questions)
+        for new_id, old_id in enumerate(live):
+            mapping[old_id] = new_id
+
+        self.questions = [self.questions[old_id] for old_id in live]
+        self.keywords = [self.keywords[old_id] for old_id in live]
+        for name in ('question_sizes', 'keyword_sizes', 'intents', 'flags'):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[old_id] for old_id in live)))
+
+        # Answers are read in id order, so each compressed block is decompressed once
+        used = {self.answer_ids[old_id] for old_id in live}
+        answers = AnswerStore(self.answers.block_size, self.answers.cache_size)
+        renumbered = {answer_id: answers.add(answer)
+                      for answer_id, answer in enumerate(self.answers) if answer_id in used}
+        self.answers = answers
+        self.answer_ids = array('I', (renumbered[self.answer_ids[old_id]] for old_id in live))
+
+        # Live ids only remain in the postings, and the mapping keeps them sorted
+        self.question_postings = {word: array('I', (mapping[old_id] for old_id in ids))
+                                  for word, ids in self.question_postings.items()}
+        self.keyword_postings = {word: array('I', (mapping[old_id] for old_id in ids))
+                                 for word, ids in self.keyword_postings.items()}
+
+        self.removed = set()
+        self.revision += 1
+        return mapping
+
+    def compacted(self) -> 'EntryStore':
+        """
+        A densely renumbered copy of the store
+
+        compact() only ever replaces containers, so the copy shares nothing
+        that is changed later and this store stays valid under its old ids.
+        """
+        store = copy.copy(self)
+        store.intent_names = list(self.intent_names)
+        store._intent_codes = dict(self._intent_codes)
+        store.compact()
+        return store
+
+    def copy(self) -> 'EntryStore':
+        """
+        A copy that can be edited without changing this store
+
+        add(), update() and remove() change containers in place, so every
+        mutable one is copied, posting lists included; the strings are shared.
+        """
+        store = copy.copy(self)
+        store.questions = list(self.questions)
+        store.keywords = list(self.keywords)
+        for name in ('answer_ids', 'question_sizes', 'keyword_sizes', 'intents', 'flags'):
+            column = getattr(self, name)
+            setattr(store, name, array(column.typecode, column))
+        store.answers = self.answers.copy()
+        store.intent_names = list(self.intent_names)
+        store._intent_codes = dict(self._intent_codes)
+        store.question_postings = {word: array('I', ids) for word, ids in self.question_postings.items()}
+        store.keyword_postings = {word: array('I', ids) for word, ids in self.keyword_postings.items()}
+        store.removed = set(self.removed)
+        return store
+
+    def answer(self, entry_id: int) -> str:
+        return self.answers.get(self.answer_ids[entry_id])
+
+    def intent(self, entry_id: int) -> str:
+        return self.intent_names[self.intents[entry_id]]
+
+    def entry(self, entry_id: int) -> Dict:
+        """Rebuild the training data dict of one entry"""
+        return {
+            'question': self.questions[entry_id],
+            'answer': self.answer(entry_id),
+            'keywords': list(self.keywords[entry_id])
+        }
+
+    def entries(self) -> 'EntryView':
+        """Read-only sequence of entry dicts, built on access"""
+        return EntryView(self)
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the store (containers and their contents)"""
+        total = self.answers.memory_usage()
+        for container in (self.questions, self.keywords, self.intent_names):
+            total += sys.getsizeof(container) + sum(sys.getsizeof(item) for item in container)
+        for keywords in self.keywords:
+            total += sum(sys.getsizeof(keyword) for keyword in keywords)
+        for column in (self.answer_ids, self.question_sizes, self.keyword_sizes, self.intents, self.flags):
+            total += sys.getsizeof(column)
+        for postings in (self.question_postings, self.keyword_postings):
+            total += sys.getsizeof(postings)
+            total += sum(sys.getsizeof(word) + sys.getsizeof(ids) for word, ids in postings.items())
+        return total
+
+
+class EntryView(Sequence):
+    """List-like view of an EntryStore for code that expects training data dicts"""
+
+    def __init__(self, store: EntryStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, index):
+        entry_ids = self.store.entry_ids()
+        if isinstance(index, slice):
+            return [self.store.entry(entry_id) for entry_id in entry_ids[index]]
+        return self.store.entry(entry_ids[index])
+
+    def __iter__(self) -> Iterator[Dict]:
+        for entry_id in self.store.entry_ids():
+            yield self.store.entry(entry_id)
@@ -4,40 +4,119 @@ Optimized for speed while maintaining intelligent understanding
 """
 
 import re
-from difflib import SequenceMatcher
-from typing import List, Dict, Tuple, Optional, Set
+import copy
+from typing import Iterable, List, Dict, Tuple, Optional, Set
+
+from entry_store import EntryStore, EntryView
+
+# Keyword bits precomputed per entry for the greeting and technology rules
+FLAG_AZURE = 1
+FLAG_DATABRICKS = 2
+FLAG_HIVE = 4
+FLAG_CLOUDERA = 8
+FLAG_GREETING = 16
+TECHNOLOGY_FLAGS = {'azure': FLAG_AZURE, 'databricks': FLAG_DATABRICKS,
+                    'hive': FLAG_HIVE, 'cloudera': FLAG_CLOUDERA}
+
+# Technology keywords of an entry rebuilt from its flags, for the penalty rule
+FLAG_KEYWORDS = [frozenset(word for word, bit in TECHNOLOGY_FLAGS.items() if flags & bit)
+                 for flags in range(32)]
 
 class FastSemanticMatcher:
-    def __init__(self, training_data: List[Dict]):
-        """Initialize the fast semantic matcher"""
-        self.training_data = training_data
+    def __init__(self, training_data: Iterable[Dict]):
+        """Initialize the fast semantic matcher (training_data may be any iterable, e.g. a stream)"""
         self.min_similarity_threshold = 0.25
+        self.store = EntryStore()
         
         # Pre-process training data for speed
-        self._preprocess_training_data()
-        
-    def _preprocess_training_data(self):
-        """Pre-process training data for faster matching"""
-        self.processed_entries = []
-        
-        for entry in self.training_data:
-            processed = {
-                'original': entry,
-                'question_clean': self.clean_text(entry['question']),
-                'question_words': set(self.clean_text(entry['question']).split()),
-                'keyword_words': set(),
-                'all_words': set()
-            }
-            
-            # Process keywords
-            for keyword in entry['keywords']:
-                keyword_clean = self.clean_text(keyword)
-                processed['keyword_words'].update(keyword_clean.split())
-            
-            # Combine all words for fast lookup
-            processed['all_words'] = processed['question_words'].union(processed['keyword_words'])
-            
-            self.processed_entries.append(processed)
+        self._preprocess_training_data(training_data)
+        
+    @classmethod
+    def from_store(cls, store) -> 'FastSemanticMatcher':
+        """Create a matcher over an already built store (e.g. a compiled artifact)"""
+        matcher = cls([])
+        matcher.store = store
+        return matcher
+    
+    def _preprocess_training_data(self, training_data: Iterable[Dict]):
+        """Pre-process training data into the compact entry store"""
+        for entry in training_data:
+            self._add_to_store(entry)
+    
+    def _features(self, question: str, keywords: List[str]):
+        """Cleaned word sets, intent and keyword flags of an entry"""
+        question_words = set(self.clean_text(question).split())
+        keyword_words = set()
+        for keyword in keywords:
+            keyword_words.update(self.clean_text(keyword).split())
+        
+        flags = 0
+        for word, bit in TECHNOLOGY_FLAGS.items():
+            if word in keyword_words:
+                flags |= bit
+        if 'hi' in keyword_words or 'hello' in keyword_words:
+            flags |= FLAG_GREETING
+        
+        return question_words, keyword_words, self.classify_intent_fast(list(question_words)), flags
+    
+    def _add_to_store(self, entry: Dict) -> int:
+        """Compute the matching features of an entry and store it"""
+        return self.store.add(
+            entry['question'], entry['answer'], entry['keywords'],
+            *self._features(entry['question'], entry['keywords'])
+        )
+    
+    def _writable_store(self) -> EntryStore:
+        """The entry store, copied out of a read-only artifact on first change
+        (its arrays and posting lists are copied, not rebuilt)"""
+        if not isinstance(self.store, EntryStore):
+            self.store = self.store.copy()
+        return self.store
+    
+    def _indexed_words(self, entry_id: int) -> Tuple[Set[str], Set[str]]:
+        """Word sets an existing entry is currently indexed under"""
+        if not self.store.is_live(entry_id):
+            raise KeyError(f"No entry with id {entry_id}")
+        question_words, keyword_words, _, _ = self._features(
+            self.store.questions[entry_id], self.store.keywords[entry_id])
+        return question_words, keyword_words
+    
+    def add_entry(self, question: str, answer: str, keywords: List[str]) -> int:
+        """Add an entry to the index and return its id"""
+        self._writable_store()
+        return self._add_to_store({'question': question, 'answer': answer, 'keywords': list(keywords)})
+    
+    def update_entry(self, entry_id: int, question: str, answer: str, keywords: List[str]):
+        """Replace an entry in place; only the words that changed are re-indexed"""
+        store = self._writable_store()
+        store.update(entry_id, self._indexed_words(entry_id), question, answer, list(keywords),
+                     *self._features(question, keywords))
+    
+    def remove_entry(self, entry_id: int):
+        """Remove an entry from the index"""
+        store = self._writable_store()
+        store.remove(entry_id, *self._indexed_words(entry_id))
+    
+    def edited(self) -> 'FastSemanticMatcher':
+        """A copy to apply edits to; this one is left as it was for requests
+        still using it (an artifact store is shared until the first edit)"""
+        matcher = copy.copy(self)
+        if isinstance(self.store, EntryStore):
+            matcher.store = self.store.copy()
+        return matcher
+    
+    def compacted(self) -> 'FastSemanticMatcher':
+        """A matcher with the entries renumbered densely after removals (ids
+        change); this one is left as it was for requests still using it"""
+        if not isinstance(self.store, EntryStore):
+            return self
+        matcher = self.from_store(self.store.compacted())
+        matcher.min_similarity_threshold = self.min_similarity_threshold
+        return matcher
+    
+    def entries(self) -> EntryView:
+        """Training entries as a read-only sequence of dicts"""
+        return self.store.entries()
     
     def clean_text(self, text: str) -> str:
         """Fast text cleaning"""
@@ -112,8 +191,15 @@ class FastSemanticMatcher:
                 
         return penalty
 
-    def find_best_match(self, user_query: str) -> Optional[Dict]:
-        """Fast matching with semantic understanding and technology specificity"""
+    def _score_best(self, user_query: str,
+                    threshold: Optional[float] = None) -> Optional[Tuple[int, float, Tuple[float, float, float], str]]:
+        """
+        Best-scoring entry at or above the threshold (default: min_similarity_threshold)
+
+        Returns:
+            (entry id, score, (question similarity, keyword score,
+            technology penalty), query intent), or None
+        """
         query_clean = self.clean_text(user_query)
         query_words = query_clean.split()
         query_word_set = set(query_words)
@@ -126,65 +212,103 @@ class FastSemanticMatcher:
         
         # Detect specific technologies in query
         query_technologies = self.detect_specific_technologies(query_words)
+        hi_variation = any(variation in user_query.lower() for variation in ['hi', 'hii', 'hiii'])
+        
+        # Count question and keyword word overlaps through the posting lists;
+        # entries without any overlap are never touched
+        store = self.store
+        question_hits = {}
+        keyword_hits = {}
+        for word in query_word_set:
+            for entry_id in store.question_postings.get(word, ()):
+                question_hits[entry_id] = question_hits.get(entry_id, 0) + 1
+            for entry_id in store.keyword_postings.get(word, ()):
+                keyword_hits[entry_id] = keyword_hits.get(entry_id, 0) + 1
         
-        best_match = None
+        query_size = len(query_word_set)
+        best_id = None
         best_score = 0.0
+        best_details = None
         
-        for processed in self.processed_entries:
-            # Fast word overlap check first (eliminates most non-matches quickly)
-            word_overlap = len(query_word_set.intersection(processed['all_words']))
-            if word_overlap == 0:
-                continue  # Skip if no word overlap
-            
-            # Calculate similarities only for potential matches
-            question_similarity = self.fast_similarity(query_clean, processed['question_clean'])
+        # Ascending ids keep the first-best-wins order of a full scan
+        for entry_id in sorted(question_hits.keys() | keyword_hits.keys()):
+            # Word overlap similarity with the question
+            question_overlap = question_hits.get(entry_id, 0)
+            question_size = store.question_sizes[entry_id]
+            question_similarity = question_overlap / (query_size + question_size - question_overlap)
             
             # Fast keyword scoring
-            keyword_overlap = len(query_word_set.intersection(processed['keyword_words']))
-            keyword_score = keyword_overlap / max(len(query_word_set), len(processed['keyword_words'])) if processed['keyword_words'] else 0
+            keyword_size = store.keyword_sizes[entry_id]
+            keyword_score = keyword_hits.get(entry_id, 0) / max(query_size, keyword_size) if keyword_size else 0
             
             # Intent bonus (fast)
-            entry_intent = self.classify_intent_fast(list(processed['question_words']))
+            entry_intent = store.intent(entry_id)
             intent_bonus = 0.2 if query_intent == entry_intent else 0
             
+            flags = store.flags[entry_id]
+            
             # Special greeting handling
             if query_intent == 'greeting' and entry_intent == 'greeting':
                 intent_bonus = 0.4
                 
                 # Special handling for "hi" variations
-                if any(variation in user_query.lower() for variation in ['hi', 'hii', 'hiii']):
-                    if 'hi' in processed['keyword_words'] or 'hello' in processed['keyword_words']:
-                        intent_bonus = 0.6
+                if hi_variation and flags & FLAG_GREETING:
+                    intent_bonus = 0.6
             
             # Technology-specific matching
-            technology_penalty = self.calculate_technology_match_penalty(query_technologies, processed['keyword_words'])
+            technology_penalty = 0.0
+            if query_technologies:
+                technology_penalty = self.calculate_technology_match_penalty(query_technologies, FLAG_KEYWORDS[flags & 15])
             
             # Combined score with technology penalty
             combined_score = (question_similarity * 0.4) + (keyword_score * 0.4) + intent_bonus - technology_penalty
             
             if combined_score > best_score:
                 best_score = combined_score
-                best_match = {
-                    'entry': processed['original'],
-                    'score': combined_score,
-                    'question_similarity': question_similarity,
-                    'keyword_score': keyword_score,
-                    'intent': query_intent,
-                    'technology_penalty': technology_penalty
-                }
+                best_id = entry_id
+                best_details = (question_similarity, keyword_score, technology_penalty)
         
         # Return match if it meets threshold
-        if best_match and best_match['score'] >= self.min_similarity_threshold:
-            return best_match
+        if threshold is None:
+            threshold = self.min_similarity_threshold
+        if best_id is not None and best_score >= threshold:
+            return best_id, best_score, best_details, query_intent
         
         return None
     
+    def find_best_match(self, user_query: str) -> Optional[Dict]:
+        """Fast matching with semantic understanding and technology specificity"""
+        best = self._score_best(user_query)
+        if best is None:
+            return None
+        
+        entry_id, score, (question_similarity, keyword_score, technology_penalty), query_intent = best
+        return {
+            'entry': self.store.entry(entry_id),
+            'entry_id': entry_id,
+            'score': score,
+            'question_similarity': question_similarity,
+            'keyword_score': keyword_score,
+            'intent': query_intent,
+            'technology_penalty': technology_penalty
+        }
+    
+    def best_entry_id(self, user_query: str) -> Optional[int]:
+        """Id of the matching entry, without building the entry itself (None: fallback)"""
+        best = self._score_best(user_query)
+        return best[0] if best is not None else None
+    
+    def nearest_entry(self, user_query: str) -> Optional[Tuple[int, float]]:
+        """Best-scoring entry id and score, even below the threshold (None: nothing in common)"""
+        best = self._score_best(user_query, threshold=0.0)
+        return (best[0], best[1]) if best is not None else None
+    
     def get_response(self, user_query: str) -> Tuple[str, bool]:
         """Get response quickly"""
-        match = self.find_best_match(user_query)
+        entry_id = self.best_entry_id(user_query)
         
-        if match:
-            return match['entry']['answer'], True
+        if entry_id is not None:
+            return self.store.answer(entry_id), True
         else:
             return self.get_fallback_response(), False
     
@@ -208,4 +332,8 @@ class QueryMatcher:
         return self.matcher.get_response(user_query)
         
     def get_match_info(self, user_query: str) -> Optional[Dict]:
-        return self.matcher.get_match_info(user_query)
\ No newline at end of file
+        return self.matcher.get_match_info(user_query)
+    
+    def add_training_entry(self, question: str, answer: str, keywords: List[str]):
+        """Add new training entry"""
+        self.matcher.add_entry(question, answer, keywords)
\ No newline at end of file
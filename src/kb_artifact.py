@@ -0,0 +1,405 @@
+"""
+Compiled Knowledge-Base Artifact
+Serializes a matcher's entry store into one versioned, checksummed binary
+file that can be memory-mapped at startup instead of parsing JSON
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from answer_store import MappedAnswers
+from entry_store import EntryStore, EntryView
+
+MAGIC = b'PBIKB\x00'
+FORMAT_VERSION = 2
+
+# Section order is part of the format
+SECTIONS = [
+    'vocab_offsets', 'vocab',
+    'question_posting_offsets', 'question_postings',
+    'keyword_posting_offsets', 'keyword_postings',
+    'question_sizes', 'keyword_sizes', 'intents', 'flags', 'answer_ids',
+    'intent_names',
+    'question_offsets', 'questions',
+    'keyword_offsets', 'keywords',
+    'answer_block_offsets', 'answer_blocks', 'answer_locations',
+]
+
+# magic, format version, byte order, entry count, vocabulary size, answer count, payload checksum
+_HEADER = struct.Struct('<6sHBxIII32s')
+_SECTION = struct.Struct('<QQ')
+_HEADER_SIZE = _HEADER.size + _SECTION.size * len(SECTIONS)
+
+# Separates the keywords of one entry inside the keywords blob
+_KEYWORD_SEPARATOR = '\x1f'
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact is missing, corrupt or from another format version"""
+
+
+def _array_bytes(typecode: str, values) -> bytes:
+    return array(typecode, values).tobytes()
+
+
+def _blob(strings: List[str], offset_typecode: str = 'Q'):
+    """Concatenated UTF-8 strings plus an offset table with one extra end offset"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = [0]
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    return _array_bytes(offset_typecode, offsets), b''.join(encoded)
+
+
+def build_artifact(store, output_path: str) -> str:
+    """
+    Write an entry store to a compiled artifact file
+
+    Args:
+        store: EntryStore (or anything with the same attributes)
+        output_path: Where to write the artifact
+
+    Returns:
+        Hex checksum of the payload, which doubles as the artifact version
+    """
+    if sys.byteorder != 'little':
+        raise ArtifactError("Artifacts are written in little-endian order only")
+    if getattr(store, 'removed', None):
+        raise ArtifactError("Store has removed entries; compact() it before building")
+
+    words = sorted(set(store.question_postings) | set(store.keyword_postings), key=lambda w: w.encode('utf-8'))
+
+    question_offsets, keyword_offsets = [0], [0]
+    question_ids, keyword_ids = [], []
+    for word in words:
+        question_ids.extend(store.question_postings.get(word, ()))
+        question_offsets.append(len(question_ids))
+        keyword_ids.extend(store.keyword_postings.get(word, ()))
+        keyword_offsets.append(len(keyword_ids))
+
+    sections = {}
+    sections['vocab_offsets'], sections['vocab'] = _blob(words)
+    sections['question_posting_offsets'] = _array_bytes('Q', question_offsets)
+    sections['question_postings'] = _array_bytes('I', question_ids)
+    sections['keyword_posting_offsets'] = _array_bytes('Q', keyword_offsets)
+    sections['keyword_postings'] = _array_bytes('I', keyword_ids)
+    sections['question_sizes'] = _array_bytes('H', store.question_sizes)
+    sections['keyword_sizes'] = _array_bytes('H', store.keyword_sizes)
+    sections['intents'] = _array_bytes('B', store.intents)
+    sections['flags'] = _array_bytes('B', store.flags)
+    sections['answer_ids'] = _array_bytes('I', store.answer_ids)
+    sections['intent_names'] = json.dumps(list(store.intent_names)).encode('utf-8')
+    sections['question_offsets'], sections['questions'] = _blob(store.questions)
+    sections['keyword_offsets'], sections['keywords'] = _blob(
+        [_KEYWORD_SEPARATOR.join(keywords) for keywords in store.keywords])
+    # Answers stay zlib-compressed in the artifact and are inflated on demand
+    (sections['answer_block_offsets'], sections['answer_blocks'],
+     sections['answer_locations']) = store.answers.serialize()
+
+    # Lay sections out on 8-byte boundaries so typed views stay aligned
+    table = []
+    payload = bytearray()
+    for name in SECTIONS:
+        payload.extend(b'\x00' * (-(_HEADER_SIZE + len(payload)) % 8))
+        table.append((_HEADER_SIZE + len(payload), len(sections[name])))
+        payload.extend(sections[name])
+
+    checksum = hashlib.sha256(payload).digest()
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 1, len(store), len(words), len(store.answers), checksum)
+    header += b''.join(_SECTION.pack(offset, length) for offset, length in table)
+
+    # Write next to the target and rename so readers never see a partial file
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(temp_path, output_path)
+
+    return checksum.hex()
+
+
+class MappedPostings:
+    """Read-only word -> entry ids mapping backed by the artifact"""
+
+    def __init__(self, artifact: 'MappedEntryStore', offsets: memoryview, ids: memoryview):
+        self.artifact = artifact
+        self.offsets = offsets
+        self.ids = ids
+
+    def get(self, word: str, default=()):
+        index = self.artifact.word_index(word)
+        if index is None:
+            return default
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.ids[start:end] if end > start else default
+
+    def __contains__(self, word: str) -> bool:
+        return len(self.get(word)) > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self.artifact.vocab_size):
+            if self.offsets[index + 1] > self.offsets[index]:
+                yield self.artifact.word(index)
+
+    def items(self):
+        for word in self:
+            yield word, self.get(word)
+
+
+class MappedEntryStore:
+    def __init__(self, path: str, verify: bool = False):
+        """
+        Memory-map a compiled artifact and expose it like an EntryStore
+
+        Nothing is decoded up front: lookups binary-search the vocabulary and
+        slice typed views of the mapping, so opening is constant time and the
+        pages are shared by every process that maps the same file.
+
+        Args:
+            path: Artifact file
+            verify: Check the payload checksum (reads the whole file)
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ArtifactError(f"Empty artifact file: {path}")
+
+        if len(self._mmap) < _HEADER_SIZE:
+            self.close()
+            raise ArtifactError(f"Truncated artifact: {path}")
+
+        magic, version, byte_order, entry_count, vocab_size, answer_count, checksum = \
+            _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ArtifactError(f"Not a knowledge-base artifact: {path}")
+        if version != FORMAT_VERSION or byte_order != 1:
+            self.close()
+            raise ArtifactError(f"Unsupported artifact format {version}: {path} (rebuild it)")
+
+        self.entry_count = entry_count
+        self.vocab_size = vocab_size
+        self.answer_count = answer_count
+        self.checksum = checksum.hex()
+
+        self._view = memoryview(self._mmap)
+        self._views: List[memoryview] = []
+        self._sections: Dict[str, memoryview] = {}
+        for index, name in enumerate(SECTIONS):
+            offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + index * _SECTION.size)
+            if offset + length > len(self._mmap):
+                self.close()
+                raise ArtifactError(f"Truncated artifact: {path}")
+            self._sections[name] = self._typed(self._view[offset:offset + length])
+
+        if verify and not self.verify():
+            self.close()
+            raise ArtifactError(f"Checksum mismatch: {path}")
+
+        section = self._sections
+        self._vocab_offsets = self._typed(section['vocab_offsets'], 'Q')
+        self._vocab = section['vocab']
+        self.question_postings = MappedPostings(self, self._typed(section['question_posting_offsets'], 'Q'),
+                                                self._typed(section['question_postings'], 'I'))
+        self.keyword_postings = MappedPostings(self, self._typed(section['keyword_posting_offsets'], 'Q'),
+                                               self._typed(section['keyword_postings'], 'I'))
+        self.question_sizes = self._typed(section['question_sizes'], 'H')
+        self.keyword_sizes = self._typed(section['keyword_sizes'], 'H')
+        self.intents = self._typed(section['intents'], 'B')
+        self.flags = self._typed(section['flags'], 'B')
+        self.answer_ids = self._typed(section['answer_ids'], 'I')
+        self.intent_names = json.loads(bytes(section['intent_names']).decode('utf-8'))
+        self._question_offsets = self._typed(section['question_offsets'], 'Q')
+        self._keyword_offsets = self._typed(section['keyword_offsets'], 'Q')
+        self.answers = MappedAnswers(self._typed(section['answer_block_offsets'], 'Q'), section['answer_blocks'],
+                                     self._typed(section['answer_locations'], 'I'))
+
+    def _typed(self, view: memoryview, typecode: Optional[str] = None) -> memoryview:
+        """Typed view of a section, remembered so close() can release it"""
+        if typecode:
+            view = view.cast(typecode)
+        self._views.append(view)
+        return view
+
+    @property
+    def version(self) -> str:
+        return self.checksum[:16]
+
+    def verify(self) -> bool:
+        """Recompute the payload checksum"""
+        return hashlib.sha256(self._view[_HEADER_SIZE:]).hexdigest() == self.checksum
+
+    def close(self):
+        """Release the mapping; slices handed out earlier keep it alive until dropped"""
+        for view in reversed(getattr(self, '_views', [])):
+            view.release()
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+        try:
+            self._mmap.close()
+        except (AttributeError, BufferError):
+            pass
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    def entry_ids(self) -> range:
+        return range(self.entry_count)
+
+    def is_live(self, entry_id: int) -> bool:
+        return 0 <= entry_id < self.entry_count
+
+    @staticmethod
+    def _string(offsets: memoryview, blob: memoryview, index: int) -> str:
+        return bytes(blob[offsets[index]:offsets[index + 1]]).decode('utf-8')
+
+    def word(self, index: int) -> str:
+        return self._string(self._vocab_offsets, self._vocab, index)
+
+    def word_index(self, word: str) -> Optional[int]:
+        """Binary search of the sorted vocabulary"""
+        target = word.encode('utf-8')
+        offsets, vocab = self._vocab_offsets, self._vocab
+        low, high = 0, self.vocab_size
+        while low < high:
+            middle = (low + high) // 2
+            candidate = vocab[offsets[middle]:offsets[middle + 1]].tobytes()
+            if candidate < target:
+                low = middle + 1
+            elif candidate > target:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def question(self, entry_id: int) -> str:
+        return self._string(self._question_offsets, self._sections['questions'], entry_id)
+
+    def keywords_of(self, entry_id: int) -> List[str]:
+        joined = self._string(self._keyword_offsets, self._sections['keywords'], entry_id)
+        return joined.split(_KEYWORD_SEPARATOR) if joined else []
+
+    def answer(self, entry_id: int) -> str:
+        return self.answers.get(self.answer_ids[entry_id])
+
+    def intent(self, entry_id: int) -> str:
+        return self.intent_names[self.intents[entry_id]]
+
+    def entry(self, entry_id: int) -> Dict:
+        return {
+            'question': self.question(entry_id),
+            'answer': self.answer(entry_id),
+            'keywords': self.keywords_of(entry_id)
+        }
+
+    def entries(self) -> EntryView:
+        return EntryView(self)
+
+    def copy(self) -> EntryStore:
+        """
+        A writable in-memory EntryStore with the same entries and ids
+
+        The arrays, posting lists and compressed answer blocks are copied as
+        they are, so no entry is cleaned or tokenized again.
+        """
+        store = EntryStore()
+        store.questions = [sys.intern(self.question(entry_id)) for entry_id in range(self.entry_count)]
+        store.keywords = [tuple(sys.intern(keyword) for keyword in self.keywords_of(entry_id))
+                          for entry_id in range(self.entry_count)]
+        for name in ('answer_ids', 'question_sizes', 'keyword_sizes', 'intents', 'flags'):
+            getattr(store, name).frombytes(getattr(self, name).tobytes())
+        store.answers = self.answers.copy()
+        store.intent_names = [sys.intern(name) for name in self.intent_names]
+        store._intent_codes = {name: code for code, name in enumerate(store.intent_names)}
+
+        for postings, mapped in ((store.question_postings, self.question_postings),
+                                 (store.keyword_postings, self.keyword_postings)):
+            offsets, ids = mapped.offsets, mapped.ids
+            for index in range(self.vocab_size):
+                start, end = offsets[index], offsets[index + 1]
+                if end > start:
+                    posting = postings[sys.intern(self.word(index))] = array('I')
+                    posting.frombytes(ids[start:end].tobytes())
+        return store
+
+    def memory_usage(self) -> int:
+        """Bytes mapped from the artifact (shared between processes)"""
+        return len(self._mmap)
+
+
+def artifact_path_for(data_file: str) -> str:
+    """Default artifact location for a training data file"""
+    return os.path.splitext(data_file)[0] + '.kb'
+
+
+def is_fresh(artifact_path: str, data_file: str) -> bool:
+    """True if the artifact exists and is not older than its source data"""
+    try:
+        artifact_mtime = os.path.getmtime(artifact_path)
+    except OSError:
+        return False
+    try:
+        return artifact_mtime >= os.path.getmtime(data_file)
+    except OSError:
+        return True
+
+
+def main():
+    import argparse
+    import time
+
+    default_data = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'training_data.json')
+
+    parser = argparse.ArgumentParser(description='Compile or inspect knowledge-base artifacts')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Compile training data into an artifact')
+    build_parser.add_argument('--data', default=default_data, help='Training data file (.json, .jsonl, .csv, .py)')
+    build_parser.add_argument('--output', help='Artifact path (default: next to the data file)')
+
+    for command in ('verify', 'info'):
+        sub = subparsers.add_parser(command, help=f'{command.capitalize()} an artifact')
+        sub.add_argument('artifact', nargs='?', default=artifact_path_for(default_data))
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from fast_semantic_matcher import FastSemanticMatcher
+        from kb_loader import iter_entries
+
+        start = time.perf_counter()
+        matcher = FastSemanticMatcher(iter_entries(args.data))
+        output = args.output or artifact_path_for(args.data)
+        checksum = build_artifact(matcher.store, output)
+        print(f"✅ Compiled {len(matcher.store)} entries into {output}")
+        print(f"   Version: {checksum[:16]}")
+        print(f"   Size: {os.path.getsize(output)} bytes, built in {time.perf_counter() - start:.2f}s")
+        return
+
+    try:
+        store = MappedEntryStore(args.artifact, verify=args.command == 'verify')
+    except (OSError, ArtifactError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"📦 {args.artifact}")
+    print(f"   Format version: {FORMAT_VERSION}")
+    print(f"   Version: {store.version}")
+    print(f"   Entries: {len(store)}  Vocabulary: {store.vocab_size}  Answers: {store.answer_count}")
+    if args.command == 'verify':
+        print("   Checksum: OK")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Append-Only Change Log for the Knowledge Base
+Records entry additions, updates and removals made at runtime so they
+survive restarts, and folds them back into the training data file when the
+log grows long enough
+"""
+
+import os
+import json
+from typing import Dict, List, Optional
+
+from kb_loader import can_write, write_entries
+
+# Records after which the log is folded into the training data file
+COMPACT_AFTER = 500
+
+
+def changelog_path_for(data_file: str) -> str:
+    """Default change log location for a training data file"""
+    return os.path.splitext(data_file)[0] + '.changes.jsonl'
+
+
+def _base_stamp(data_file: str) -> Optional[Dict]:
+    """Identifies the exact data file the logged entry ids refer to"""
+    try:
+        stat = os.stat(data_file)
+    except OSError:
+        return None
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class ChangeLog:
+    def __init__(self, path: str, data_file: str, compact_after: int = COMPACT_AFTER):
+        """
+        Change log for one training data file
+
+        The first line stamps the data file the log applies to; every other
+        line is one change ({"op": "add" | "update" | "remove", "id", "entry"}).
+        Entry ids are those of the matcher built from that file, so a log whose
+        stamp no longer matches (the file was rewritten) is not replayed.
+        Data files that cannot be written back (.csv, .py) are never
+        compacted; their log keeps every change.
+
+        Args:
+            path: Log file (JSON Lines)
+            data_file: Training data file the changes apply to
+            compact_after: Number of records that makes needs_compaction true
+        """
+        self.path = path
+        self.data_file = data_file
+        self.compact_after = compact_after
+        self.compactable = can_write(data_file)
+        self.records = 0
+
+    def __len__(self) -> int:
+        return self.records
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.compactable and self.records >= self.compact_after
+
+    def _read(self) -> List[Dict]:
+        """Logged changes for the current data file, dropping a torn last line"""
+        try:
+            with open(self.path, 'rb') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+
+        records = []
+        valid_bytes = 0
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Only the last write can be incomplete (crash mid-append)
+                print(f"⚠️  Truncating incomplete change log record in {self.path}")
+                with open(self.path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+                break
+            records.append(record)
+            valid_bytes += len(line)
+
+        stamp = _base_stamp(self.data_file)
+        if not records or stamp is None:
+            return []
+        if records[0].get('base') != stamp:
+            print(f"⚠️  Ignoring change log written for a different version of {self.data_file}")
+            self._reset()
+            return []
+        return records[1:]
+
+    def _reset(self):
+        """Start an empty log stamped with the current data file"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'base': _base_stamp(self.data_file)}) + '\n')
+        os.replace(temp_path, self.path)
+        self.records = 0
+
+    def replay(self, matcher) -> int:
+        """Apply the logged changes to a matcher built from the data file"""
+        records = self._read()
+        for record in records:
+            op, entry_id, entry = record['op'], record['id'], record.get('entry')
+            if op == 'add':
+                matcher.add_entry(entry['question'], entry['answer'], entry['keywords'])
+            elif op == 'update':
+                matcher.update_entry(entry_id, entry['question'], entry['answer'], entry['keywords'])
+            elif op == 'remove':
+                matcher.remove_entry(entry_id)
+        self.records = len(records)
+        return self.records
+
+    def append(self, op: str, entry_id: int, entry: Optional[Dict] = None):
+        """Durably record one change"""
+        if not os.path.exists(self.path):
+            self._reset()
+        record = {'op': op, 'id': entry_id}
+        if entry is not None:
+            record['entry'] = entry
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += 1
+
+    def compact(self, matcher) -> int:
+        """
+        Fold the changes into the data file and start an empty log
+
+        The file lists the live entries densely, so the caller must serve a
+        compacted matcher (matcher.compacted()) for entry ids to match it.
+        Returns the number of entries written.
+        """
+        count = write_entries(self.data_file, matcher.entries())
+        self._reset()
+        return count
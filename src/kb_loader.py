@@ -0,0 +1,229 @@
+"""
+Streaming Training-Data Loader
+Yields entries one record at a time from JSON Lines, JSON arrays, CSV or
+Python modules, so the index can be built without materializing the list
+"""
+
+import os
+import csv
+import json
+import importlib.util
+from typing import Dict, Iterable, Iterator, Optional
+
+# Bytes read per step when streaming a JSON array
+JSON_CHUNK_SIZE = 1 << 16
+
+FORMATS = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.json': 'json',
+    '.csv': 'csv',
+    '.py': 'python',
+}
+
+# Formats write_entries can produce
+WRITABLE_FORMATS = ('json', 'jsonl')
+
+
+class LoaderError(ValueError):
+    """Raised when a training data file cannot be parsed"""
+
+
+def _normalize(record, location: str) -> Dict:
+    """Check a raw record and return it in training data form"""
+    if not isinstance(record, dict):
+        raise LoaderError(f"{location}: expected an object, got {type(record).__name__}")
+
+    question = record.get('question')
+    answer = record.get('answer')
+    if not isinstance(question, str) or not isinstance(answer, str):
+        raise LoaderError(f"{location}: 'question' and 'answer' must be strings")
+
+    keywords = record.get('keywords') or []
+    if isinstance(keywords, str):
+        keywords = _split_keywords(keywords)
+
+    return {'question': question, 'answer': answer, 'keywords': [str(k) for k in keywords]}
+
+
+def _split_keywords(value: str):
+    """Keywords from a CSV cell: a JSON list, or ';' / '|' separated terms"""
+    value = value.strip()
+    if value.startswith('['):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    separator = ';' if ';' in value else '|'
+    return [keyword.strip() for keyword in value.split(separator) if keyword.strip()]
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise LoaderError(f"{path}:{line_number}: {e}") from None
+            yield _normalize(record, f"{path}:{line_number}")
+
+
+def iter_json_array(path: str, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Stream the elements of a top-level JSON array
+
+    Only the current element and one read chunk are held in memory, so
+    arbitrarily large exports can be loaded.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        position = 0
+        index = 0
+
+        def fill():
+            nonlocal buffer, position
+            chunk = f.read(chunk_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            return bool(chunk)
+
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n':
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return
+
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] != '[':
+            raise LoaderError(f"{path}: expected a JSON array")
+        position += 1
+
+        while True:
+            skip_whitespace()
+            if position >= len(buffer):
+                raise LoaderError(f"{path}: unexpected end of file")
+            if buffer[position] == ']':
+                return
+            if index > 0:
+                if buffer[position] != ',':
+                    raise LoaderError(f"{path}: expected ',' after element {index - 1}")
+                position += 1
+                skip_whitespace()
+
+            # Decode one element, reading more until it is complete
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                    break
+                except json.JSONDecodeError as e:
+                    if not fill():
+                        raise LoaderError(f"{path}: element {index}: {e}") from None
+
+            position = end
+            yield _normalize(record, f"{path}: element {index}")
+            index += 1
+
+
+def iter_csv(path: str) -> Iterator[Dict]:
+    """CSV with question, answer and keywords columns"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        missing = {'question', 'answer'} - set(reader.fieldnames or [])
+        if missing:
+            raise LoaderError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+        for row_number, row in enumerate(reader, 2):
+            yield _normalize(row, f"{path}:{row_number}")
+
+
+def iter_python_module(path: str, attribute: str = 'training_data') -> Iterator[Dict]:
+    """Entries from a list defined in a Python module (e.g. data/training_data.py)"""
+    name = '_kb_' + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise LoaderError(f"{path}: not a Python module")
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except SyntaxError as e:
+        raise LoaderError(f"{path}:{e.lineno}: {e.msg}") from None
+
+    records = getattr(module, attribute, None)
+    if records is None:
+        raise LoaderError(f"{path}: no '{attribute}' defined")
+    for index, record in enumerate(records):
+        yield _normalize(record, f"{path}: {attribute}[{index}]")
+
+
+def iter_entries(path: str, data_format: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Stream training entries from a file
+
+    Args:
+        path: Training data file
+        data_format: 'jsonl', 'json', 'csv' or 'python'; guessed from the
+            file extension when omitted
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        LoaderError: If the file is malformed (raised when the bad record is reached)
+    """
+    if data_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        data_format = FORMATS.get(extension)
+        if data_format is None:
+            raise LoaderError(f"{path}: unknown training data format '{extension}'")
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    if data_format == 'jsonl':
+        return iter_jsonl(path)
+    if data_format == 'json':
+        return iter_json_array(path)
+    if data_format == 'csv':
+        return iter_csv(path)
+    if data_format == 'python':
+        return iter_python_module(path)
+    raise LoaderError(f"Unknown training data format: {data_format}")
+
+
+def can_write(path: str) -> bool:
+    """Whether write_entries supports this file's format"""
+    return FORMATS.get(os.path.splitext(path)[1].lower()) in WRITABLE_FORMATS
+
+
+def write_entries(path: str, entries: Iterable[Dict]) -> int:
+    """
+    Write entries to a .json or .jsonl file, replacing it atomically
+
+    Entries are written one at a time, so a generator never has to be
+    materialized. Returns the number of entries written.
+    """
+    data_format = FORMATS.get(os.path.splitext(path)[1].lower())
+    if data_format not in WRITABLE_FORMATS:
+        raise LoaderError(f"{path}: can only write .json or .jsonl training data")
+
+    count = 0
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        if data_format == 'json':
+            f.write('[')
+        for entry in entries:
+            record = {'question': entry['question'], 'answer': entry['answer'], 'keywords': list(entry['keywords'])}
+            if data_format == 'json':
+                # Same layout as json.dump(..., indent=2) so diffs stay readable
+                text = json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+                f.write((',\n  ' if count else '\n  ') + text)
+            else:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+        if data_format == 'json':
+            f.write('\n]\n')
+    os.replace(temp_path, path)
+    return count
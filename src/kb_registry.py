@@ -0,0 +1,278 @@
+"""
+Registry of Named Knowledge Bases
+Lets one server host many tenant knowledge bases. Each one is loaded on
+first use and the least recently used are unloaded when the loaded indexes
+exceed a memory budget.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from chatbot import EnhancedChatbot, DATA_FILE
+from kb_loader import FORMATS
+from warmup import WARMUP_BUDGET, warm_up
+
+KB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'kbs')
+
+DEFAULT_KB = 'default'
+
+# Default budget for loaded indexes
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class UnknownKnowledgeBase(KeyError):
+    """Raised when a request names a knowledge base that does not exist"""
+
+
+class KnowledgeBaseRegistry:
+    def __init__(self, kb_dir: str = KB_DIR, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 default_data_file: str = DATA_FILE, watch: bool = False, cache_size: int = 1024,
+                 result_cache=None, warmup_files: Optional[List[str]] = None, warmup_budget: float = WARMUP_BUDGET,
+                 conversation_log=None, sessions=None):
+        """
+        Initialize the registry
+
+        Args:
+            kb_dir: Directory holding one data file per tenant (<name>.json,
+                .jsonl, .csv or .py); the name is the file name without extension
+            memory_budget: Bytes of loaded indexes kept before evicting
+                (the default knowledge base is never evicted)
+            default_data_file: Data file of the 'default' knowledge base
+            watch: Reload loaded knowledge bases when their files change
+            cache_size: Response cache size of each knowledge base
+            result_cache: PersistentResultCache shared by every knowledge base
+                (rows are keyed by knowledge-base version)
+            warmup_files: Recorded queries (conversation logs or one query
+                per line) whose most frequent are matched by prepare();
+                defaults to the files of conversation_log
+            warmup_budget: Seconds prepare() may spend warming up
+            conversation_log: ConversationLogger shared by every knowledge
+                base (records carry the knowledge-base name)
+            sessions: SessionStore of the chat users, so follow-ups can be
+                matched with their previous question
+        """
+        self.kb_dir = kb_dir
+        self.memory_budget = memory_budget
+        self.default_data_file = default_data_file
+        self.watch = watch
+        self.cache_size = cache_size
+        self.result_cache = result_cache
+        self.warmup_files = list(warmup_files or [])
+        self.warmup_budget = warmup_budget
+        self.conversation_log = conversation_log
+        self.sessions = sessions
+        self.evictions = 0
+
+        # Loaded chatbots, least recently used first
+        self._loaded: 'OrderedDict[str, EnhancedChatbot]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        # Errors of failed background loads and results of warm-ups, for /readyz
+        self.load_errors: Dict[str, str] = {}
+        self.warmups: Dict[str, Dict] = {}
+        self._preparing: Set[str] = set()
+
+    def data_file(self, name: str) -> str:
+        """Data file of a knowledge base; raises UnknownKnowledgeBase if there is none"""
+        if name == DEFAULT_KB:
+            return self.default_data_file
+        if not _NAME_PATTERN.match(name):
+            raise UnknownKnowledgeBase(name)
+        for extension in FORMATS:
+            path = os.path.join(self.kb_dir, name + extension)
+            if os.path.isfile(path):
+                return path
+        raise UnknownKnowledgeBase(name)
+
+    def names(self) -> List[str]:
+        """All knowledge bases that can be served"""
+        names = {DEFAULT_KB}
+        try:
+            for file_name in os.listdir(self.kb_dir):
+                name, extension = os.path.splitext(file_name)
+                if extension.lower() in FORMATS and _NAME_PATTERN.match(name):
+                    names.add(name)
+        except FileNotFoundError:
+            pass
+        return sorted(names)
+
+    def get(self, name: Optional[str] = None) -> EnhancedChatbot:
+        """
+        The chatbot for a knowledge base, loading it on first use
+
+        Concurrent requests for a knowledge base that is still loading wait
+        for that one load instead of starting their own.
+        """
+        name = name or DEFAULT_KB
+        with self._lock:
+            chatbot = self._loaded.get(name)
+            if chatbot is not None:
+                self._loaded.move_to_end(name)
+                return chatbot
+
+        data_file = self.data_file(name)
+        with self._lock:
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        with loading:
+            with self._lock:
+                chatbot = self._loaded.get(name)
+                if chatbot is not None:
+                    self._loaded.move_to_end(name)
+                    return chatbot
+
+            chatbot = EnhancedChatbot(data_file, cache_size=self.cache_size, result_cache=self.result_cache,
+                                      conversation_log=self.conversation_log, name=name)
+            if self.watch:
+                chatbot.start_watching()
+            # Measured once; walking a large store on every request would cost more than matching
+            size = self._memory(chatbot)
+
+            with self._lock:
+                self._loaded[name] = chatbot
+                self._sizes[name] = size
+                self._loading.pop(name, None)
+                evicted = self._evict(keep=name)
+
+        for old in evicted:
+            old.stop_watching()
+        return chatbot
+
+    def peek(self, name: Optional[str] = None) -> Optional[EnhancedChatbot]:
+        """The chatbot for a knowledge base if it is loaded, without loading it"""
+        with self._lock:
+            return self._loaded.get(name or DEFAULT_KB)
+
+    def prepare(self, name: Optional[str] = None) -> EnhancedChatbot:
+        """
+        Load a knowledge base and warm it up from the recorded queries
+
+        The knowledge base answers requests as soon as it is loaded, but is
+        not ready() until the warm-up is over.
+        """
+        name = name or DEFAULT_KB
+        with self._lock:
+            self._preparing.add(name)
+        try:
+            chatbot = self.get(name)
+            warmup_files = self.warmup_files
+            if not warmup_files and self.conversation_log is not None:
+                warmup_files = self.conversation_log.files()
+            if warmup_files:
+                self.warmups[name] = warm_up(chatbot, warmup_files, self.warmup_budget)
+            return chatbot
+        finally:
+            with self._lock:
+                self._preparing.discard(name)
+
+    def ready(self, name: Optional[str] = None) -> bool:
+        """Whether a knowledge base is loaded and not warming up"""
+        name = name or DEFAULT_KB
+        with self._lock:
+            return name in self._loaded and name not in self._preparing
+
+    def load_in_background(self, name: Optional[str] = None) -> threading.Thread:
+        """
+        Prepare a knowledge base in a daemon thread
+
+        Lets a server bind its socket and answer health checks right away.
+        Requests that need the knowledge base meanwhile wait for the load
+        (see get()); a failure is kept in load_errors.
+        """
+        name = name or DEFAULT_KB
+
+        def load():
+            try:
+                self.prepare(name)
+            except Exception as e:
+                self.load_errors[name] = str(e)
+                print(f"❌ Could not load knowledge base '{name}': {e}")
+            else:
+                self.load_errors.pop(name, None)
+
+        thread = threading.Thread(target=load, name=f'kb-load-{name}', daemon=True)
+        thread.start()
+        return thread
+
+    def _evict(self, keep: str) -> List[EnhancedChatbot]:
+        """Unload least recently used knowledge bases until the budget is met"""
+        evicted = []
+        total = sum(self._sizes.values())
+        for name in list(self._loaded):
+            if total <= self.memory_budget:
+                break
+            # The default knowledge base backs /readyz and is never unloaded
+            if name in (keep, DEFAULT_KB):
+                continue
+            evicted.append(self._loaded.pop(name))
+            total -= self._sizes.pop(name)
+            self.evictions += 1
+            print(f"♻️  Unloaded knowledge base '{name}' (memory budget)")
+        return evicted
+
+    @staticmethod
+    def _memory(chatbot: EnhancedChatbot) -> int:
+        return chatbot.matcher.store.memory_usage()
+
+    def start_watching(self):
+        """Watch the files of every loaded knowledge base"""
+        self.watch = True
+        with self._lock:
+            chatbots = list(self._loaded.values())
+        for chatbot in chatbots:
+            chatbot.start_watching()
+
+    def stop_watching(self):
+        """
+        Stop the file watcher threads of loaded knowledge bases
+
+        Knowledge bases loaded later are still watched if the registry was
+        created with watch=True. A process that forks workers stops the
+        threads first, and each worker then calls start_watching().
+        """
+        with self._lock:
+            chatbots = list(self._loaded.values())
+        for chatbot in chatbots:
+            chatbot.stop_watching()
+
+    def reload_all(self):
+        """Start a background reload of every loaded knowledge base"""
+        with self._lock:
+            chatbots = list(self._loaded.values())
+        for chatbot in chatbots:
+            chatbot.reload()
+
+    def loaded(self) -> List[str]:
+        """Loaded knowledge bases, least recently used first"""
+        with self._lock:
+            return list(self._loaded)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            loaded = {name: self._sizes[name] for name in self._loaded}
+        stats = {
+            'loaded': list(loaded),
+            'memory_used': sum(loaded.values()),
+            'memory_budget': self.memory_budget,
+            'evictions': self.evictions
+        }
+        if self.result_cache is not None:
+            stats['result_cache'] = self.result_cache.stats()
+        if self.conversation_log is not None:
+            stats['conversation_log'] = self.conversation_log.stats()
+        if self.sessions is not None:
+            stats['sessions'] = self.sessions.stats()
+        return stats
+
+    def close(self):
+        """Write what the result cache and conversation log still have queued (call on shutdown)"""
+        if self.result_cache is not None:
+            self.result_cache.close()
+        if self.conversation_log is not None:
+            self.conversation_log.close()
@@ -0,0 +1,134 @@
+"""
+Versioned Knowledge-Base Snapshots
+A snapshot bundles a built matcher with the version of the data it was built
+from. The chatbot publishes a new snapshot with one reference assignment, so
+requests already holding the old one finish on it undisturbed.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from response_bodies import ResponseBodies
+
+
+def data_version(path: str) -> str:
+    """Short content digest of a data file ('missing' if it does not exist)"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return 'missing'
+    return digest.hexdigest()[:16]
+
+
+class KnowledgeBaseSnapshot:
+    """A matcher, the version of the knowledge base it serves and its encoded responses"""
+
+    __slots__ = ('matcher', 'base_version', 'changes', 'built_at', 'bodies')
+
+    def __init__(self, matcher, base_version: str, changes: int = 0, built_at: Optional[float] = None,
+                 bodies: Optional[ResponseBodies] = None):
+        """
+        Args:
+            matcher: Matcher built from the data
+            base_version: Version of the data file (or compiled artifact)
+            changes: Number of logged changes applied on top of it
+            built_at: When the matcher was built (defaults to now)
+            bodies: Encoded responses of this matcher (encoded afresh if None)
+        """
+        self.matcher = matcher
+        self.base_version = base_version
+        self.changes = changes
+        self.built_at = built_at if built_at is not None else time.time()
+        self.bodies = bodies if bodies is not None else ResponseBodies(matcher)
+
+    @property
+    def version(self) -> str:
+        return f"{self.base_version}+{self.changes}" if self.changes else self.base_version
+
+    def with_changes(self, matcher, changes: int, changed: Iterable[int] = ()) -> 'KnowledgeBaseSnapshot':
+        """
+        The next snapshot after an edit
+
+        Args:
+            matcher: Edited copy of this snapshot's matcher (see
+                FastSemanticMatcher.edited()); this snapshot keeps its own
+            changes: Number of logged changes now applied
+            changed: Entry ids the edit touched; only their bodies are re-encoded
+        """
+        return KnowledgeBaseSnapshot(matcher, self.base_version, changes, self.built_at,
+                                     self.bodies.updated(matcher, changed))
+
+    def info(self) -> Dict:
+        return {
+            'version': self.version,
+            'built_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.built_at)),
+            'entries': len(self.matcher.store)
+        }
+
+
+class FileWatcher:
+    def __init__(self, paths: List[str], callback: Callable[[], None], interval: float = 2.0):
+        """
+        Poll files for changes and call back when any of them changes
+
+        Polling (size and mtime) keeps this dependency-free and works the same
+        on every platform and on network drives.
+
+        Args:
+            paths: Files to watch; missing files are allowed
+            callback: Called from the watcher thread after a change
+            interval: Seconds between checks
+        """
+        self.paths = paths
+        self.callback = callback
+        self.interval = interval
+        self._stamps = self._read_stamps()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_stamps(self) -> List[Optional[Tuple[int, int]]]:
+        stamps = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                stamps.append(None)
+        return stamps
+
+    def acknowledge(self):
+        """Treat the current file state as seen (after writing the files ourselves)"""
+        self._stamps = self._read_stamps()
+
+    def check(self) -> bool:
+        """Call back if a file changed since the last check"""
+        stamps = self._read_stamps()
+        if stamps == self._stamps:
+            return False
+        self._stamps = stamps
+        self.callback()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️  File watcher error: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='kb-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,158 @@
+"""
+Near-Duplicate Detection with MinHash and LSH Banding
+Finds similar short texts (questions, queries) in roughly linear time
+"""
+
+import re
+import zlib
+import random
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# Words ignored when comparing questions
+STOP_WORDS = {
+    'the', 'is', 'in', 'to', 'and', 'a', 'an', 'of', 'for', 'on', 'with', 'i', 'my',
+    'it', 'be', 'are', 'do', 'does', 'can', 'there', 'this', 'that', 'me', 'from'
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str) -> Set[str]:
+    """Content words of a text, cleaned the same way as the matcher"""
+    words = re.sub(r'[^\w\s]', ' ', text.lower()).split()
+    return {word for word in words if word not in STOP_WORDS}
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    """Exact Jaccard similarity of two shingle sets"""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        """
+        MinHash signatures using universal hashing as permutations
+
+        Args:
+            num_perm: Signature length (number of hash permutations)
+            seed: Seed for the permutation parameters, fixed for reproducibility
+        """
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.permutations = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                             for _ in range(num_perm)]
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        """Minimum permuted hash of the token set for every permutation"""
+        hashes = [zlib.crc32(token.encode('utf-8')) for token in set(tokens)]
+        if not hashes:
+            return (_MAX_HASH,) * self.num_perm
+
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        )
+
+
+class LSHIndex:
+    def __init__(self, bands: int = 16, rows: int = 4):
+        """
+        Locality-sensitive hashing index over MinHash signatures
+
+        Signatures are cut into bands; two items become candidates when any
+        band matches exactly. With b bands of r rows the similarity at which
+        pairs are found half the time is roughly (1/b) ** (1/r).
+        """
+        self.bands = bands
+        self.rows = rows
+        self.buckets: List[Dict[Tuple[int, ...], List[Hashable]]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def insert(self, key: Hashable, signature: Tuple[int, ...]):
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, signature: Tuple[int, ...]) -> Set[Hashable]:
+        """Keys sharing at least one band with the signature"""
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(band_key, ()))
+        return candidates
+
+
+class NearDuplicateFinder:
+    def __init__(self, threshold: float = 0.6, bands: int = 16, rows: int = 4, seed: int = 1):
+        """
+        Incremental near-duplicate grouping of short texts
+
+        Each added text is compared exactly (Jaccard) only against the LSH
+        candidates, and texts above the threshold are merged into one group.
+        """
+        self.threshold = threshold
+        self.hasher = MinHasher(bands * rows, seed)
+        self.index = LSHIndex(bands, rows)
+        self.shingles: Dict[Hashable, Set[str]] = {}
+        self.parent: Dict[Hashable, Hashable] = {}
+
+    def _find(self, key: Hashable) -> Hashable:
+        while self.parent[key] != key:
+            self.parent[key] = self.parent[self.parent[key]]
+            key = self.parent[key]
+        return key
+
+    def _union(self, first: Hashable, second: Hashable):
+        first_root, second_root = self._find(first), self._find(second)
+        if first_root != second_root:
+            self.parent[second_root] = first_root
+
+    def nearest(self, text: str) -> Optional[Tuple[Hashable, float]]:
+        """Most similar known key above the threshold, without adding the text"""
+        tokens = shingles(text)
+        best = None
+        for candidate in self.index.query(self.hasher.signature(tokens)):
+            similarity = jaccard(tokens, self.shingles[candidate])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def add(self, key: Hashable, text: str,
+            accept: Optional[Callable[[Hashable, float], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Add a text and return the existing keys it duplicates
+
+        Args:
+            key: Identifier for the text
+            text: The text itself
+            accept: Optional check called with (existing_key, similarity); only
+                accepted matches are merged into the same group
+        """
+        tokens = shingles(text)
+        signature = self.hasher.signature(tokens)
+
+        matches = []
+        for candidate in self.index.query(signature):
+            similarity = jaccard(tokens, self.shingles[candidate])
+            if similarity >= self.threshold:
+                matches.append((candidate, similarity))
+
+        self.shingles[key] = tokens
+        self.parent[key] = key
+        self.index.insert(key, signature)
+        for candidate, similarity in matches:
+            if accept is None or accept(candidate, similarity):
+                self._union(candidate, key)
+
+        return matches
+
+    def groups(self) -> List[List[Hashable]]:
+        """All groups in insertion order of their first member"""
+        grouped: Dict[Hashable, List[Hashable]] = {}
+        for key in self.parent:
+            grouped.setdefault(self._find(key), []).append(key)
+        return list(grouped.values())
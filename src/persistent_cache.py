@@ -0,0 +1,193 @@
+"""
+Persistent Query-Result Cache Shared by Worker Processes
+A SQLite file in WAL mode behind each process's in-memory ResponseCache.
+Worker processes on one host read each other's matches, and hot queries
+are answered from disk instead of matched again after a restart or deploy.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+# Rows kept; the least recently used beyond this are evicted
+MAX_ENTRIES = 100000
+
+# Seconds between batched writes of new results
+FLUSH_INTERVAL = 0.5
+
+# Seconds between eviction passes
+EVICT_INTERVAL = 60.0
+
+# Milliseconds a statement waits for another process's write lock
+BUSY_TIMEOUT_MS = 200
+
+# A hit refreshes a row's last-use time at most this often (seconds), so
+# reads rarely turn into writes
+TOUCH_AFTER = 300.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    version TEXT NOT NULL,
+    query TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (version, query)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+
+class PersistentResultCache:
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES, flush_interval: float = FLUSH_INTERVAL,
+                 evict_interval: float = EVICT_INTERVAL):
+        """
+        (version, normalized query) -> matched entry id, stored in SQLite
+
+        Lookups read the file directly. New results are queued and written
+        by a background thread in one transaction per flush interval, so a
+        request never waits for another process's write lock. Every method
+        swallows SQLite errors: a broken cache only costs matching time.
+
+        Args:
+            path: SQLite file, created if missing; share it between the
+                workers of a host
+            max_entries: Rows kept by background eviction
+            flush_interval: Seconds between batched writes
+            evict_interval: Seconds between eviction passes
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._reset()
+        self._connection().executescript(_SCHEMA)
+
+    def _reset(self):
+        # Threads and connections do not survive fork(); a forked worker
+        # opens its own on first use
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._thread = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._reset()
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            # WAL commits then only wait for the OS, not for the disk
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def get(self, version: str, key: Hashable) -> Optional[int]:
+        """The stored entry id (NO_MATCH for a fallback), or None"""
+        key = str(key)
+        try:
+            db = self._connection()
+            with self._lock:
+                pending = self._pending.get((version, key))
+            if pending is not None:
+                self.hits += 1
+                return pending[0]
+            row = db.execute('SELECT entry_id, used FROM results WHERE version = ? AND query = ?',
+                             (version, key)).fetchone()
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry_id, used = row
+        now = time.time()
+        if now - used > TOUCH_AFTER:
+            self._queue(version, key, entry_id, now)
+        return entry_id
+
+    def put(self, version: str, key: Hashable, entry_id: int):
+        """Queue a result for the next batched write"""
+        if self._pid != os.getpid():
+            self._reset()
+        self._queue(version, str(key), entry_id, time.time())
+
+    def _queue(self, version: str, key: str, entry_id: int, used: float):
+        if self._stop.is_set():
+            return
+        with self._lock:
+            self._pending[(version, key)] = (entry_id, used)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='result-cache', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write the queued results now"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        rows = [(version, key, entry_id, used) for (version, key), (entry_id, used) in pending.items()]
+        try:
+            db = self._connection()
+            with db:
+                db.execute('BEGIN IMMEDIATE')
+                db.executemany('INSERT OR REPLACE INTO results (version, query, entry_id, used) VALUES (?, ?, ?, ?)',
+                               rows)
+        except sqlite3.Error:
+            # Dropped rather than retried; they are matched again if asked for
+            self.errors += 1
+
+    def evict(self) -> int:
+        """Delete the least recently used rows beyond max_entries; returns how many"""
+        try:
+            db = self._connection()
+            with db:
+                db.execute('BEGIN IMMEDIATE')
+                count = db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+                excess = count - self.max_entries
+                if excess <= 0:
+                    return 0
+                db.execute('DELETE FROM results WHERE (version, query) IN '
+                           '(SELECT version, query FROM results ORDER BY used LIMIT ?)', (excess,))
+                return excess
+        except sqlite3.Error:
+            self.errors += 1
+            return 0
+
+    def _run(self):
+        last_evict = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            if time.monotonic() - last_evict >= self.evict_interval:
+                last_evict = time.monotonic()
+                self.evict()
+
+    def __len__(self) -> int:
+        try:
+            return self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {'path': self.path, 'hits': self.hits, 'misses': self.misses, 'pending': pending,
+                'errors': self.errors}
+
+    def close(self):
+        """Stop the writer thread and write what is queued"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join()
+        self.flush()
@@ -0,0 +1,120 @@
+"""
+Pre-Serialized Chat Response Bodies
+Every /chat answer is one of the knowledge-base answers or the fallback, so
+the JSON body (and a gzip variant of long ones) is encoded once per entry
+and snapshot and then written to the socket as is.
+"""
+
+import copy
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+# Knowledge bases up to this size are encoded when the snapshot is built;
+# larger ones encode each entry on first use, so answers kept compressed by
+# the answer store are not all inflated at once
+PRECOMPUTE_LIMIT = 2000
+
+# Encoded entries kept per snapshot when encoding on first use
+CACHE_SIZE = 4096
+
+# Bodies shorter than this are not worth gzipping
+GZIP_MIN_SIZE = 1024
+
+
+class ResponseBody:
+    """The encoded JSON body of one chat answer"""
+
+    __slots__ = ('body', 'gzipped')
+
+    def __init__(self, response: str):
+        self.body = json.dumps({'response': response, 'status': 'success'}).encode('utf-8')
+        self.gzipped = None
+        if len(self.body) >= GZIP_MIN_SIZE:
+            compressed = gzip.compress(self.body, compresslevel=6, mtime=0)
+            if len(compressed) < len(self.body):
+                self.gzipped = compressed
+
+    def encoded(self, use_gzip: bool = False) -> Tuple[bytes, Optional[str]]:
+        """The bytes to send and their Content-Encoding (None for identity)"""
+        if use_gzip and self.gzipped is not None:
+            return self.gzipped, 'gzip'
+        return self.body, None
+
+
+class ResponseBodies:
+    def __init__(self, matcher, precompute_limit: int = PRECOMPUTE_LIMIT, cache_size: int = CACHE_SIZE):
+        """
+        Encoded response bodies of one knowledge-base snapshot
+
+        Args:
+            matcher: Matcher of the snapshot; bodies are keyed by its entry ids
+            precompute_limit: Encode every entry up front if there are at most
+                this many
+            cache_size: Bodies kept when encoding on first use
+        """
+        self.matcher = matcher
+        self.cache_size = cache_size
+        self.fallback = ResponseBody(matcher.get_fallback_response())
+        self._bodies: 'OrderedDict[int, ResponseBody]' = OrderedDict()
+        self._lock = threading.Lock()
+        store = matcher.store
+        self.precomputed = len(store) <= precompute_limit
+        if self.precomputed:
+            for entry_id in store.entry_ids():
+                self._bodies[entry_id] = ResponseBody(store.answer(entry_id))
+
+    def get(self, entry_id: Optional[int]) -> ResponseBody:
+        """Body for a matched entry id, or the fallback body for None"""
+        if entry_id is None:
+            return self.fallback
+        if self.precomputed:
+            body = self._bodies.get(entry_id)
+            if body is not None:
+                return body
+            # Added to the matcher after these bodies were built
+            body = ResponseBody(self.matcher.store.answer(entry_id))
+            with self._lock:
+                return self._bodies.setdefault(entry_id, body)
+
+        with self._lock:
+            body = self._bodies.get(entry_id)
+            if body is not None:
+                self._bodies.move_to_end(entry_id)
+                return body
+
+        # Encoded outside the lock; two threads may both encode a cold entry
+        body = ResponseBody(self.matcher.store.answer(entry_id))
+        with self._lock:
+            self._bodies[entry_id] = body
+            while len(self._bodies) > self.cache_size:
+                self._bodies.popitem(last=False)
+        return body
+
+    def updated(self, matcher, changed: Iterable[int]) -> 'ResponseBodies':
+        """
+        Bodies for the next snapshot after an edit
+
+        Args:
+            matcher: The edited copy of this snapshot's matcher (same entry ids)
+            changed: Entry ids the edit added, replaced or removed
+
+        Bodies of the other entries are carried over, so an edit re-encodes
+        only the entries it changed rather than the whole knowledge base.
+        """
+        bodies = copy.copy(self)
+        bodies.matcher = matcher
+        bodies._lock = threading.Lock()
+        with self._lock:
+            bodies._bodies = OrderedDict(self._bodies)
+        store = matcher.store
+        for entry_id in changed:
+            bodies._bodies.pop(entry_id, None)
+            if self.precomputed and store.is_live(entry_id):
+                bodies._bodies[entry_id] = ResponseBody(store.answer(entry_id))
+        return bodies
+
+    def stats(self) -> Dict:
+        return {'encoded': len(self._bodies), 'precomputed': self.precomputed}
@@ -0,0 +1,58 @@
+"""
+Response Caching for the Chatbot
+Matches are cached per knowledge-base version, so publishing a new version
+retires every cached match without an explicit flush
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+# Cached value of a query that matched no entry
+NO_MATCH = -1
+
+
+class ResponseCache:
+    def __init__(self, max_size: int = 1024):
+        """
+        Thread-safe LRU cache of (version, normalized query) -> matched entry id
+
+        Queries that fall back are cached as NO_MATCH.
+
+        Args:
+            max_size: Number of responses kept; least recently used are evicted
+        """
+        self.max_size = max_size
+        self._items: 'OrderedDict[Tuple[str, Hashable], int]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, version: str, key: Hashable) -> Optional[int]:
+        with self._lock:
+            value = self._items.get((version, key))
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end((version, key))
+            self.hits += 1
+            return value
+
+    def put(self, version: str, key: Hashable, value: int):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[(version, key)] = value
+            self._items.move_to_end((version, key))
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        return {'size': len(self._items), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,134 @@
+"""
+Bounded Per-Session Conversation State
+Each chat session (identified by a cookie or an X-Session-Id header) keeps
+its last few turns in a ring buffer, so a follow-up can be matched together
+with the question before it. Idle sessions expire, and the number of
+sessions is capped, so memory stays bounded however many users there are.
+"""
+
+import re
+import time
+import secrets
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Cookie that carries the session id
+SESSION_COOKIE = 'chatbot_session'
+
+# Header that carries the session id for clients without cookies
+SESSION_HEADER = 'X-Session-Id'
+
+# Seconds a session is kept after its last message
+SESSION_TTL = 1800.0
+
+# Turns kept per session
+MAX_TURNS = 8
+
+# Sessions kept; the least recently used beyond this are dropped
+MAX_SESSIONS = 10000
+
+# Characters of a message kept in a turn, so a session's size is bounded too
+MAX_TURN_CHARS = 200
+
+_SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+class Session:
+    __slots__ = ('id', 'turns', 'last_used')
+
+    def __init__(self, session_id: str, max_turns: int, now: float):
+        self.id = session_id
+        # (knowledge base, message, matched entry id or None), oldest first
+        self.turns: 'deque[Tuple[Optional[str], str, Optional[int]]]' = deque(maxlen=max_turns)
+        self.last_used = now
+
+    def record(self, kb: Optional[str], message: str, entry_id: Optional[int]):
+        self.turns.append((kb, message[:MAX_TURN_CHARS], entry_id))
+
+    def previous(self, kb: Optional[str]) -> Optional[Tuple[str, int]]:
+        """Message and entry of the last turn with this knowledge base, if it was answered"""
+        for turn_kb, message, entry_id in reversed(self.turns):
+            if turn_kb == kb:
+                return (message, entry_id) if entry_id is not None else None
+        return None
+
+
+class SessionStore:
+    def __init__(self, ttl: float = SESSION_TTL, max_turns: int = MAX_TURNS, max_sessions: int = MAX_SESSIONS,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Sessions by id, least recently used first
+
+        Expired sessions are dropped from the front whenever one is looked
+        up, so eviction costs nothing per request beyond the sessions it
+        removes. At most max_sessions * max_turns turns of MAX_TURN_CHARS
+        characters are held.
+
+        Args:
+            ttl: Seconds an idle session is kept
+            max_turns: Turns kept per session
+            max_sessions: Sessions kept; the least recently used go first
+            clock: Time source (seconds)
+        """
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.expired = 0
+        self.evicted = 0
+        self._sessions: 'OrderedDict[str, Session]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Session:
+        """The session with this id, started if it is new or expired"""
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id, self.max_turns, now)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            else:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def _expire(self, now: float):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used < self.ttl:
+                return
+            del self._sessions[session.id]
+            self.expired += 1
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session is not None and self.clock() - session.last_used < self.ttl
+
+    def stats(self) -> Dict:
+        return {'active': len(self._sessions), 'max_sessions': self.max_sessions, 'expired': self.expired,
+                'evicted': self.evicted}
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(18)
+
+
+def session_id_from(cookie_header: Optional[str], session_header: Optional[str]) -> Optional[str]:
+    """A well-formed session id from the X-Session-Id header or the session cookie, or None"""
+    candidates: List[str] = [session_header.strip()] if session_header else []
+    for cookie in (cookie_header or '').split(';'):
+        name, _, value = cookie.strip().partition('=')
+        if name == SESSION_COOKIE:
+            candidates.append(value.strip().strip('"'))
+    for candidate in candidates:
+        if _SESSION_ID_PATTERN.match(candidate):
+            return candidate
+    return None
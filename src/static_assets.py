@@ -0,0 +1,173 @@
+"""
+In-Memory Static Asset Cache
+Keeps the chat interface pages in memory, pre-gzipped, with strong ETags,
+so a page load is a dictionary lookup and usually a bodyless 304.
+Files are reloaded when they change on disk.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from kb_snapshot import FileWatcher
+
+# File types served from the cache
+STATIC_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.ico', '.png', '.jpg', '.jpeg', '.gif')
+
+# Already compressed formats are not gzipped again
+_COMPRESSIBLE = ('.html', '.css', '.js', '.svg')
+
+# Pages have no versioned URLs, so browsers revalidate on every load (a 304)
+CACHE_CONTROL = 'no-cache'
+
+Headers = List[Tuple[str, str]]
+
+
+class StaticAsset:
+    __slots__ = ('path', 'body', 'gzipped', 'etag', 'gzip_etag', 'content_type')
+
+    def __init__(self, path: str, body: bytes):
+        self.path = path
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        self.gzip_etag = gzip_etag(self.etag)
+        self.gzipped = None
+        if path.lower().endswith(_COMPRESSIBLE):
+            # mtime=0 keeps the bytes, and so the ETag, stable across restarts
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.gzipped = compressed
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/'):
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names this version of the file"""
+        return matching_etag(if_none_match, (self.etag, self.gzip_etag)) is not None
+
+    def response(self, accept_encoding: Optional[str] = None,
+                 if_none_match: Optional[str] = None) -> Tuple[int, Headers, bytes]:
+        """
+        Status, headers and body for a GET of this asset
+
+        Headers include Content-Length; the body is empty for a 304.
+        """
+        gzipped = self.gzipped is not None and accepts_gzip(accept_encoding)
+        etag = self.gzip_etag if gzipped else self.etag
+        headers = [('ETag', etag), ('Cache-Control', CACHE_CONTROL)]
+        if self.gzipped is not None:
+            headers.append(('Vary', 'Accept-Encoding'))
+
+        if self.not_modified(if_none_match):
+            return 304, headers, b''
+
+        body = self.gzipped if gzipped else self.body
+        headers += [('Content-Type', self.content_type), ('Content-Length', str(len(body)))]
+        if gzipped:
+            headers.append(('Content-Encoding', 'gzip'))
+        return 200, headers, body
+
+
+def gzip_etag(etag: str) -> str:
+    """ETag of the gzip variant of a representation"""
+    return etag[:-1] + '-gz"'
+
+
+def matching_etag(if_none_match: Optional[str], etags: Iterable[str]) -> Optional[str]:
+    """The first of etags named by an If-None-Match header ('*' names any), or None"""
+    if not if_none_match:
+        return None
+    etags = list(etags)
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            # If-None-Match uses the weak comparison
+            tag = tag[2:]
+        if tag == '*' and etags:
+            return etags[0]
+        if tag in etags:
+            return tag
+    return None
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows gzip (q=0 refuses it)"""
+    weights = {}
+    for coding in (accept_encoding or '').lower().split(','):
+        name, _, params = coding.partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip()] = weight
+    return weights.get('gzip', weights.get('*', 0.0)) > 0
+
+
+class StaticAssetCache:
+    def __init__(self, root: str, names: Optional[Iterable[str]] = None, watch: bool = True,
+                 interval: float = 2.0):
+        """
+        Load static files into memory
+
+        Args:
+            root: Directory holding the files
+            names: File names to cache (default: every file in root with a
+                STATIC_EXTENSIONS extension, not recursive)
+            watch: Reload the files when they change on disk
+            interval: Seconds between change checks
+        """
+        self.root = os.path.abspath(root)
+        if names is None:
+            names = sorted(name for name in os.listdir(self.root)
+                           if name.lower().endswith(STATIC_EXTENSIONS) and not name.startswith('.'))
+        self.names = list(names)
+        self.interval = interval
+        self._assets: Dict[str, StaticAsset] = {}
+        self.load()
+
+        self.watcher = None
+        if watch:
+            self.start_watching()
+
+    def load(self):
+        """Read every file again; the new set replaces the old one in a single assignment"""
+        assets = {}
+        for name in self.names:
+            try:
+                with open(os.path.join(self.root, name), 'rb') as f:
+                    assets['/' + name] = StaticAsset(name, f.read())
+            except OSError:
+                # Removed files are no longer served from memory
+                pass
+        self._assets = assets
+
+    def get(self, url_path: str) -> Optional[StaticAsset]:
+        """The cached asset for a URL path such as '/simple_interface.html'"""
+        return self._assets.get(url_path)
+
+    def stats(self) -> Dict:
+        assets = self._assets
+        return {
+            'files': len(assets),
+            'bytes': sum(len(asset.body) for asset in assets.values()),
+            'gzip_bytes': sum(len(asset.gzipped or asset.body) for asset in assets.values())
+        }
+
+    def start_watching(self):
+        """Reload the files when they change on disk"""
+        if self.watcher is None:
+            paths = [os.path.join(self.root, name) for name in self.names]
+            self.watcher = FileWatcher(paths, self.load, self.interval)
+            self.watcher.start()
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
@@ -0,0 +1,203 @@
+"""
+Server-Sent Events Stream of Chatbot Statistics
+The chat pages subscribe once instead of fetching /stats after every
+message. Stats are rendered at most once per interval and pushed only when
+they changed; a comment line every so often keeps proxies from closing an
+idle stream.
+"""
+
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Seconds between checks for changed stats (the push rate limit)
+PUSH_INTERVAL = 1.0
+
+# Seconds without an event before a heartbeat comment is sent
+HEARTBEAT_INTERVAL = 15.0
+
+# Seconds a subscriber may block a push before it is dropped
+SEND_TIMEOUT = 1.0
+
+STREAM_HEADERS = [
+    ('Content-Type', 'text/event-stream'),
+    ('Cache-Control', 'no-cache'),
+    # Stop nginx and similar proxies from buffering the stream
+    ('X-Accel-Buffering', 'no'),
+]
+
+# Browsers reconnect this many milliseconds after the stream drops
+STREAM_START = b'retry: 5000\n\n'
+
+HEARTBEAT = b': keep-alive\n\n'
+
+# Streams a thread-per-stream server holds open at once (per process); more
+# are refused with a 503 so streams cannot take every request thread
+MAX_THREAD_STREAMS = 4
+
+# Seconds a refused client is asked to wait before opening a stream again
+STREAMS_FULL_RETRY_AFTER = 30
+
+
+def event(payload: bytes) -> bytes:
+    """An SSE message event carrying one JSON document"""
+    return b'data: ' + payload + b'\n\n'
+
+
+def event_stream(render: Callable[[], Optional[bytes]], interval: float = PUSH_INTERVAL,
+                 heartbeat: float = HEARTBEAT_INTERVAL) -> Iterator[bytes]:
+    """
+    Chunks of one subscriber's stream, for servers with a thread per stream
+
+    Args:
+        render: Returns the current stats as JSON bytes (None: nothing to send)
+    """
+    last = render()
+    yield STREAM_START + (event(last) if last is not None else b'')
+    quiet = 0.0
+    while True:
+        time.sleep(interval)
+        quiet += interval
+        payload = render()
+        if payload is not None and payload != last:
+            last = payload
+            quiet = 0.0
+            yield event(payload)
+        elif quiet >= heartbeat:
+            quiet = 0.0
+            yield HEARTBEAT
+
+
+class StreamSlots:
+    def __init__(self, limit: int = MAX_THREAD_STREAMS):
+        """
+        Count of the streams open on a server with a thread per stream
+
+        Args:
+            limit: Most streams open at once
+        """
+        self.limit = limit
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._open
+
+    def acquire(self) -> bool:
+        """Take a slot for a new stream (False when all are in use)"""
+        with self._lock:
+            if self._open >= self.limit:
+                return False
+            self._open += 1
+            return True
+
+    def release(self):
+        """Give back the slot of a closed stream"""
+        with self._lock:
+            self._open -= 1
+
+
+class _Subscriber:
+    __slots__ = ('sock', 'last', 'quiet')
+
+    def __init__(self, sock: socket.socket, last: bytes):
+        self.sock = sock
+        self.last = last
+        self.quiet = 0.0
+
+
+class StatsBroadcaster:
+    def __init__(self, render: Callable[[Optional[str]], Optional[bytes]], interval: float = PUSH_INTERVAL,
+                 heartbeat: float = HEARTBEAT_INTERVAL):
+        """
+        Push stats to every open stream from a single thread
+
+        A thread-pool server hands the stream's socket over after sending the
+        headers and first event, so open streams hold no worker threads.
+
+        Args:
+            render: Returns the stats of a knowledge base (None: the default)
+                as JSON bytes, or None when there is nothing to send
+            interval: Seconds between checks for changed stats
+            heartbeat: Seconds without an event before a heartbeat
+        """
+        self.render = render
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self._subscribers: Dict[Optional[str], List[_Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def subscribe(self, sock: socket.socket, kb: Optional[str], last: bytes):
+        """
+        Take over a connection whose stream has started
+
+        Args:
+            sock: Connection socket; the broadcaster closes it when done
+            kb: Knowledge base whose stats are streamed
+            last: Stats payload already sent on the stream
+        """
+        sock.settimeout(SEND_TIMEOUT)
+        with self._lock:
+            self._subscribers.setdefault(kb, []).append(_Subscriber(sock, last))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stats-stream', daemon=True)
+                self._thread.start()
+
+    def push(self):
+        """Send changed stats and due heartbeats to every subscriber"""
+        with self._lock:
+            streams = {kb: list(subscribers) for kb, subscribers in self._subscribers.items()}
+
+        dropped = []
+        for kb, subscribers in streams.items():
+            try:
+                payload = self.render(kb)
+            except Exception as e:
+                print(f"⚠️  Stats stream error: {e}")
+                continue
+            for subscriber in subscribers:
+                subscriber.quiet += self.interval
+                if payload is not None and payload != subscriber.last:
+                    chunk = event(payload)
+                elif subscriber.quiet >= self.heartbeat:
+                    chunk = HEARTBEAT
+                else:
+                    continue
+                try:
+                    subscriber.sock.sendall(chunk)
+                    if payload is not None:
+                        subscriber.last = payload
+                    subscriber.quiet = 0.0
+                except OSError:
+                    dropped.append((kb, subscriber))
+
+        if dropped:
+            with self._lock:
+                for kb, subscriber in dropped:
+                    self._subscribers[kb].remove(subscriber)
+                    if not self._subscribers[kb]:
+                        del self._subscribers[kb]
+            for _, subscriber in dropped:
+                subscriber.sock.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.push()
+
+    def close(self):
+        """Stop pushing and close every stream"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            subscribers = [s for group in self._subscribers.values() for s in group]
+            self._subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.sock.close()
@@ -0,0 +1,103 @@
+"""
+Cache Warm-Up From Recorded Queries
+Before a freshly loaded knowledge base is reported ready, its most frequent
+recorded questions are matched once. The response cache then already holds
+the hot matches and their response bodies are encoded, so the first wave of
+users after a deploy does not pay for them.
+"""
+
+import json
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from bounded_counter import BoundedCounter
+
+# Seconds warm-up may delay readiness, reading the logs included
+WARMUP_BUDGET = 10.0
+
+# Most frequent distinct queries matched
+WARMUP_LIMIT = 2000
+
+# Distinct queries counted at once (see BoundedCounter)
+MAX_DISTINCT = 100000
+
+
+def read_queries(path: str, kb: Optional[str] = None) -> Iterator[str]:
+    """
+    User inputs recorded in a file
+
+    Lines that are JSON objects are conversation records and give their
+    'user' field; any other non-empty line is a query as typed.
+
+    Args:
+        kb: Only conversation records of this knowledge base (None: all);
+            plain query lines carry no knowledge base and are always read
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict) or (kb is not None and record.get('kb') != kb):
+                    continue
+                query = record.get('user')
+                if isinstance(query, str) and query.strip():
+                    yield query
+            else:
+                yield line
+
+
+def frequent_queries(paths: Iterable[str], normalize: Callable[[str], str], limit: int = WARMUP_LIMIT,
+                     deadline: Optional[float] = None, kb: Optional[str] = None) -> List[str]:
+    """
+    The most frequent normalized queries in recorded query files
+
+    Args:
+        normalize: Maps a query to its cache key
+        deadline: time.monotonic() at which to stop reading and count what
+            has been read so far
+        kb: Only conversation records of this knowledge base (None: all)
+    """
+    counts = BoundedCounter(MAX_DISTINCT)
+    for path in paths:
+        try:
+            for i, query in enumerate(read_queries(path, kb)):
+                if deadline is not None and i % 1000 == 0 and time.monotonic() >= deadline:
+                    break
+                key = normalize(query)
+                if key:
+                    counts.add(key)
+        except OSError as e:
+            print(f"⚠️  Skipping warm-up file {path}: {e}")
+    return [query for query, _ in counts.most_common(limit)]
+
+
+def warm_up(chatbot, paths: Iterable[str], budget: float = WARMUP_BUDGET, limit: int = WARMUP_LIMIT) -> Dict:
+    """
+    Match the most frequent recorded queries of a chatbot's knowledge base
+
+    Args:
+        chatbot: EnhancedChatbot to warm up; conversation records of other
+            knowledge bases are skipped (all are read if it has no name)
+        paths: Conversation logs (JSON Lines) or files with one query per line
+        budget: Seconds the whole warm-up may take
+
+    Returns:
+        What was done: queries matched, candidates found, seconds taken and
+        whether every candidate was matched within the budget
+    """
+    start = time.monotonic()
+    deadline = start + budget
+    queries = frequent_queries(paths, chatbot.normalize_query, limit, deadline, chatbot.name)
+    # Reading that ran out of time may have stopped before the end of the logs
+    read_all = time.monotonic() < deadline
+    warmed = chatbot.warm_up(queries, deadline)
+    seconds = time.monotonic() - start
+    print(f"🔥 Warmed up {warmed} of {len(queries)} frequent queries in {seconds:.2f}s")
+    return {'queries': warmed, 'candidates': len(queries), 'seconds': round(seconds, 3),
+            'complete': read_all and warmed == len(queries)}
@@ -0,0 +1,59 @@
+import sys
+import os
+import tempfile
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from answer_store import AnswerStore, CompressedAnswers
+from fast_semantic_matcher import FastSemanticMatcher
+from kb_artifact import MappedEntryStore, build_artifact
+
+
+class TestAnswerStore(unittest.TestCase):
+
+    def test_answers_deduplicated_across_blocks(self):
+        store = AnswerStore(block_size=64)
+        ids = [store.add(f"answer {i % 300} <a href='https://example.com/{i % 300}'>link</a>") for i in range(3000)]
+
+        self.assertEqual(len(store), 300)
+        self.assertEqual(ids[:300], ids[300:600])
+        self.assertGreater(store.block_count(), 1)
+        for answer_id in (0, 150, 299):
+            self.assertEqual(store.get(answer_id), f"answer {answer_id} <a href='https://example.com/{answer_id}'>link</a>")
+        self.assertEqual(list(store)[7], store.get(7))
+
+    def test_digest_collisions_keep_answers_apart(self):
+        store = AnswerStore(block_size=8)
+        with mock.patch('answer_store.hashlib.blake2b') as blake2b:
+            blake2b.return_value.digest.return_value = bytes(8)
+            ids = [store.add(answer) for answer in ('first answer', 'second answer', 'first answer', 'third')]
+        self.assertEqual(ids, [0, 1, 0, 2])
+        self.assertEqual(list(store), ['first answer', 'second answer', 'third'])
+        self.assertRaises(TypeError, CompressedAnswers, store.locations)
+
+    def test_lru_holds_only_hot_answers(self):
+        store = AnswerStore(block_size=64, cache_size=2)
+        for i in range(10):
+            store.add(f"answer {i}")
+        for answer_id in (1, 2, 1, 3):
+            store.get(answer_id)
+        self.assertEqual(list(store._cache), [1, 3])
+
+    def test_compressed_answers_in_artifact(self):
+        entries = [{"question": f"question {i}", "answer": "Repeated answer text. " * 20 + str(i), "keywords": ["k"]}
+                   for i in range(200)]
+        matcher = FastSemanticMatcher(entries)
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'kb.kb')
+            build_artifact(matcher.store, path)
+            self.assertLess(os.path.getsize(path), sum(len(entry['answer']) for entry in entries) / 4)
+
+            mapped = MappedEntryStore(path, verify=True)
+            self.assertEqual(mapped.answer(123), entries[123]['answer'])
+            self.assertEqual(list(mapped.answers), [entry['answer'] for entry in entries])
+            mapped.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
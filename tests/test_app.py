@@ -0,0 +1,108 @@
+import sys
+import os
+import gc
+import shutil
+import tempfile
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import unittest
+from app import after_fork, before_fork, create_app
+from kb_registry import KnowledgeBaseRegistry
+from sessions import SessionStore
+from static_assets import StaticAssetCache
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), '..', 'templates')
+
+
+class TestCreateApp(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        data_file = os.path.join(workdir.name, 'training_data.json')
+        shutil.copy(DATA_FILE, data_file)
+        self.registry = KnowledgeBaseRegistry(kb_dir=workdir.name, default_data_file=data_file,
+                                              sessions=SessionStore())
+        self.templates = StaticAssetCache(TEMPLATES_DIR, ['index.html'], watch=False)
+        self.app = create_app(self.registry, self.templates)
+        self.client = self.app.test_client()
+
+    def test_apps_serve_their_own_registry(self):
+        response = self.client.post('/chat', json={'message': 'What is Power BI?'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Power BI', response.get_json()['response'])
+        self.assertEqual(self.registry.get().questions_answered, 1)
+
+        session_id = response.headers['X-Session-Id']
+        again = self.client.post('/chat', json={'message': 'What is DAX?'}, headers={'X-Session-Id': session_id})
+        self.assertNotIn('Set-Cookie', again.headers)
+        self.assertEqual(len(self.registry.sessions.get(session_id).turns), 2)
+        self.assertEqual(self.registry.get().questions_answered, 2)
+
+        other = KnowledgeBaseRegistry(kb_dir=self.registry.kb_dir, default_data_file=self.registry.default_data_file)
+        create_app(other, self.templates).test_client().post('/chat', json={'message': 'What is DAX?'})
+        self.assertEqual(self.registry.get().questions_answered, 2)
+        self.assertEqual(other.get().questions_answered, 1)
+
+    def test_routes(self):
+        self.assertEqual(self.client.post('/chat', json={'message': '  '}).status_code, 400)
+        self.assertEqual(self.client.post('/chat', json={'message': 'hi', 'kb': 'missing'}).status_code, 404)
+        for body in ({'message': 5}, {'message': 'hi', 'kb': 5}, {'message': 'hi', 'kb': ['default']}):
+            with self.subTest(body=body):
+                response = self.client.post('/chat', json=body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('must be a string', response.get_json()['error'])
+        self.assertEqual(self.client.get('/answer', query_string={'q': 'What is Power BI?'}).status_code, 200)
+        self.assertEqual(self.client.get('/stats').get_json()['training_data_count'],
+                         len(self.registry.get().matcher.store))
+
+        page = self.client.get('/')
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(self.client.get('/', headers={'If-None-Match': page.headers['ETag']}).status_code, 304)
+
+    def test_admin_reload(self):
+        response = self.client.post('/admin/reload', query_string={'wait': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'reloaded')
+        self.assertEqual(self.client.post('/admin/reload', query_string={'kb': 'missing'}).status_code, 404)
+
+        with mock.patch.dict(os.environ, {'CHATBOT_ADMIN_TOKEN': 'secret'}):
+            self.assertEqual(self.client.post('/admin/reload').status_code, 403)
+            response = self.client.post('/admin/reload', headers={'X-Admin-Token': 'secret'})
+            self.assertEqual(response.status_code, 202)
+
+    def test_stats_streams_are_capped(self):
+        client = create_app(self.registry, self.templates, max_streams=1).test_client()
+        first = client.get('/stats/stream', buffered=False)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(next(first.response).startswith(b'retry:'))
+
+        refused = client.get('/stats/stream')
+        self.assertEqual(refused.status_code, 503)
+        self.assertIn('Retry-After', refused.headers)
+
+        first.close()
+        again = client.get('/stats/stream', buffered=False)
+        self.assertEqual(again.status_code, 200)
+        again.close()
+
+    def test_fork_hooks_stop_and_restart_watchers(self):
+        self.registry.start_watching()
+        chatbot = self.registry.get()
+        self.templates.start_watching()
+        self.addCleanup(self.registry.stop_watching)
+        self.addCleanup(self.templates.stop_watching)
+
+        before_fork(self.app)
+        self.addCleanup(gc.unfreeze)
+        self.assertIsNone(self.templates.watcher)
+        self.assertIsNone(chatbot.watcher)
+        after_fork(self.app)
+        self.assertIsNotNone(self.templates.watcher)
+        self.assertIsNotNone(chatbot.watcher)
+
+
+if __name__ == '__main__':
+    unittest.main()
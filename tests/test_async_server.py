@@ -0,0 +1,127 @@
+import sys
+import os
+import json
+import socket
+import asyncio
+import threading
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import unittest
+from async_server import AsyncChatServer
+import chat_api
+
+
+class TestAsyncChatServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = AsyncChatServer(chat_api.create_registry(watch=False), max_inflight=2, keepalive_timeout=5)
+        cls.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def serve():
+            cls.listener = await asyncio.start_server(cls.server.handle_connection, '127.0.0.1', 0)
+            started.set()
+
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        asyncio.run_coroutine_threadsafe(serve(), cls.loop)
+        started.wait(5)
+        cls.address = cls.listener.sockets[0].getsockname()[:2]
+
+    @classmethod
+    def tearDownClass(cls):
+        async def shutdown():
+            cls.listener.close()
+            await cls.server.close()
+            await cls.listener.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), cls.loop).result(10)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(5)
+        cls.loop.close()
+        cls.server.executor.shutdown()
+
+    def read_response(self, stream):
+        status = stream.readline().decode()
+        headers = {}
+        for line in iter(stream.readline, b'\r\n'):
+            name, _, value = line.decode().partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = stream.read(int(headers['content-length']))
+        return int(status.split()[1]), headers, body
+
+    def connect(self):
+        connection = socket.create_connection(self.address, timeout=10)
+        self.addCleanup(connection.close)
+        return connection, connection.makefile('rb')
+
+    def test_requests_share_one_connection(self):
+        connection, stream = self.connect()
+        message = json.dumps({'message': 'What is Power BI?'}).encode()
+        for _ in range(3):
+            connection.sendall(b'POST /chat HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n'
+                               b'Content-Length: ' + str(len(message)).encode() + b'\r\n\r\n' + message)
+            status, headers, body = self.read_response(stream)
+            self.assertEqual(status, 200)
+            self.assertEqual(headers['connection'], 'keep-alive')
+            self.assertIn('Power BI', json.loads(body)['response'])
+            # Without a cookie jar, every request is handed a new session
+            self.assertIn(f"chatbot_session={headers['x-session-id']};", headers['set-cookie'])
+
+        connection.sendall(b'GET /stats HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+        status, headers, body = self.read_response(stream)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['connection'], 'close')
+        self.assertEqual(json.loads(body)['server']['mode'], 'asyncio')
+        self.assertEqual(stream.read(), b'')
+
+    def test_answer_revalidates_on_the_same_connection(self):
+        connection, stream = self.connect()
+        connection.sendall(b'GET /answer?q=What+is+Power+BI%3F HTTP/1.1\r\nHost: x\r\n\r\n')
+        status, headers, body = self.read_response(stream)
+        self.assertEqual(status, 200)
+        self.assertIn('Power BI', json.loads(body)['response'])
+
+        connection.sendall(b'GET /answer?q=what+is+power+bi HTTP/1.1\r\nHost: x\r\nIf-None-Match: '
+                           + headers['etag'].encode() + b'\r\n\r\n')
+        self.assertEqual(int(stream.readline().split()[1]), 304)
+        for line in iter(stream.readline, b'\r\n'):
+            self.assertFalse(line.lower().startswith(b'content-length'))
+
+    def test_static_interface_and_traversal(self):
+        connection, stream = self.connect()
+        connection.sendall(b'GET / HTTP/1.1\r\nHost: x\r\n\r\n')
+        status, headers, body = self.read_response(stream)
+        self.assertEqual(status, 200)
+        self.assertTrue(headers['content-type'].startswith('text/html'))
+        self.assertIn(b'<html', body.lower())
+
+        for path in (b'/../requests.jsonl', b'/%2e%2e/etc/passwd', b'/app.py', b'/.git/config'):
+            connection.sendall(b'GET ' + path + b' HTTP/1.1\r\nHost: x\r\n\r\n')
+            self.assertEqual(self.read_response(stream)[0], 404)
+
+    def test_handler_errors_get_a_500(self):
+        connection, stream = self.connect()
+        connection.sendall(b'GET /x%00.html HTTP/1.1\r\nHost: x\r\n\r\n')
+        self.assertEqual(self.read_response(stream)[0], 404)
+
+        with mock.patch.object(chat_api, 'health', side_effect=RuntimeError('boom')):
+            connection.sendall(b'GET /healthz HTTP/1.1\r\nHost: x\r\n\r\n')
+            status, headers, body = self.read_response(stream)
+        self.assertEqual(status, 500)
+        self.assertEqual(json.loads(body), {'error': 'boom', 'status': 'error'})
+        self.assertEqual(headers['connection'], 'close')
+
+    def test_malformed_request_closes_connection(self):
+        connection, stream = self.connect()
+        connection.sendall(b'POST /chat HTTP/1.1\r\nContent-Length: nope\r\n\r\n')
+        status, headers, _ = self.read_response(stream)
+        self.assertEqual(status, 400)
+        self.assertEqual(headers['connection'], 'close')
+        self.assertEqual(stream.read(), b'')
+
+
+if __name__ == "__main__":
+    unittest.main()
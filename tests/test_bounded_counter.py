@@ -0,0 +1,23 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from bounded_counter import BoundedCounter
+
+
+class TestBoundedCounter(unittest.TestCase):
+
+    def test_rarest_half_dropped_beyond_the_limit(self):
+        counts = BoundedCounter(max_distinct=4)
+        for key in ['hot'] * 5 + ['warm'] * 3 + ['a', 'b']:
+            self.assertFalse(counts.add(key))
+        self.assertEqual(len(counts), 4)
+
+        self.assertTrue(counts.add('c'))
+        self.assertEqual(len(counts), 2)
+        self.assertEqual(counts.most_common(), [('hot', 5), ('warm', 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
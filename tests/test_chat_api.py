@@ -0,0 +1,127 @@
+import sys
+import os
+import gzip
+import json
+import shutil
+import tempfile
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+import chat_api
+from kb_registry import KnowledgeBaseRegistry
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+class TestAnswerEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        data_file = os.path.join(workdir.name, 'training_data.json')
+        shutil.copy(DATA_FILE, data_file)
+        self.registry = KnowledgeBaseRegistry(kb_dir=workdir.name, default_data_file=data_file)
+
+    def answer(self, q, accept_encoding=None, if_none_match=None, **query):
+        query = {name: [value] for name, value in dict(query, q=q).items()}
+        status, payload, headers = chat_api.answer(self.registry, query, accept_encoding, if_none_match)
+        return status, payload, dict(headers)
+
+    def test_etag_follows_normalized_query_and_version(self):
+        status, payload, headers = self.answer('What is Power BI?')
+        self.assertEqual(status, 200)
+        self.assertIn('Power BI', json.loads(payload)['response'])
+        self.assertEqual(headers['Cache-Control'], f'public, max-age={chat_api.ANSWER_MAX_AGE}')
+        etag = headers['ETag']
+
+        self.assertEqual(self.answer('  what is POWER bi ')[2]['ETag'], etag)
+        self.assertNotEqual(self.answer('What is DAX?')[2]['ETag'], etag)
+
+        status, payload, headers = self.answer('what is power bi', if_none_match=etag)
+        self.assertEqual((status, payload, headers['ETag']), (304, b'', etag))
+
+        # Any published change retires the old ETag
+        chatbot = self.registry.get()
+        chatbot.add_entry("What is a paginated report?", "A pixel-perfect report.", ["paginated"])
+        status, _, headers = self.answer('What is Power BI?', if_none_match=etag)
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers['ETag'], etag)
+
+    def test_gzip_variant_has_its_own_etag(self):
+        chatbot = self.registry.get()
+        chatbot.add_entry("What is the long answer?", "Long answer text. " * 200, ["long", "answer"])
+        status, payload, headers = self.answer('What is the long answer?', 'gzip')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertTrue(headers['ETag'].endswith('-gz"'))
+        self.assertIn('Long answer text.', json.loads(gzip.decompress(payload))['response'])
+
+        identity = self.answer('What is the long answer?')[2]['ETag']
+        self.assertEqual(self.answer('What is the long answer?', 'gzip', identity)[0], 304)
+
+    def test_errors_are_not_cacheable(self):
+        for status, headers in (self.answer('')[::2], self.answer('hi', kb='missing')[::2]):
+            self.assertIn(status, (400, 404))
+            self.assertEqual(headers['Cache-Control'], 'no-store')
+
+
+class TestStatsEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        data_file = os.path.join(workdir.name, 'training_data.json')
+        shutil.copy(DATA_FILE, data_file)
+        self.registry = KnowledgeBaseRegistry(kb_dir=workdir.name, default_data_file=data_file)
+
+    def test_unchanged_stats_get_304(self):
+        status, payload, headers = chat_api.stats_response(self.registry, {})
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(payload)['total_questions'], 0)
+        self.assertNotIn('last_question', json.loads(payload))
+        etag = dict(headers)['ETag']
+        self.assertEqual(chat_api.stats_response(self.registry, {}, etag)[:2], (304, b''))
+
+        self.registry.get().get_response("What is Power BI?")
+        status, payload, headers = chat_api.stats_response(self.registry, {}, etag)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(payload)['total_questions'], 1)
+        self.assertEqual(chat_api.stats_payload(self.registry, None), payload)
+
+    def test_stats_payload_does_not_load(self):
+        self.assertIsNone(chat_api.stats_payload(self.registry, None))
+        self.assertEqual(self.registry.loaded(), [])
+        self.registry.get()
+        self.assertEqual(json.loads(chat_api.stats_payload(self.registry, None))['total_questions'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestReadiness(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.data_file = os.path.join(workdir.name, 'training_data.json')
+        shutil.copy(DATA_FILE, self.data_file)
+        self.registry = KnowledgeBaseRegistry(kb_dir=workdir.name, default_data_file=self.data_file)
+
+    def test_ready_once_the_default_knowledge_base_is_loaded(self):
+        self.assertEqual(chat_api.health(), (200, {'status': 'ok'}))
+        self.assertEqual(chat_api.readiness(self.registry), (503, {'status': 'loading'}))
+
+        self.registry.load_in_background().join()
+        status, body = chat_api.readiness(self.registry)
+        snapshot = self.registry.get().snapshot
+        self.assertEqual(status, 200)
+        self.assertEqual(body['kb_version'], snapshot.version)
+        self.assertEqual(body['kb_built_at'], snapshot.info()['built_at'])
+
+    def test_failed_load_is_reported(self):
+        with mock.patch('kb_registry.EnhancedChatbot', side_effect=OSError('disk gone')):
+            self.registry.load_in_background().join()
+        status, body = chat_api.readiness(self.registry)
+        self.assertEqual((status, body), (503, {'status': 'error', 'error': 'disk gone'}))
+        self.assertEqual(chat_api.readiness(None)[0], 503)
@@ -0,0 +1,78 @@
+import sys
+import os
+import json
+import random
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import unittest
+
+try:
+    import collision_matrix
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from fast_semantic_matcher import FastSemanticMatcher
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy is required for the collision analysis")
+class TestCollisionMatrix(unittest.TestCase):
+
+    def setUp(self):
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            self.entries = json.load(f)
+        self.matcher = FastSemanticMatcher(self.entries)
+
+    def test_vectorized_scores_match_production(self):
+        """Best entry and score agree with find_best_match for every query"""
+        rng = random.Random(1)
+        queries = [entry['question'] for entry in self.entries]
+        for entry in self.entries:
+            queries.extend(collision_matrix.generate_paraphrases(entry['question'], entry['keywords'], rng, 6))
+        queries.extend(["hii", "connect hive to azure databricks", "weather today", ""])
+
+        features = collision_matrix.CorpusFeatures(self.matcher)
+        batch = features.encode_queries(queries)
+        best, best_score, _, _, _ = collision_matrix.top_two(features, batch, chunk_size=17)
+
+        for row, query in enumerate(queries):
+            with self.subTest(query=query):
+                expected = self.matcher.find_best_match(query)
+                if expected is None:
+                    self.assertTrue(best[row] < 0 or best_score[row] < self.matcher.min_similarity_threshold)
+                else:
+                    self.assertEqual(self.entries[best[row]]['question'], expected['entry']['question'])
+                    self.assertAlmostEqual(best_score[row], expected['score'], places=5)
+
+    def test_candidate_and_dense_scoring_agree(self):
+        """Chunks scored from candidate lists give the same result as dense blocks"""
+        rng = random.Random(2)
+        queries = [entry['question'] for entry in self.entries]
+        for entry in self.entries:
+            queries.extend(collision_matrix.generate_paraphrases(entry['question'], entry['keywords'], rng, 3))
+        queries.extend(["hii", "weather today", ""])
+
+        features = collision_matrix.CorpusFeatures(self.matcher)
+        batch = features.encode_queries(queries)
+        owners = rng.choices(range(len(self.entries)), k=len(queries))
+        results = []
+        for dense_fraction in (0, float('inf')):
+            with mock.patch.object(collision_matrix, 'DENSE_FRACTION', dense_fraction):
+                results.append(collision_matrix.top_two(features, batch, chunk_size=13, owners=owners))
+
+        for dense, candidates in zip(*results):
+            self.assertEqual(dense.tolist(), candidates.tolist())
+
+    def test_findings_sorted_by_margin(self):
+        findings, query_count = collision_matrix.analyze(self.entries, paraphrases_per_entry=3)
+        self.assertGreater(query_count, len(self.entries))
+        margins = [finding['margin'] for finding in findings]
+        self.assertEqual(margins, sorted(margins))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from chatbot import EnhancedChatbot
+from conversation_log import ConversationLogger
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+class TestConversationLogger(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.workdir = workdir.name
+        self.path = os.path.join(self.workdir, 'logs', 'conversations.jsonl')
+
+    def read(self, path=None):
+        with open(path or self.path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_written_in_the_background(self):
+        logger = ConversationLogger(self.path, flush_interval=0.05)
+        for i in range(3):
+            self.assertTrue(logger.log({'user': f'question {i}'}))
+        logger.close()
+        self.assertEqual([record['user'] for record in self.read()], ['question 0', 'question 1', 'question 2'])
+        self.assertEqual(logger.stats(), {'queued': 0, 'written': 3, 'dropped': 0, 'errors': 0})
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        logger = ConversationLogger(self.path, queue_size=2)
+        # No writer thread, so the queue fills up
+        with mock.patch.object(ConversationLogger, '_run'):
+            results = [logger.log({'user': str(i)}) for i in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertEqual(logger.dropped, 3)
+        logger.flush()
+        self.assertEqual(len(self.read()), 2)
+
+    def test_rotation_keeps_backup_count_files(self):
+        logger = ConversationLogger(self.path, max_bytes=100, backup_count=2)
+        for i in range(6):
+            logger._write([{'user': 'x' * 80, 'n': i}])
+        self.assertEqual(logger.files(), [self.path + '.2', self.path + '.1'])
+        self.assertEqual([self.read(path)[0]['n'] for path in logger.files()], [4, 5])
+        logger._write([{'user': 'short', 'n': 6}])
+        self.assertEqual(logger.files()[-1], self.path)
+
+    def test_chatbot_history_is_bounded_and_logged(self):
+        data_file = os.path.join(self.workdir, 'training_data.json')
+        shutil.copy(DATA_FILE, data_file)
+        logger = ConversationLogger(self.path)
+        chatbot = EnhancedChatbot(data_file, conversation_log=logger, history_size=3, name='default')
+        for question in ['What is Power BI?', 'What is DAX?', 'zzqx unknown', 'hello', 'What is Power BI?']:
+            chatbot.get_response(question)
+        self.assertEqual(len(chatbot.conversation_history), 3)
+        self.assertEqual((chatbot.questions_answered, chatbot.fallbacks_given), (5, 1))
+
+        logger.close()
+        records = self.read()
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[2]['user'], 'zzqx unknown')
+        self.assertFalse(records[2]['from_training'])
+        self.assertEqual((records[0]['kb'], records[0]['kb_version']), ('default', chatbot.snapshot.version))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from fast_semantic_matcher import FastSemanticMatcher
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+class TestFastSemanticMatcher(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            cls.training_data = json.load(f)
+        cls.matcher = FastSemanticMatcher(cls.training_data)
+
+    def test_exact_questions_match_their_entry(self):
+        for entry in self.training_data[14:]:
+            with self.subTest(question=entry['question']):
+                match = self.matcher.find_best_match(entry['question'])
+                self.assertIsNotNone(match)
+                self.assertEqual(match['entry']['answer'], entry['answer'])
+
+    def test_technology_specific_matching(self):
+        hive = self.matcher.find_best_match("How can I connect Hive server to Power BI?")
+        azure = self.matcher.find_best_match("How can I connect Power BI Server to Azure Databricks?")
+        self.assertIn('Cloudera', hive['entry']['answer'])
+        self.assertIn('Azure Databricks', azure['entry']['answer'])
+
+    def test_greeting_and_fallback(self):
+        response, from_training = self.matcher.get_response("hi there")
+        self.assertTrue(from_training)
+        self.assertIn('Hello', response)
+
+        response, from_training = self.matcher.get_response("weather forecast tomorrow")
+        self.assertFalse(from_training)
+        self.assertEqual(response, self.matcher.get_fallback_response())
+
+    def test_entries_view(self):
+        entries = self.matcher.entries()
+        self.assertEqual(len(entries), len(self.training_data))
+        self.assertEqual(entries[0], self.training_data[0])
+        self.assertEqual(list(entries)[-1], self.training_data[-1])
+
+    def test_shared_answers_stored_once(self):
+        entry = {"question": "q", "answer": "same answer", "keywords": ["k"]}
+        matcher = FastSemanticMatcher([entry, dict(entry, question="other q")])
+        self.assertEqual(len(matcher.store.answers), 1)
+
+    def assertMatchesRebuild(self, matcher, queries):
+        rebuilt = FastSemanticMatcher(list(matcher.entries()))
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertEqual(matcher.get_response(query), rebuilt.get_response(query))
+
+    def test_incremental_changes_match_full_rebuild(self):
+        matcher = FastSemanticMatcher(self.training_data)
+        queries = [entry['question'] for entry in self.training_data] + ["hi", "gateway refresh schedule"]
+
+        new_id = matcher.add_entry("How do I schedule a gateway refresh?",
+                                   "Open the dataset settings and add a refresh time.", ["gateway", "refresh", "schedule"])
+        matcher.update_entry(3, "What is Power BI Desktop?", "A free Windows application.", ["desktop", "power", "bi"])
+        matcher.remove_entry(5)
+        matcher.remove_entry(new_id - 1)
+        self.assertEqual(len(matcher.entries()), len(self.training_data) - 1)
+        self.assertMatchesRebuild(matcher, queries)
+
+        with self.assertRaises(KeyError):
+            matcher.update_entry(5, "q", "a", [])
+
+        mapping = matcher.store.compact()
+        self.assertIsNone(mapping[5])
+        self.assertEqual(mapping[6], 5)
+        self.assertMatchesRebuild(matcher, queries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from fast_semantic_matcher import FastSemanticMatcher
+from kb_artifact import ArtifactError, MappedEntryStore, build_artifact
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+class TestKnowledgeBaseArtifact(unittest.TestCase):
+
+    def setUp(self):
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            self.training_data = json.load(f)
+        self.matcher = FastSemanticMatcher(self.training_data)
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.workdir.name, 'kb.kb')
+        self.checksum = build_artifact(self.matcher.store, self.path)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_round_trip_matches_in_memory_matcher(self):
+        store = MappedEntryStore(self.path, verify=True)
+        mapped = FastSemanticMatcher.from_store(store)
+
+        self.assertEqual(store.version, self.checksum[:16])
+        self.assertEqual(list(mapped.entries()), self.training_data)
+        for entry in self.training_data:
+            with self.subTest(question=entry['question']):
+                self.assertEqual(mapped.find_best_match(entry['question']),
+                                 self.matcher.find_best_match(entry['question']))
+
+    def test_first_edit_copies_the_artifact_store(self):
+        mapped = FastSemanticMatcher.from_store(MappedEntryStore(self.path))
+        mapped.add_entry("How do I schedule a gateway refresh?", "Add a refresh time.", ["gateway"])
+        self.matcher.add_entry("How do I schedule a gateway refresh?", "Add a refresh time.", ["gateway"])
+
+        copied, built = mapped.store, self.matcher.store
+        for name in ('questions', 'keywords', 'answer_ids', 'question_sizes', 'keyword_sizes', 'intents', 'flags',
+                     'intent_names', 'question_postings', 'keyword_postings'):
+            with self.subTest(name=name):
+                self.assertEqual(getattr(copied, name), getattr(built, name))
+        self.assertEqual(list(copied.answers), list(built.answers))
+        # Answers already in the artifact are still deduplicated
+        self.assertEqual(copied.answers.add(self.training_data[0]['answer']), copied.answer_ids[0])
+
+    def test_corrupt_artifact_rejected(self):
+        with open(self.path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b'\xff')
+        with self.assertRaises(ArtifactError):
+            MappedEntryStore(self.path, verify=True)
+
+    def test_truncated_artifact_rejected(self):
+        with open(self.path, 'r+b') as f:
+            f.truncate(64)
+        with self.assertRaises(ArtifactError):
+            MappedEntryStore(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from chatbot import EnhancedChatbot
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+NEW_QUESTION = "How do I schedule a gateway refresh?"
+NEW_ANSWER = "Open the dataset settings and add a refresh time."
+
+
+class TestKnowledgeBaseChangeLog(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.workdir.name, 'training_data.json')
+        shutil.copy(DATA_FILE, self.data_file)
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            self.training_data = json.load(f)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_changes_survive_restart(self):
+        chatbot = EnhancedChatbot(self.data_file)
+        entry_id = chatbot.add_entry(NEW_QUESTION, NEW_ANSWER, ["gateway", "refresh", "schedule"])
+        chatbot.update_entry(0, "hello", "Hi! Ask me anything about Power BI.", ["hello", "hi"])
+        chatbot.remove_entry(1)
+
+        restarted = EnhancedChatbot(self.data_file)
+        self.assertEqual(len(restarted.changes), 3)
+        self.assertEqual(restarted.matcher.store.entry(entry_id)['answer'], NEW_ANSWER)
+        self.assertEqual(restarted.get_response(NEW_QUESTION), (NEW_ANSWER, True))
+        self.assertEqual(restarted.get_response("hello")[0], "Hi! Ask me anything about Power BI.")
+        self.assertEqual(list(restarted.training_data), list(chatbot.training_data))
+
+    def test_compaction_rewrites_data_file(self):
+        chatbot = EnhancedChatbot(self.data_file)
+        chatbot.changes.compact_after = 1
+        chatbot.remove_entry(0)
+
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), self.training_data[1:])
+        self.assertEqual(len(chatbot.changes), 0)
+        self.assertEqual(chatbot.matcher.store.entry(0), self.training_data[1])
+
+        entry_id = chatbot.add_entry(NEW_QUESTION, NEW_ANSWER, ["gateway"])
+        self.assertEqual(entry_id, len(self.training_data) - 1)
+
+        restarted = EnhancedChatbot(self.data_file)
+        self.assertEqual(list(restarted.training_data), self.training_data[1:] + [
+            {'question': NEW_QUESTION, 'answer': NEW_ANSWER, 'keywords': ["gateway"]}])
+
+    def test_unwritable_data_file_is_not_compacted(self):
+        data_file = os.path.join(self.workdir.name, 'training_data.py')
+        with open(data_file, 'w', encoding='utf-8') as f:
+            f.write('training_data = ' + repr(self.training_data) + '\n')
+
+        chatbot = EnhancedChatbot(data_file)
+        self.assertFalse(chatbot.changes.compactable)
+        chatbot.changes.compact_after = 1
+        chatbot.remove_entry(0)
+        chatbot.add_entry(NEW_QUESTION, NEW_ANSWER, ["gateway"])
+
+        self.assertEqual(len(chatbot.changes), 2)
+        self.assertEqual(chatbot.get_response(NEW_QUESTION), (NEW_ANSWER, True))
+        restarted = EnhancedChatbot(data_file)
+        self.assertEqual(list(restarted.training_data), list(chatbot.training_data))
+
+    def test_log_for_rewritten_data_file_is_ignored(self):
+        chatbot = EnhancedChatbot(self.data_file)
+        chatbot.remove_entry(0)
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            json.dump(self.training_data[:5], f)
+
+        restarted = EnhancedChatbot(self.data_file)
+        self.assertEqual(len(restarted.changes), 0)
+        self.assertEqual(list(restarted.training_data), self.training_data[:5])
+
+    def test_torn_last_record_is_dropped(self):
+        chatbot = EnhancedChatbot(self.data_file)
+        chatbot.remove_entry(0)
+        with open(chatbot.changes.path, 'a', encoding='utf-8') as f:
+            f.write('{"op": "remove", "id"')
+
+        restarted = EnhancedChatbot(self.data_file)
+        self.assertEqual(len(restarted.changes), 1)
+        restarted.remove_entry(1)
+        self.assertEqual(len(EnhancedChatbot(self.data_file).changes), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
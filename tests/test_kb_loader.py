@@ -0,0 +1,65 @@
+import sys
+import os
+import csv
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from kb_loader import LoaderError, iter_entries, iter_json_array
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+class TestKnowledgeBaseLoader(unittest.TestCase):
+
+    def setUp(self):
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            self.training_data = json.load(f)
+        self.workdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.workdir.name, name)
+
+    def test_json_array_streams_across_chunk_boundaries(self):
+        self.assertEqual(list(iter_json_array(DATA_FILE, chunk_size=7)), self.training_data)
+
+    def test_all_formats_yield_the_same_entries(self):
+        with open(self.path('kb.jsonl'), 'w', encoding='utf-8') as f:
+            for entry in self.training_data:
+                f.write(json.dumps(entry) + '\n')
+
+        with open(self.path('kb.csv'), 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['question', 'answer', 'keywords'])
+            for entry in self.training_data:
+                writer.writerow([entry['question'], entry['answer'], ';'.join(entry['keywords'])])
+
+        with open(self.path('kb.py'), 'w', encoding='utf-8') as f:
+            f.write('training_data = ' + repr(self.training_data) + '\n')
+
+        for name in ('kb.jsonl', 'kb.csv', 'kb.py'):
+            with self.subTest(name=name):
+                self.assertEqual(list(iter_entries(self.path(name))), self.training_data)
+
+    def test_malformed_input_reports_location(self):
+        with open(self.path('bad.jsonl'), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.training_data[0]) + '\n{"question": "x"}\n')
+
+        entries = iter_entries(self.path('bad.jsonl'))
+        self.assertEqual(next(entries), self.training_data[0])
+        with self.assertRaisesRegex(LoaderError, r'bad\.jsonl:2'):
+            next(entries)
+
+    def test_missing_and_unknown_files(self):
+        with self.assertRaises(FileNotFoundError):
+            iter_entries(self.path('missing.json'))
+        with self.assertRaises(LoaderError):
+            iter_entries(self.path('kb.xml'))
+
+
+if __name__ == '__main__':
+    unittest.main()
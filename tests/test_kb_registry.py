@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from kb_registry import DEFAULT_KB, KnowledgeBaseRegistry, UnknownKnowledgeBase
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+def tenant_entries(name):
+    return [
+        {"question": f"What is {name}?", "answer": f"{name} answer", "keywords": [name, "what"]},
+        {"question": "hello", "answer": f"Hello from {name}", "keywords": ["hello", "hi"]},
+    ]
+
+
+class TestKnowledgeBaseRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        for name in ('powerbi', 'databricks', 'tooling'):
+            with open(os.path.join(self.workdir.name, name + '.json'), 'w', encoding='utf-8') as f:
+                json.dump(tenant_entries(name), f)
+        self.registry = KnowledgeBaseRegistry(self.workdir.name, default_data_file=DATA_FILE)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_named_knowledge_bases_are_separate(self):
+        self.assertEqual(self.registry.names(), ['databricks', DEFAULT_KB, 'powerbi', 'tooling'])
+        self.assertEqual(self.registry.get('powerbi').get_response("hello")[0], "Hello from powerbi")
+        self.assertEqual(self.registry.get('tooling').get_response("what is tooling")[0], "tooling answer")
+        self.assertEqual(len(self.registry.get().training_data), len(self.registry.get(DEFAULT_KB).training_data))
+
+    def test_loaded_lazily_once(self):
+        self.assertEqual(self.registry.loaded(), [])
+        chatbots = []
+        threads = [threading.Thread(target=lambda: chatbots.append(self.registry.get('powerbi')))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(chatbot) for chatbot in chatbots}), 1)
+        self.assertEqual(self.registry.loaded(), ['powerbi'])
+
+    def test_least_recently_used_evicted_over_budget(self):
+        first = self.registry.get('powerbi')
+        # Room for two of the (similarly sized) tenants, not three
+        self.registry.memory_budget = int(first.matcher.store.memory_usage() * 2.5)
+        self.registry.get('databricks')
+        self.registry.get('powerbi')
+        self.registry.get('tooling')
+
+        self.assertEqual(self.registry.loaded(), ['powerbi', 'tooling'])
+        self.assertEqual(self.registry.evictions, 1)
+        self.assertIs(self.registry.get('powerbi'), first)
+
+    def test_default_never_evicted(self):
+        self.registry.memory_budget = 1
+        self.registry.prepare()
+        self.registry.get('powerbi')
+        self.registry.get('tooling')
+
+        self.assertEqual(self.registry.loaded(), [DEFAULT_KB, 'tooling'])
+        self.assertTrue(self.registry.ready())
+
+    def test_unknown_names_rejected(self):
+        for name in ('missing', '../training_data', 'a/b'):
+            with self.subTest(name=name):
+                with self.assertRaises(UnknownKnowledgeBase):
+                    self.registry.get(name)
+
+
+if __name__ == "__main__":
+    unittest.main()
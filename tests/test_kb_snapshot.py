@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from chatbot import EnhancedChatbot
+from kb_snapshot import FileWatcher
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+QUESTION = "What is Power BI?"
+CORRECTED = "Power BI is Microsoft's business intelligence platform."
+
+
+class TestKnowledgeBaseReload(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.workdir.name, 'training_data.json')
+        shutil.copy(DATA_FILE, self.data_file)
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            self.training_data = json.load(f)
+        self.chatbot = EnhancedChatbot(self.data_file)
+
+    def tearDown(self):
+        self.chatbot.stop_watching()
+        self.workdir.cleanup()
+
+    def write_corrected_data(self):
+        corrected = [dict(entry) for entry in self.training_data]
+        for entry in corrected:
+            if entry['question'] == QUESTION:
+                entry['answer'] = CORRECTED
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            json.dump(corrected, f)
+
+    def test_reload_publishes_new_version(self):
+        old = self.chatbot.snapshot
+        original = self.chatbot.get_response(QUESTION)
+        self.assertNotEqual(original[0], CORRECTED)
+
+        self.write_corrected_data()
+        new = self.chatbot.reload(wait=True)
+
+        self.assertIsNot(new, old)
+        self.assertNotEqual(new.version, old.version)
+        self.assertEqual(self.chatbot.get_response(QUESTION), (CORRECTED, True))
+        # Requests holding the old snapshot still see the old data
+        self.assertEqual(old.matcher.get_response(QUESTION), original)
+
+    def test_failed_reload_keeps_serving(self):
+        old = self.chatbot.snapshot
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            f.write('[{"question": ')
+
+        self.assertIs(self.chatbot.reload(wait=True), old)
+        self.assertIsNotNone(self.chatbot.last_reload_error)
+        self.assertTrue(self.chatbot.get_response(QUESTION)[1])
+
+    def test_response_cache_is_keyed_by_version(self):
+        self.chatbot.get_response(QUESTION)
+        self.chatbot.get_response("  what is POWER bi? ")
+        self.assertEqual(self.chatbot.response_cache.hits, 1)
+
+        version = self.chatbot.snapshot.version
+        self.chatbot.add_entry("How do I export to Excel?", "Use Analyze in Excel.", ["export", "excel"])
+        self.assertEqual(self.chatbot.snapshot.version, version + '+1')
+        self.chatbot.get_response(QUESTION)
+        self.assertEqual(self.chatbot.response_cache.hits, 1)
+
+    def test_edits_leave_held_snapshots_unchanged(self):
+        old = self.chatbot.snapshot
+        original = self.chatbot.get_response(QUESTION)
+        entry_id = old.matcher.best_entry_id(QUESTION)
+        count = len(old.matcher.store)
+
+        self.chatbot.update_entry(entry_id, QUESTION, CORRECTED, ["power", "bi"])
+        self.chatbot.add_entry("How do I export to Excel?", "Use Analyze in Excel.", ["export", "excel"])
+        self.chatbot.remove_entry(0 if entry_id else 1)
+
+        self.assertEqual(self.chatbot.get_response(QUESTION), (CORRECTED, True))
+        self.assertEqual(old.matcher.get_response(QUESTION), original)
+        self.assertEqual(old.matcher.store.answer(entry_id), original[0])
+        self.assertEqual(len(old.matcher.store), count)
+        self.assertEqual(json.loads(old.bodies.get(entry_id).body)['response'], original[0])
+
+    def test_watcher_triggers_on_change(self):
+        calls = []
+        watcher = FileWatcher([self.data_file], lambda: calls.append(1))
+        self.assertFalse(watcher.check())
+        self.write_corrected_data()
+        os.utime(self.data_file, ns=(0, 1))
+        self.assertTrue(watcher.check())
+        self.assertFalse(watcher.check())
+        self.assertEqual(calls, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import unittest
+from near_duplicates import NearDuplicateFinder
+from merge_training_data import merge_entries
+
+
+class TestNearDuplicates(unittest.TestCase):
+
+    def test_groups_similar_questions(self):
+        finder = NearDuplicateFinder(threshold=0.6)
+        finder.add('a', "How can I cancel a dataflow refresh that won't stop?")
+        finder.add('b', "how can I cancel a dataflow refresh that won't stop")
+        finder.add('c', "What is Python?")
+        self.assertEqual(finder.groups(), [['a', 'b'], ['c']])
+
+    def test_merge_keeps_priority_answer_and_flags_conflict(self):
+        pdf = [{"question": "Why did my Sales Cockpit report fail to refresh?",
+                "answer": "It was due to a gateway version update.",
+                "keywords": ["gateway"]}]
+        current = [{"question": "why did my sales cockpit report fail to refresh",
+                    "answer": "Restart your computer and try again later.",
+                    "keywords": ["sales", "cockpit"]},
+                   {"question": "What is Python?", "answer": "A language.", "keywords": ["python"]}]
+
+        merged, report = merge_entries([('pdf', pdf), ('current', current)])
+
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(merged[0]['answer'], pdf[0]['answer'])
+        self.assertEqual(merged[0]['keywords'], ['gateway', 'sales', 'cockpit'])
+        self.assertEqual(len(report['conflicts']), 1)
+
+    def test_similar_questions_with_different_answers_kept_apart(self):
+        entries = [{"question": "How can I connect Hive server to Power BI?",
+                    "answer": "Use Cloudera drivers.", "keywords": []},
+                   {"question": "How can I connect Power BI Server to Azure Databricks?",
+                    "answer": "Use the Azure Databricks connector.", "keywords": []}]
+
+        merged, report = merge_entries([('current', entries)])
+
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(len(report['review']), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from chatbot import EnhancedChatbot
+from persistent_cache import PersistentResultCache
+from response_cache import NO_MATCH
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+class TestPersistentResultCache(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.workdir = workdir.name
+        self.path = os.path.join(self.workdir, 'results.sqlite')
+
+    def open(self, **kwargs):
+        cache = PersistentResultCache(self.path, flush_interval=60, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_results_survive_a_restart(self):
+        cache = self.open()
+        cache.put('v1', 'what is power bi', 3)
+        cache.put('v1', 'gibberish', NO_MATCH)
+        # Queued results are already visible to this process
+        self.assertEqual(cache.get('v1', 'what is power bi'), 3)
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+        restarted = self.open()
+        self.assertEqual(restarted.get('v1', 'what is power bi'), 3)
+        self.assertEqual(restarted.get('v1', 'gibberish'), NO_MATCH)
+        self.assertIsNone(restarted.get('v2', 'what is power bi'))
+        self.assertEqual((restarted.hits, restarted.misses), (2, 1))
+
+    def test_shared_between_processes(self):
+        cache = self.open()
+        cache.put('v1', 'parent', 1)
+        cache.flush()
+        pid = os.fork()
+        if pid == 0:
+            # A forked worker opens its own connection and writer thread
+            code = 0 if cache.get('v1', 'parent') == 1 else 1
+            cache.put('v1', 'child', 2)
+            cache.close()
+            os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(cache.get('v1', 'child'), 2)
+
+    def test_eviction_keeps_the_most_recently_used(self):
+        cache = self.open(max_entries=3)
+        for i in range(5):
+            cache._queue('v1', f'query {i}', i, 1000.0 + i)
+        cache.flush()
+        self.assertEqual(cache.evict(), 2)
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get('v1', 'query 1'))
+        self.assertEqual(cache.get('v1', 'query 4'), 4)
+
+    def test_chatbots_share_matches(self):
+        data_file = os.path.join(self.workdir, 'training_data.json')
+        shutil.copy(DATA_FILE, data_file)
+        first = EnhancedChatbot(data_file, result_cache=self.open())
+        answer = first.get_response('What is Power BI?')
+        first.result_cache.close()
+
+        second = EnhancedChatbot(data_file, result_cache=self.open())
+        with mock.patch.object(second.matcher, 'best_entry_id') as match:
+            self.assertEqual(second.get_response('what is power bi'), answer)
+        match.assert_not_called()
+
+        # An id the local knowledge base does not have is matched again
+        key = second._cache_key(second.snapshot, 'What is DAX?')
+        second.result_cache.put(second.snapshot.version, key, 10 ** 6)
+        self.assertIsNotNone(second._match('What is DAX?')[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
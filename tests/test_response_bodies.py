@@ -0,0 +1,115 @@
+import sys
+import os
+import gzip
+import json
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from chat_api import encode
+from chatbot import EnhancedChatbot
+from fast_semantic_matcher import FastSemanticMatcher
+from response_bodies import ResponseBodies
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+ENTRIES = [
+    {"question": "what is power bi", "answer": "<b>Power BI</b> " + "dashboards and reports " * 80,
+     "keywords": ["power", "bi"]},
+    {"question": "what is dax", "answer": "DAX is the formula language of Power BI.", "keywords": ["dax"]},
+    {"question": "what is a gateway", "answer": "A gateway connects on-premises data.", "keywords": ["gateway"]},
+]
+
+
+class TestResponseBodies(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = FastSemanticMatcher(ENTRIES)
+
+    def test_bodies_are_the_json_of_each_answer(self):
+        bodies = ResponseBodies(self.matcher)
+        self.assertTrue(bodies.precomputed)
+        for entry_id, entry in enumerate(ENTRIES):
+            self.assertEqual(json.loads(bodies.get(entry_id).body), {'response': entry['answer'], 'status': 'success'})
+        self.assertEqual(json.loads(bodies.get(None).body)['response'], self.matcher.get_fallback_response())
+        self.assertIs(bodies.get(1), bodies.get(1))
+
+    def test_long_answers_have_a_gzip_variant(self):
+        bodies = ResponseBodies(self.matcher)
+        long, short = bodies.get(0), bodies.get(1)
+        self.assertIsNone(short.gzipped)
+        self.assertEqual(gzip.decompress(long.gzipped), long.body)
+
+        payload, headers = encode(long, 'gzip, deflate')
+        self.assertEqual(payload, long.gzipped)
+        self.assertEqual(dict(headers), {'Vary': 'Accept-Encoding', 'Content-Encoding': 'gzip'})
+        self.assertEqual(encode(long, None), (long.body, [('Vary', 'Accept-Encoding')]))
+        self.assertEqual(encode(short, 'gzip'), (short.body, []))
+        self.assertEqual(encode({'error': 'x'}), (b'{"error": "x"}', []))
+
+    def test_large_knowledge_bases_encode_on_first_use(self):
+        bodies = ResponseBodies(self.matcher, precompute_limit=1, cache_size=2)
+        self.assertFalse(bodies.precomputed)
+        self.assertEqual(bodies.stats()['encoded'], 0)
+        for entry_id in (0, 1, 0, 2):
+            bodies.get(entry_id)
+        self.assertEqual(list(bodies._bodies), [0, 2])
+
+
+class TestChatbotResponseBodies(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.data_file = os.path.join(workdir.name, 'training_data.json')
+        shutil.copy(DATA_FILE, self.data_file)
+        self.chatbot = EnhancedChatbot(self.data_file)
+
+    def test_body_matches_get_response(self):
+        for question in ("What is Power BI?", "hi", "completely unrelated words"):
+            body = json.loads(self.chatbot.get_response_body(question).body)
+            self.assertEqual(body['response'], self.chatbot.get_response(question)[0])
+        self.assertEqual(len(self.chatbot.conversation_history), 6)
+
+    def test_edits_publish_fresh_bodies(self):
+        entry_id = self.chatbot.matcher.best_entry_id("What is Power BI?")
+        self.chatbot.update_entry(entry_id, "What is Power BI?", "Edited answer.", ["power", "bi"])
+        body = json.loads(self.chatbot.get_response_body("What is Power BI?").body)
+        self.assertEqual(body['response'], "Edited answer.")
+
+    def test_edits_reencode_only_changed_entries(self):
+        before = self.chatbot.snapshot.bodies
+        self.chatbot.update_entry(0, "hello", "Hi! Ask me anything about Power BI.", ["hello", "hi"])
+        after = self.chatbot.snapshot.bodies
+        self.assertIsNot(after.get(0), before.get(0))
+        self.assertIs(after.get(1), before.get(1))
+
+    def test_older_snapshot_does_not_see_entries_added_later(self):
+        old = self.chatbot.snapshot
+        entry_id = self.chatbot.add_entry("How do I schedule a gateway refresh?",
+                                          "Open the dataset settings and add a refresh time.", ["gateway"])
+        self.assertFalse(old.matcher.store.is_live(entry_id))
+        body = self.chatbot.get_response_body("How do I schedule a gateway refresh?", snapshot=old)
+        self.assertNotEqual(json.loads(body.body)['response'], "Open the dataset settings and add a refresh time.")
+        body = self.chatbot.get_response_body("How do I schedule a gateway refresh?")
+        self.assertEqual(json.loads(body.body)['response'], "Open the dataset settings and add a refresh time.")
+
+    def test_older_snapshot_keeps_its_ids_after_compaction(self):
+        self.chatbot.changes.compact_after = 2
+        self.chatbot.remove_entry(0)
+        old = self.chatbot.snapshot
+        expected = {entry_id: old.matcher.store.answer(entry_id) for entry_id in old.matcher.store.entry_ids()}
+
+        self.chatbot.update_entry(3, "What is Power BI Desktop?", "A free Windows application.", ["desktop"])
+        self.assertEqual(len(self.chatbot.changes), 0)
+        self.assertIsNot(self.chatbot.matcher, old.matcher)
+        self.assertEqual(self.chatbot.matcher.store.answer(2), "A free Windows application.")
+
+        # Requests still holding the old snapshot get that snapshot's answers
+        for entry_id, answer in expected.items():
+            self.assertEqual(json.loads(old.bodies.get(entry_id).body)['response'], answer)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+import chat_api
+from kb_registry import KnowledgeBaseRegistry
+from sessions import MAX_TURN_CHARS, SESSION_COOKIE, SessionStore, session_id_from
+
+# No greeting, how or what words: entry intents do not depend on word order
+ENTRIES = [
+    {'question': 'Connect Power BI to Hive', 'answer': 'Install the Hive ODBC driver.',
+     'keywords': ['hive', 'connect']},
+    {'question': 'Connect Power BI to Hive with Kerberos', 'answer': 'Configure the Kerberos realm.',
+     'keywords': ['hive', 'kerberos', 'connect']},
+    {'question': 'hello', 'answer': 'Hi there!', 'keywords': ['hello']},
+]
+
+SESSION_A = 'a' * 22
+SESSION_B = 'b' * 22
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSessionStore(unittest.TestCase):
+
+    def test_idle_sessions_expire(self):
+        clock = FakeClock()
+        store = SessionStore(ttl=60, clock=clock)
+        first = store.get(SESSION_A)
+        first.record('default', 'hello', 2)
+        clock.now += 30
+        store.get(SESSION_B)
+        clock.now += 45
+        # A was idle for 75s, B for 45s
+        self.assertNotIn(SESSION_A, store)
+        self.assertIn(SESSION_B, store)
+        self.assertIs(store.get(SESSION_B), store.get(SESSION_B))
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.stats()['expired'], 1)
+
+        again = store.get(SESSION_A)
+        self.assertIsNot(again, first)
+        self.assertEqual(len(again.turns), 0)
+
+    def test_sessions_and_turns_are_capped(self):
+        store = SessionStore(max_turns=3, max_sessions=2)
+        for i in range(5):
+            store.get(f"session-{i:012d}")
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.stats()['evicted'], 3)
+        self.assertIn('session-000000000004', store)
+
+        session = store.get(SESSION_A)
+        for i in range(10):
+            session.record('default', f"question {i} " + 'x' * 1000, None)
+        self.assertEqual(len(session.turns), 3)
+        self.assertEqual(session.turns[-1][1][:11], 'question 9 ')
+        self.assertEqual(len(session.turns[-1][1]), MAX_TURN_CHARS)
+
+    def test_previous_turn_is_per_knowledge_base(self):
+        session = SessionStore().get(SESSION_A)
+        session.record('default', 'connect to hive', 0)
+        session.record('other', 'something else', None)
+        self.assertEqual(session.previous('default'), ('connect to hive', 0))
+        self.assertIsNone(session.previous('other'))
+        self.assertIsNone(session.previous('missing'))
+
+    def test_session_id_from_header_or_cookie(self):
+        self.assertEqual(session_id_from(None, SESSION_A), SESSION_A)
+        self.assertEqual(session_id_from(f'theme=dark; {SESSION_COOKIE}={SESSION_B}', None), SESSION_B)
+        self.assertEqual(session_id_from(f'{SESSION_COOKIE}={SESSION_B}', SESSION_A), SESSION_A)
+        self.assertIsNone(session_id_from(f'{SESSION_COOKIE}=short', 'bad id; with spaces'))
+        self.assertIsNone(session_id_from(None, None))
+
+
+class TestSessionChat(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        data_file = os.path.join(workdir.name, 'training_data.json')
+        with open(data_file, 'w', encoding='utf-8') as f:
+            json.dump(ENTRIES, f)
+        self.registry = KnowledgeBaseRegistry(default_data_file=data_file, sessions=SessionStore())
+        self.fallback = self.registry.get().matcher.get_fallback_response()
+
+    def ask(self, message, session_id=None):
+        status, body = chat_api.chat(self.registry, {}, {'message': message}, session_id)
+        self.assertEqual(status, 200)
+        return json.loads(chat_api.encode(body)[0])['response']
+
+    def test_new_session_is_handed_to_the_client(self):
+        session_id, headers = chat_api.chat_session(self.registry, None, None)
+        headers = dict(headers)
+        self.assertEqual(headers['X-Session-Id'], session_id)
+        self.assertTrue(headers['Set-Cookie'].startswith(f'{SESSION_COOKIE}={session_id};'))
+        self.assertIn('HttpOnly', headers['Set-Cookie'])
+
+        self.assertEqual(chat_api.chat_session(self.registry, f'{SESSION_COOKIE}={session_id}', None),
+                         (session_id, []))
+        self.assertEqual(chat_api.chat_session(None, None, None), (None, []))
+
+    def test_follow_up_matched_with_previous_question(self):
+        follow_up = 'what if we use kerberos'
+        self.assertEqual(self.ask(follow_up), self.fallback)
+
+        self.assertEqual(self.ask('Connect Power BI to Hive', SESSION_A), 'Install the Hive ODBC driver.')
+        self.assertEqual(self.ask(follow_up, SESSION_A), 'Configure the Kerberos realm.')
+
+        # Another user's conversation gives no context
+        self.assertEqual(self.ask(follow_up, SESSION_B), self.fallback)
+
+        stats = self.registry.stats()['sessions']
+        self.assertEqual(stats['active'], 2)
+
+    def test_follow_up_does_not_repeat_previous_answer(self):
+        self.ask('Connect Power BI to Hive', SESSION_A)
+        self.assertEqual(self.ask('ok thanks', SESSION_A), self.fallback)
+        session = self.registry.sessions.get(SESSION_A)
+        self.assertEqual([turn[2] for turn in session.turns], [0, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,278 @@
+import sys
+import os
+import re
+import gzip
+import json
+import signal
+import socket
+import subprocess
+import http.client
+import threading
+import http.server
+import urllib.error
+import urllib.request
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import unittest
+import simple_server
+from simple_server import ChatbotRequestHandler, PooledHTTPServer
+
+
+class BlockingHandler(http.server.BaseHTTPRequestHandler):
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def do_GET(self):
+        self.started.release()
+        self.release.wait(5)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPooledHTTPServer(unittest.TestCase):
+
+    def serve(self, handler, workers, queue_depth):
+        server = PooledHTTPServer(('127.0.0.1', 0), handler, workers, queue_depth)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+    def test_full_queue_gets_fast_503(self):
+        BlockingHandler.release.clear()
+        server, url = self.serve(BlockingHandler, workers=1, queue_depth=1)
+        results = []
+
+        def fetch():
+            with urllib.request.urlopen(url, timeout=10) as response:
+                results.append(response.status)
+
+        busy = threading.Thread(target=fetch)
+        busy.start()
+        self.assertTrue(BlockingHandler.started.acquire(timeout=5))
+        queued = socket.create_connection(server.server_address)
+        queued.sendall(b'GET / HTTP/1.0\r\n\r\n')
+
+        # Wait until the second connection sits in the queue
+        for _ in range(100):
+            if server.pending.qsize() == 1:
+                break
+            threading.Event().wait(0.02)
+
+        with self.assertRaises(urllib.error.HTTPError) as rejected:
+            urllib.request.urlopen(url, timeout=5)
+        self.assertEqual(rejected.exception.code, 503)
+        self.assertEqual(rejected.exception.headers['Retry-After'], '1')
+        self.assertEqual(server.rejected, 1)
+
+        BlockingHandler.release.set()
+        busy.join()
+        self.assertIn(b'200', queued.recv(1024))
+        queued.close()
+        self.assertEqual(results, [200])
+
+    def test_concurrent_chat_requests(self):
+        server, url = self.serve(ChatbotRequestHandler, workers=4, queue_depth=16)
+        quiet = mock.patch.object(ChatbotRequestHandler, 'log_message')
+        quiet.start()
+        self.addCleanup(quiet.stop)
+        chatbot = simple_server.registry.get()
+        before = len(chatbot.conversation_history)
+        answers = []
+
+        def chat():
+            request = urllib.request.Request(url + '/chat', data=json.dumps({'message': 'What is Power BI?'}).encode(),
+                                             headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(request, timeout=10) as response:
+                answers.append(json.loads(response.read())['response'])
+
+        threads = [threading.Thread(target=chat) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(answers), 12)
+        self.assertEqual(len(set(answers)), 1)
+        self.assertEqual(len(chatbot.conversation_history) - before, 12)
+
+    def test_wrongly_typed_fields_get_a_400(self):
+        server, url = self.serve(ChatbotRequestHandler, workers=1, queue_depth=4)
+        quiet = mock.patch.object(ChatbotRequestHandler, 'log_message')
+        quiet.start()
+        self.addCleanup(quiet.stop)
+
+        for body in ({'message': 5}, {'message': 'hi', 'kb': 5}):
+            with self.subTest(body=body):
+                request = urllib.request.Request(url + '/chat', data=json.dumps(body).encode(),
+                                                 headers={'Content-Type': 'application/json'})
+                with self.assertRaises(urllib.error.HTTPError) as rejected:
+                    urllib.request.urlopen(request, timeout=5)
+                self.assertEqual(rejected.exception.code, 400)
+                self.assertIn('must be a string', json.loads(rejected.exception.read())['error'])
+
+    def test_health_and_readiness(self):
+        server, url = self.serve(ChatbotRequestHandler, workers=2, queue_depth=4)
+        quiet = mock.patch.object(ChatbotRequestHandler, 'log_message')
+        quiet.start()
+        self.addCleanup(quiet.stop)
+
+        with urllib.request.urlopen(url + '/healthz', timeout=5) as response:
+            self.assertEqual(json.loads(response.read()), {'status': 'ok'})
+        snapshot = simple_server.registry.get().snapshot
+        with urllib.request.urlopen(url + '/readyz', timeout=5) as response:
+            ready = json.loads(response.read())
+        self.assertEqual((ready['status'], ready['kb_version']), ('ready', snapshot.version))
+
+    def test_chat_session_handed_out_once(self):
+        server, _ = self.serve(ChatbotRequestHandler, workers=1, queue_depth=4)
+        quiet = mock.patch.object(ChatbotRequestHandler, 'log_message')
+        quiet.start()
+        self.addCleanup(quiet.stop)
+        connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+        self.addCleanup(connection.close)
+        body = json.dumps({'message': 'What is Power BI?'})
+
+        connection.request('POST', '/chat', body=body, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        session_id = response.headers['X-Session-Id']
+        self.assertIn(f'chatbot_session={session_id};', response.headers['Set-Cookie'])
+
+        connection.request('POST', '/chat', body=body, headers={'Content-Type': 'application/json',
+                                                                 'Cookie': f'chatbot_session={session_id}'})
+        response = connection.getresponse()
+        response.read()
+        self.assertIsNone(response.headers['Set-Cookie'])
+        self.assertEqual(len(simple_server.registry.sessions.get(session_id).turns), 2)
+
+    def test_requests_share_one_connection(self):
+        server, _ = self.serve(ChatbotRequestHandler, workers=2, queue_depth=4)
+        quiet = mock.patch.object(ChatbotRequestHandler, 'log_message')
+        quiet.start()
+        self.addCleanup(quiet.stop)
+        connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+        self.addCleanup(connection.close)
+
+        connection.request('OPTIONS', '/chat', headers={'Origin': 'http://example.com',
+                                                        'Access-Control-Request-Method': 'POST'})
+        response = connection.getresponse()
+        self.assertEqual(response.read(), b'')
+        self.assertEqual(response.headers['Access-Control-Max-Age'], '86400')
+        self.assertEqual(response.headers['Content-Length'], '0')
+        sock = connection.sock
+
+        for method, path, body in [('POST', '/chat', json.dumps({'message': 'What is Power BI?'})),
+                                   ('GET', '/stats', None), ('GET', '/', None), ('GET', '/missing.html', None)]:
+            connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            payload = response.read()
+            self.assertEqual(int(response.headers['Content-Length']), len(payload))
+            if path != '/missing.html':
+                self.assertEqual(response.status, 200)
+                self.assertEqual(response.headers['Connection'], 'keep-alive')
+                self.assertIs(connection.sock, sock)
+        # Errors close the connection
+        self.assertEqual(response.status, 404)
+        self.assertEqual(response.headers['Connection'], 'close')
+
+    def test_interface_served_from_memory(self):
+        server, _ = self.serve(ChatbotRequestHandler, workers=1, queue_depth=4)
+        quiet = mock.patch.object(ChatbotRequestHandler, 'log_message')
+        quiet.start()
+        self.addCleanup(quiet.stop)
+        connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+        self.addCleanup(connection.close)
+
+        connection.request('GET', '/', headers={'Accept-Encoding': 'gzip'})
+        response = connection.getresponse()
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn(b'<html', gzip.decompress(response.read()).lower())
+
+        connection.request('GET', '/simple_interface.html', headers={'If-None-Match': response.headers['ETag']})
+        response = connection.getresponse()
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.read(), b'')
+        self.assertEqual(response.headers['Connection'], 'keep-alive')
+
+    def test_stats_stream_does_not_hold_a_worker(self):
+        server, url = self.serve(ChatbotRequestHandler, workers=1, queue_depth=4)
+        quiet = mock.patch.object(ChatbotRequestHandler, 'log_message')
+        quiet.start()
+        self.addCleanup(quiet.stop)
+        stream = urllib.request.urlopen(url + '/stats/stream', timeout=10)
+        self.addCleanup(stream.close)
+        self.assertEqual(stream.headers['Content-Type'], 'text/event-stream')
+        self.assertEqual(stream.readline(), b'retry: 5000\n')
+        stream.readline()
+        first = json.loads(stream.readline()[len(b'data: '):])
+
+        # The only worker is free again, so a chat still gets through
+        request = urllib.request.Request(url + '/chat', data=json.dumps({'message': 'What is DAX?'}).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        urllib.request.urlopen(request, timeout=10).read()
+
+        line = stream.readline()
+        while not line.startswith(b'data: '):
+            line = stream.readline()
+        self.assertEqual(json.loads(line[len(b'data: '):])['total_questions'], first['total_questions'] + 1)
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'pre-fork mode needs fork()')
+class TestPreforkServer(unittest.TestCase):
+
+    def setUp(self):
+        script = os.path.join(os.path.dirname(__file__), '..', 'simple_server.py')
+        self.process = subprocess.Popen([sys.executable, '-u', script, '--port', '0', '--processes', '2',
+                                         '--workers', '2'],
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        self.addCleanup(self.process.kill)
+        self.addCleanup(self.process.stdout.close)
+        for line in self.process.stdout:
+            found = re.search(r'localhost:(\d+)', line)
+            if found:
+                self.url = f'http://127.0.0.1:{found.group(1)}'
+                break
+        else:
+            self.fail('server did not start')
+
+    def worker_pids(self, requests=40):
+        pids = set()
+        for _ in range(requests):
+            for _ in range(50):
+                try:
+                    with urllib.request.urlopen(self.url + '/stats', timeout=5) as response:
+                        pids.add(json.loads(response.read())['server']['pid'])
+                    break
+                except (urllib.error.URLError, ConnectionError):
+                    threading.Event().wait(0.1)
+        return pids
+
+    def test_crashed_worker_is_restarted(self):
+        pids = self.worker_pids()
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(self.process.pid, pids)
+
+        crashed = pids.pop()
+        os.kill(crashed, signal.SIGKILL)
+        for _ in range(50):
+            current = self.worker_pids(10)
+            if crashed not in current and len(current - pids) == 1:
+                break
+            threading.Event().wait(0.2)
+        self.assertNotIn(crashed, current)
+        self.assertEqual(len(current - pids), 1)
+
+        self.process.send_signal(signal.SIGTERM)
+        self.assertEqual(self.process.wait(timeout=30), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import sys
+import os
+import re
+import subprocess
+
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Cumulative -X importtime budget of each entry point, in milliseconds;
+# importing must not load a knowledge base or start any work
+IMPORT_BUDGET_MS = 150
+
+
+def import_time(module):
+    """Microseconds to import a module in a fresh interpreter (best of 3, bytecode cached)"""
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, 'src'))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    times = []
+    for _ in range(4):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+        found = re.search(r'^import time:\s+\d+ \|\s+(\d+) \| ' + re.escape(module) + '$', result.stderr, re.M)
+        times.append(int(found.group(1)))
+    # The first run may have compiled the bytecode
+    return min(times[1:])
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_time_budget(self):
+        for module in ('chatbot', 'simple_server', 'async_server'):
+            with self.subTest(module=module):
+                self.assertLess(import_time(module) / 1000, IMPORT_BUDGET_MS)
+
+    def test_importing_a_server_does_no_work(self):
+        script = ('import sys, simple_server, async_server; '
+                  'print(simple_server.registry.loaded(), "difflib" in sys.modules)')
+        result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.stdout, '[] False\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import os
+import gzip
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from static_assets import StaticAssetCache, accepts_gzip
+
+
+class TestStaticAssetCache(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.root = workdir.name
+        self.page = os.path.join(self.root, 'page.html')
+        self.write(self.page, '<html>' + 'chat ' * 500 + '</html>')
+        self.write(os.path.join(self.root, 'notes.txt'), 'not an asset')
+        self.cache = StaticAssetCache(self.root, watch=False)
+
+    def write(self, path, text):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_gzip_and_identity_variants(self):
+        self.assertIsNone(self.cache.get('/notes.txt'))
+        asset = self.cache.get('/page.html')
+
+        status, headers, body = asset.response('gzip, deflate, br')
+        headers = dict(headers)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), asset.body)
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+
+        for refused in (None, 'identity', 'gzip;q=0, identity', 'br'):
+            status, headers, body = asset.response(refused)
+            self.assertNotIn('Content-Encoding', dict(headers))
+            self.assertEqual(body, asset.body)
+
+    def test_if_none_match_gives_304(self):
+        asset = self.cache.get('/page.html')
+        for etag in (asset.etag, asset.gzip_etag, 'W/' + asset.etag, '"other", ' + asset.etag, '*'):
+            status, headers, body = asset.response('gzip', etag)
+            self.assertEqual(status, 304)
+            self.assertEqual(body, b'')
+            self.assertNotIn('Content-Length', dict(headers))
+        self.assertEqual(asset.response('gzip', '"stale"')[0], 200)
+
+    def test_reloaded_when_file_changes(self):
+        old = self.cache.get('/page.html')
+        self.cache.start_watching()
+        self.addCleanup(self.cache.stop_watching)
+        self.write(self.page, '<html>edited</html>')
+        os.utime(self.page, ns=(0, 10 ** 18))
+        self.assertTrue(self.cache.watcher.check())
+
+        new = self.cache.get('/page.html')
+        self.assertEqual(new.body, b'<html>edited</html>')
+        self.assertNotEqual(new.etag, old.etag)
+        self.assertEqual(new.response(None, old.etag)[0], 200)
+
+        os.remove(self.page)
+        self.cache.watcher.check()
+        self.assertIsNone(self.cache.get('/page.html'))
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip('gzip'))
+        self.assertTrue(accepts_gzip('br;q=1.0, gzip;q=0.8'))
+        self.assertTrue(accepts_gzip('*'))
+        self.assertFalse(accepts_gzip('*, gzip;q=0'))
+        self.assertFalse(accepts_gzip(''))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import socket
+import itertools
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from stats_stream import HEARTBEAT, STREAM_START, StatsBroadcaster, event, event_stream
+
+
+class TestStatsStream(unittest.TestCase):
+
+    def test_event_stream_sends_changes_and_heartbeats(self):
+        payloads = iter([b'{"n": 1}', b'{"n": 1}', b'{"n": 2}', None, b'{"n": 2}'])
+        with mock.patch('stats_stream.time.sleep'):
+            chunks = list(itertools.islice(event_stream(lambda: next(payloads), interval=1, heartbeat=2), 3))
+        self.assertEqual(chunks,
+                         [STREAM_START + event(b'{"n": 1}'), event(b'{"n": 2}'), HEARTBEAT])
+
+    def test_broadcaster_pushes_to_subscribers(self):
+        stats = {'default': b'{"n": 1}', 'hr': b'{"n": 7}'}
+        broadcaster = StatsBroadcaster(lambda kb: stats[kb or 'default'], interval=1, heartbeat=3)
+        self.addCleanup(broadcaster.close)
+        server_side, client = socket.socketpair()
+        hr_server_side, hr_client = socket.socketpair()
+        self.addCleanup(client.close)
+        self.addCleanup(hr_client.close)
+        broadcaster._thread = mock.Mock()  # push() is driven by hand
+        broadcaster.subscribe(server_side, None, stats['default'])
+        broadcaster.subscribe(hr_server_side, 'hr', stats['hr'])
+        self.assertEqual(len(broadcaster), 2)
+        client.settimeout(1)
+        hr_client.settimeout(0.1)
+
+        stats['default'] = b'{"n": 2}'
+        broadcaster.push()
+        self.assertEqual(client.recv(100), event(b'{"n": 2}'))
+        with self.assertRaises(socket.timeout):
+            hr_client.recv(100)
+
+        broadcaster.push()
+        broadcaster.push()
+        self.assertEqual(hr_client.recv(100), HEARTBEAT)
+
+        # Nothing to render (knowledge base not in memory): no event, heartbeats go on
+        stats['default'] = None
+        broadcaster.push()
+        broadcaster.push()
+        broadcaster.push()
+        self.assertEqual(client.recv(100), HEARTBEAT)
+
+        client.close()
+        stats['default'] = b'{"n": 3}'
+        for _ in range(3):
+            stats['default'] += b' '
+            broadcaster.push()
+        self.assertEqual(len(broadcaster), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
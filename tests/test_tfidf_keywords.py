@@ -0,0 +1,72 @@
+import sys
+import os
+import copy
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import unittest
+
+try:
+    import tfidf_keywords
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+ENTRIES = [
+    {'question': 'How do I refresh a Power BI dataset?', 'answer': 'Schedule the refresh in the service.',
+     'keywords': ['refresh']},
+    {'question': 'How do I connect Power BI to Hive?', 'answer': 'Install the Hive ODBC driver.',
+     'keywords': []},
+    {'question': 'Why does my gateway go offline?', 'answer': 'Restart the gateway service.',
+     'keywords': ['gateway', 'offline']},
+    {'question': 'Can Power BI read Excel files?', 'answer': 'Yes, use Get Data and pick Excel.',
+     'keywords': []},
+]
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy is required for TF-IDF keywords")
+class TestTfidfKeywords(unittest.TestCase):
+
+    def assign(self, **kwargs):
+        return tfidf_keywords.assign_keywords(copy.deepcopy(ENTRIES), **kwargs)
+
+    def test_assignment_is_deterministic(self):
+        first = self.assign()
+        self.assertEqual(first, self.assign())
+        # Entry order does not change which keywords an entry gets
+        reversed_result = tfidf_keywords.assign_keywords(copy.deepcopy(ENTRIES[::-1]))
+        self.assertEqual(first, reversed_result[::-1])
+
+        hive = first[1]['keywords']
+        self.assertIn('hive', hive)
+        self.assertEqual(hive[0], 'hive')
+        for keywords in (entry['keywords'] for entry in first):
+            self.assertTrue(keywords)
+            self.assertFalse(set(keywords) & tfidf_keywords.STOP_WORDS)
+
+    def test_common_terms_dropped_by_max_df(self):
+        # 'power bi' is in three of four entries
+        keywords = [term for entry in self.assign(max_df=0.5) for term in entry['keywords']]
+        self.assertNotIn('power', keywords)
+        self.assertNotIn('power bi', keywords)
+
+        keywords = [term for entry in self.assign(max_df=1.0) for term in entry['keywords']]
+        self.assertIn('power', keywords)
+
+    def test_limits_per_entry(self):
+        for entry in self.assign(max_terms=2, max_bigrams=1):
+            bigrams = [term for term in entry['keywords'] if ' ' in term]
+            self.assertLessEqual(len(bigrams), 1)
+            self.assertLessEqual(len(entry['keywords']) - len(bigrams), 2)
+
+    def test_keep_existing(self):
+        generated = self.assign()
+        kept = self.assign(keep_existing=True)
+        for original, new, both in zip(ENTRIES, generated, kept):
+            self.assertEqual(both['keywords'][:len(original['keywords'])], original['keywords'])
+            self.assertEqual(len(both['keywords']), len(set(both['keywords'])))
+            self.assertTrue(set(new['keywords']) <= set(both['keywords']))
+        self.assertEqual(kept[2]['keywords'].count('gateway'), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
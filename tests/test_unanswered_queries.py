@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import unittest
+from fast_semantic_matcher import FastSemanticMatcher
+from unanswered_queries import add_nearest_entries, cluster_queries, count_queries, read_fallbacks
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+def normalize(query):
+    return ' '.join(query.lower().split())
+
+
+class TestUnansweredQueries(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.log = os.path.join(workdir.name, 'conversations.jsonl')
+        records = [{'user': 'How do I export a report to Excel', 'from_training': False, 'kb': 'default'}] * 3
+        records += [{'user': 'how do i export report to excel', 'from_training': False, 'kb': 'default'},
+                    {'user': 'export my report to excel please', 'from_training': False, 'kb': 'default'},
+                    {'user': 'What is the weather', 'from_training': False, 'kb': 'default'},
+                    {'user': 'What is the weather', 'from_training': False, 'kb': 'other'},
+                    {'user': 'What is Power BI?', 'from_training': True, 'kb': 'default'}]
+        with open(self.log, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            f.write('{truncated\n')
+
+    def test_only_fallbacks_are_read(self):
+        queries = list(read_fallbacks(self.log))
+        self.assertEqual(len(queries), 7)
+        self.assertNotIn('What is Power BI?', queries)
+        self.assertEqual(list(read_fallbacks(self.log, kb='other')), ['What is the weather'])
+
+    def test_clusters_ranked_by_frequency(self):
+        counts, samples, total = count_queries(read_fallbacks(self.log, kb='default'), normalize)
+        self.assertEqual(total, 6)
+
+        clusters = cluster_queries(counts, samples)
+        self.assertEqual(len(clusters), 2)
+        top = clusters[0]
+        self.assertEqual(top['count'], 5)
+        self.assertEqual(top['query'], 'How do I export a report to Excel')
+        self.assertEqual(top['variants'][0]['count'], 3)
+        self.assertEqual(clusters[1]['count'], 1)
+
+        self.assertEqual(len(cluster_queries(counts, samples, min_count=2)), 1)
+
+    def test_distinct_queries_are_bounded(self):
+        queries = [f"question number {i}" for i in range(100)] + ['common question'] * 5
+        counts, samples, total = count_queries(iter(queries[::-1]), normalize, max_distinct=10)
+        self.assertEqual(total, 105)
+        self.assertLessEqual(len(counts), 10)
+        self.assertEqual(counts['common question'], 5)
+        self.assertEqual(set(samples), set(counts))
+
+    def test_nearest_entry_reported_below_threshold(self):
+        with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            matcher = FastSemanticMatcher(json.load(f))
+        clusters = [{'query': 'export power bi report to excel', 'count': 1, 'variants': []},
+                    {'query': 'zzzz qqqq', 'count': 1, 'variants': []}]
+        add_nearest_entries(clusters, matcher)
+
+        nearest = clusters[0]['nearest']
+        self.assertIsNotNone(nearest)
+        self.assertGreater(nearest['score'], 0)
+        self.assertIn(nearest['question'], [entry['question'] for entry in matcher.entries()])
+        self.assertIsNone(clusters[1]['nearest'])
+
+        entry_id, score = matcher.nearest_entry('What is Power BI?')
+        self.assertEqual(matcher.best_entry_id('What is Power BI?'), entry_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
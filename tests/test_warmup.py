@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+from unittest import mock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+import chat_api
+from chatbot import EnhancedChatbot
+from kb_registry import KnowledgeBaseRegistry
+from warmup import frequent_queries, read_queries, warm_up
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'training_data.json')
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.data_file = os.path.join(workdir.name, 'training_data.json')
+        shutil.copy(DATA_FILE, self.data_file)
+        self.log = os.path.join(workdir.name, 'conversations.jsonl')
+        records = [{'user': 'What is Power BI?', 'bot': '...', 'from_training': True, 'kb': 'default'}] * 3
+        records += [{'user': 'what is  power bi', 'bot': '...', 'from_training': True, 'kb': 'default'},
+                    {'user': 'What is DAX?', 'bot': '...', 'from_training': True, 'kb': 'default'},
+                    {'user': 'What is a lakehouse?', 'bot': '...', 'from_training': False, 'kb': 'fabric'}]
+        with open(self.log, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            f.write('{truncated\n\nHow do I create a measure?\nHow do I create a measure?\n')
+        self.chatbot = EnhancedChatbot(self.data_file, name='default')
+
+    def test_queries_ranked_by_normalized_frequency(self):
+        queries = list(read_queries(self.log))
+        self.assertEqual(len(queries), 8)
+        self.assertEqual(queries[-1], 'How do I create a measure?')
+        self.assertNotIn('What is a lakehouse?', list(read_queries(self.log, kb='default')))
+        self.assertEqual(list(read_queries(self.log, kb='fabric')),
+                         ['What is a lakehouse?', 'How do I create a measure?', 'How do I create a measure?'])
+
+        ranked = frequent_queries([self.log, 'missing.jsonl'], self.chatbot.normalize_query)
+        self.assertEqual(ranked[:2], [self.chatbot.normalize_query('What is Power BI?'),
+                                      self.chatbot.normalize_query('How do I create a measure?')])
+        self.assertEqual(len(ranked), 4)
+        self.assertEqual(len(frequent_queries([self.log], self.chatbot.normalize_query, limit=1)), 1)
+
+    def test_warm_up_fills_the_cache_without_answering(self):
+        result = warm_up(self.chatbot, [self.log])
+        self.assertEqual((result['queries'], result['candidates'], result['complete']), (3, 3, True))
+        self.assertEqual(len(self.chatbot.response_cache), 3)
+        self.assertEqual(self.chatbot.questions_answered, 0)
+
+        hits = self.chatbot.response_cache.hits
+        self.chatbot.get_response('WHAT IS POWER BI')
+        self.assertEqual(self.chatbot.response_cache.hits, hits + 1)
+
+    def test_budget_bounds_the_warm_up(self):
+        result = warm_up(self.chatbot, [self.log], budget=0)
+        self.assertEqual(result['queries'], 0)
+        self.assertFalse(result['complete'])
+
+    def test_ready_only_after_warm_up(self):
+        registry = KnowledgeBaseRegistry(kb_dir=os.path.dirname(self.data_file), default_data_file=self.data_file,
+                                         warmup_files=[self.log])
+        during = []
+
+        def record_readiness(chatbot, paths, budget):
+            during.append(chat_api.readiness(registry))
+            return warm_up(chatbot, paths, budget)
+
+        with mock.patch('kb_registry.warm_up', side_effect=record_readiness):
+            registry.load_in_background().join()
+        self.assertEqual(during, [(503, {'status': 'warming'})])
+        status, body = chat_api.readiness(registry)
+        self.assertEqual((status, body['warmup']['queries']), (200, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 
 import json
-import re
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+
+from merge_training_data import merge_entries, print_report
 
 # Extract all Q&A pairs from the PDF content
 pdf_qa_pairs = [
@@ -94,59 +99,21 @@ def update_training_data():
     
     print(f"Current training data has {len(current_data)} entries")
     
-    # Create a mapping of questions from PDF for easy lookup
-    pdf_questions = {qa['question'].lower().strip(): qa for qa in pdf_qa_pairs}
-    
-    updated_count = 0
-    added_count = 0
-    
-    # Update existing entries that match PDF questions
-    for i, entry in enumerate(current_data):
-        entry_question = entry['question'].lower().strip()
-        
-        # Check for exact or similar matches
-        if entry_question in pdf_questions:
-            pdf_entry = pdf_questions[entry_question]
-            if entry['answer'] != pdf_entry['answer']:
-                print(f"✅ UPDATING: {entry['question'][:50]}...")
-                print(f"   OLD: {entry['answer'][:60]}...")
-                print(f"   NEW: {pdf_entry['answer'][:60]}...")
-                current_data[i] = pdf_entry
-                updated_count += 1
-            else:
-                print(f"✓ CORRECT: {entry['question'][:50]}...")
-        else:
-            # Check for partial matches
-            for pdf_q, pdf_entry in pdf_questions.items():
-                if (len(entry_question) > 20 and len(pdf_q) > 20 and 
-                    (entry_question in pdf_q or pdf_q in entry_question or
-                     any(word in pdf_q for word in entry_question.split() if len(word) > 4))):
-                    print(f"🔍 POSSIBLE MATCH:")
-                    print(f"   Current: {entry['question']}")
-                    print(f"   PDF:     {pdf_entry['question']}")
-                    print(f"   Should these be the same? Manual review needed.")
-                    break
-    
-    # Add new entries from PDF that don't exist in current data
-    current_questions = {entry['question'].lower().strip() for entry in current_data}
-    
-    for pdf_qa in pdf_qa_pairs:
-        if pdf_qa['question'].lower().strip() not in current_questions:
-            print(f"➕ ADDING NEW: {pdf_qa['question'][:50]}...")
-            current_data.append(pdf_qa)
-            added_count += 1
+    # PDF answers take priority; near-duplicate questions are found through
+    # MinHash/LSH instead of comparing every entry with every PDF entry
+    merged_data, report = merge_entries([
+        ('Amaan Q&A.pdf', pdf_qa_pairs),
+        ('training_data.json', current_data)
+    ])
+    print_report(merged_data, report, len(current_data) + len(pdf_qa_pairs))
     
-    # Save updated training data
-    with open('data/training_data_updated.json', 'w', encoding='utf-8') as f:
-        json.dump(current_data, f, indent=2, ensure_ascii=False)
+    # Save the single canonical knowledge base
+    with open('data/training_data.json', 'w', encoding='utf-8') as f:
+        json.dump(merged_data, f, indent=2, ensure_ascii=False)
     
-    print(f"\n📊 SUMMARY:")
-    print(f"   Updated entries: {updated_count}")
-    print(f"   Added new entries: {added_count}")
-    print(f"   Total entries: {len(current_data)}")
-    print(f"   Saved to: data/training_data_updated.json")
+    print("   Saved to: data/training_data.json")
     
-    return current_data
+    return merged_data
 
 if __name__ == "__main__":
     print("Updating training data with correct answers from Amaan Q&A.pdf...")
@@ -0,0 +1,11 @@
+"""
+WSGI Entry Point
+Builds the Flask app, and loads the default knowledge base, on import:
+    gunicorn -c gunicorn.conf.py wsgi:app
+With gunicorn's preload_app (set in gunicorn.conf.py) the import happens
+once in the master process and every worker forks from the loaded index.
+"""
+
+from app import create_app
+
+app = application = create_app()